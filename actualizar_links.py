@@ -4,66 +4,62 @@
 Script para actualizar los links en contemplaciones.json usando los datos de fuente_agente.json
 """
 
+import argparse
 import json
 import os
-from typing import Dict, List, Optional
+import shutil
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-def cargar_json(ruta_archivo: str) -> List[Dict]:
-    """Carga un archivo JSON y retorna su contenido"""
-    with open(ruta_archivo, 'r', encoding='utf-8') as f:
-        return json.load(f)
+from conciliacion import NIVELES, Conciliador
+from estadisticas import actualizar_estadisticas
+from lector_indexado import actualizar_exportacion_indexada
+from lector_json import escribir_array_json, iterar_registros
 
-def guardar_json(ruta_archivo: str, datos: List[Dict]) -> None:
-    """Guarda datos en un archivo JSON con formato legible"""
-    with open(ruta_archivo, 'w', encoding='utf-8') as f:
-        json.dump(datos, f, ensure_ascii=False, indent=2)
+def cargar_json(ruta_archivo: str, campos: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """Recorre un archivo JSON registro por registro (opcionalmente solo algunos campos)"""
+    return iterar_registros(ruta_archivo, campos=campos)
 
-def crear_indice_fuente(fuente_agente: List[Dict]) -> Dict[str, str]:
-    """
-    Crea un índice de títulos a links desde fuente_agente.json
-    La clave será el título sin el prefijo "contemplaciones - "
-    """
-    indice = {}
-    
-    for entrada in fuente_agente:
-        title = entrada.get('title', '')
-        link = entrada.get('link', '')
-        file = entrada.get('file', '')
-        
-        # Solo procesar entradas que tienen "contemplaciones -" en el archivo
-        if file.startswith('contemplaciones - ') and title and link:
-            # Remover el prefijo "contemplaciones - " del título para hacer la coincidencia
-            # No es necesario porque el título ya viene sin el prefijo
-            indice[title] = link
-    
-    return indice
+def guardar_json(ruta_archivo: str, datos: Iterable[Dict]) -> int:
+    """Guarda datos en un archivo JSON con formato legible, registro por registro"""
+    return escribir_array_json(ruta_archivo, datos)
 
-def actualizar_links_contemplaciones(contemplaciones: List[Dict], indice_fuente: Dict[str, str]) -> int:
+def actualizar_links_contemplaciones(contemplaciones: Iterable[Dict], mejores: Dict[str, Optional[Tuple[Dict, float]]],
+                                     contador: Dict[str, int],
+                                     modificadas: Optional[List[Dict]] = None) -> Iterator[Dict]:
     """
-    Actualiza los links en contemplaciones usando el índice de fuente_agente
-    Retorna el número de actualizaciones realizadas
+    Actualiza los links en contemplaciones con las coincidencias ya conciliadas
+    Devuelve las entradas a medida que se procesan; contador['actualizaciones']
+    y contador['total'] registran el número de actualizaciones y de entradas,
+    y modificadas (si se pasa) recibe las entradas cuyo link cambió
     """
-    actualizaciones = 0
-    
     for entrada in contemplaciones:
+        contador['total'] += 1
         titulo = entrada.get('titulo', '')
         link_actual = entrada.get('link', '')
+        resultado = mejores.get(titulo)
         
-        if titulo in indice_fuente:
-            nuevo_link = indice_fuente[titulo]
-            if link_actual != nuevo_link:
+        if resultado:
+            nuevo_link = resultado[0].get('link', '')
+            if nuevo_link and link_actual != nuevo_link:
                 entrada['link'] = nuevo_link
-                actualizaciones += 1
+                contador['actualizaciones'] += 1
+                if modificadas is not None:
+                    modificadas.append(entrada)
                 print(f"✓ Actualizado: '{titulo}' -> {nuevo_link}")
             else:
                 print(f"= Sin cambios: '{titulo}' (ya tiene el link correcto)")
         else:
             print(f"⚠ No encontrado: '{titulo}' en fuente_agente")
-    
-    return actualizaciones
+        
+        yield entrada
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--niveles', nargs='+', choices=NIVELES, default=['exacto'],
+                        help="Niveles de la cascada (por defecto solo títulos exactos, como siempre)")
+    args = parser.parse_args()
+    
     # Rutas de archivos
     ruta_contemplaciones = '/home/lucas/divit/contemplacionJson/salida/contemplaciones.json'
     ruta_fuente_agente = '/home/lucas/divit/contemplacionJson/salida/fuente_agente.json'
@@ -72,32 +68,39 @@ def main():
     try:
         print("Cargando archivos...")
         
-        # Cargar datos
-        contemplaciones = cargar_json(ruta_contemplaciones)
-        fuente_agente = cargar_json(ruta_fuente_agente)
-        
-        print(f"- contemplaciones.json: {len(contemplaciones)} entradas")
-        print(f"- fuente_agente.json: {len(fuente_agente)} entradas")
-        
-        # Crear índice de fuente_agente
+        # Crear índice de fuente_agente leyendo solo los campos necesarios y conciliar los títulos
         print("\nCreando índice de fuente_agente...")
-        indice_fuente = crear_indice_fuente(fuente_agente)
-        print(f"- Índice creado con {len(indice_fuente)} entradas de contemplaciones")
+        conciliador = Conciliador.desde_archivo(ruta_fuente_agente, niveles=args.niveles)
+        print(f"- Índice creado con {len(conciliador.indice_exacto)} entradas de contemplaciones")
+        mejores = conciliador.conciliar(r.get('titulo', '') for r in cargar_json(ruta_contemplaciones, campos=('titulo',)))
+        conciliador.mostrar_resumen()
         
-        # Crear backup antes de modificar
+        # Crear backup antes de modificar (copia directa, sin cargar el JSON)
         print(f"\nCreando backup en: {ruta_backup}")
-        guardar_json(ruta_backup, contemplaciones)
+        shutil.copyfile(ruta_contemplaciones, ruta_backup)
         
-        # Actualizar links
+        # Actualizar links en flujo hacia un archivo temporal
         print("\nActualizando links...")
-        actualizaciones = actualizar_links_contemplaciones(contemplaciones, indice_fuente)
+        ruta_temporal = ruta_contemplaciones + '.actualizado'
+        contador = {'actualizaciones': 0, 'total': 0}
+        modificadas = []
+        guardar_json(ruta_temporal, actualizar_links_contemplaciones(
+            cargar_json(ruta_contemplaciones), mejores, contador, modificadas
+        ))
+        actualizaciones = contador['actualizaciones']
+        print(f"- contemplaciones.json: {contador['total']} entradas")
         
         # Guardar cambios
         if actualizaciones > 0:
             print(f"\nGuardando cambios... ({actualizaciones} actualizaciones)")
-            guardar_json(ruta_contemplaciones, contemplaciones)
+            os.replace(ruta_temporal, ruta_contemplaciones)
             print(f"✓ Archivo actualizado: {ruta_contemplaciones}")
+            # La exportación indexada (LectorIndexado) tiene que ver los links nuevos
+            actualizar_exportacion_indexada(ruta_contemplaciones)
+            # El año de los registros sin link_origen sale del link
+            actualizar_estadisticas(ruta_contemplaciones, "contemplaciones", modificadas)
         else:
+            os.remove(ruta_temporal)
             print("\n! No se realizaron actualizaciones")
         
         print(f"\n--- Proceso completado ---")
@@ -4,106 +4,44 @@
 Script para actualizar automáticamente contemplaciones.json con todos los links encontrados
 """
 
+import argparse
 import json
-import re
-from difflib import SequenceMatcher
-from typing import Dict, List, Tuple, Optional
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, Optional, Sequence
 
-def cargar_json(ruta_archivo: str) -> List[Dict]:
-    """Carga un archivo JSON y retorna su contenido"""
-    with open(ruta_archivo, 'r', encoding='utf-8') as f:
-        return json.load(f)
+import coincidencias_tfidf
+from cache_coincidencias import ruta_cache
+from conciliacion import NIVELES, Conciliador
+from estadisticas import actualizar_estadisticas
+from lector_indexado import actualizar_exportacion_indexada
+from lector_json import escribir_array_json, iterar_registros
 
-def guardar_json(ruta_archivo: str, datos: List[Dict]) -> None:
-    """Guarda datos en un archivo JSON con formato legible"""
-    with open(ruta_archivo, 'w', encoding='utf-8') as f:
-        json.dump(datos, f, ensure_ascii=False, indent=2)
+def cargar_json(ruta_archivo: str, campos: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+    """Recorre un archivo JSON registro por registro (opcionalmente solo algunos campos)"""
+    return iterar_registros(ruta_archivo, campos=campos)
 
-def normalizar_texto(texto: str) -> str:
-    """Normaliza un texto para comparación: quita acentos, espacios extra, etc."""
-    # Convertir a minúsculas
-    texto = texto.lower()
-    
-    # Reemplazar caracteres especiales y acentos
-    replacements = {
-        'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ñ': 'n',
-        'à': 'a', 'è': 'e', 'ì': 'i', 'ò': 'o', 'ù': 'u',
-        'â': 'a', 'ê': 'e', 'î': 'i', 'ô': 'o', 'û': 'u',
-        'ä': 'a', 'ë': 'e', 'ï': 'i', 'ö': 'o', 'ü': 'u',
-        'ç': 'c', '«': '"', '»': '"', '"': '"', '"': '"',
-        ''': "'", ''': "'", '–': '-', '—': '-'
-    }
-    
-    for old, new in replacements.items():
-        texto = texto.replace(old, new)
-    
-    # Quitar caracteres especiales y normalizar espacios
-    texto = re.sub(r'[^\w\s-]', ' ', texto)
-    texto = re.sub(r'\s+', ' ', texto)
-    texto = texto.strip()
-    
-    return texto
-
-def extraer_palabras_clave(titulo: str) -> List[str]:
-    """Extrae palabras clave de un título, excluyendo palabras comunes"""
-    palabras_comunes = {
-        'el', 'la', 'los', 'las', 'un', 'una', 'y', 'o', 'de', 'del', 'al', 
-        'en', 'con', 'por', 'para', 'que', 'es', 'se', 'a', 'e', 'i', 'o', 'u',
-        'domingo', 'b', 'c', 'a', 'cuaresma', 'pascua', 'adviento', 'navidad'
-    }
-    
-    texto_norm = normalizar_texto(titulo)
-    palabras = [p for p in texto_norm.split() if len(p) > 2 and p not in palabras_comunes]
-    return palabras
-
-def calcular_similitud(titulo1: str, titulo2: str) -> float:
-    """Calcula la similitud entre dos títulos usando diferentes métodos"""
-    # Normalizar ambos títulos
-    norm1 = normalizar_texto(titulo1)
-    norm2 = normalizar_texto(titulo2)
-    
-    # Similitud de secuencia básica
-    similitud_basica = SequenceMatcher(None, norm1, norm2).ratio()
-    
-    # Similitud por palabras clave
-    palabras1 = set(extraer_palabras_clave(titulo1))
-    palabras2 = set(extraer_palabras_clave(titulo2))
-    
-    if len(palabras1) == 0 or len(palabras2) == 0:
-        similitud_palabras = 0.0
-    else:
-        intersection = len(palabras1.intersection(palabras2))
-        union = len(palabras1.union(palabras2))
-        similitud_palabras = intersection / union if union > 0 else 0.0
-    
-    # Promedio ponderado
-    similitud_final = (similitud_basica * 0.4) + (similitud_palabras * 0.6)
-    
-    return similitud_final
-
-def buscar_mejor_coincidencia(titulo_contemplacion: str, fuente_agente: List[Dict], umbral: float = 0.2) -> Optional[Tuple[Dict, float]]:
-    """Busca la mejor coincidencia para un título de contemplación en fuente_agente"""
-    mejor_coincidencia = None
-    mejor_similitud = 0.0
-    
-    for entrada in fuente_agente:
-        title_fuente = entrada.get('title', '')
-        file_fuente = entrada.get('file', '')
-        
-        # Solo considerar entradas que son contemplaciones
-        if not file_fuente.startswith('contemplaciones -'):
-            continue
-            
-        similitud = calcular_similitud(titulo_contemplacion, title_fuente)
-        
-        if similitud > mejor_similitud and similitud >= umbral:
-            mejor_similitud = similitud
-            mejor_coincidencia = (entrada, similitud)
-    
-    return mejor_coincidencia
+def guardar_json(ruta_archivo: str, datos: Iterable[Dict]) -> int:
+    """Guarda datos en un archivo JSON con formato legible, registro por registro"""
+    return escribir_array_json(ruta_archivo, datos)
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--motor', choices=('similitud', 'tfidf'), default='similitud',
+                        help="similitud: SequenceMatcher + palabras clave; tfidf: n-gramas de caracteres (requiere numpy y scipy)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos para el motor similitud (0 = uno por núcleo)")
+    parser.add_argument('--niveles', nargs='+', choices=NIVELES, default=list(NIVELES),
+                        help="Niveles de la cascada: exacto, normalizado y difuso (por defecto los tres)")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="No usar ni actualizar las caches (catálogo preparado y coincidencias)")
+    args = parser.parse_args()
+    
+    if args.motor == 'tfidf' and not coincidencias_tfidf.DISPONIBLE:
+        print("❌ Error: el motor tfidf necesita numpy y scipy (pip install numpy scipy)")
+        return
+    
     # Rutas de archivos
     ruta_contemplaciones = '/home/lucas/divit/contemplacionJson/salida/contemplaciones.json'
     ruta_fuente_agente = '/home/lucas/divit/contemplacionJson/salida/fuente_agente.json'
@@ -113,29 +51,36 @@ def main():
         print("=== ACTUALIZACIÓN AUTOMÁTICA DE LINKS ===")
         print("Cargando archivos...")
         
-        # Cargar datos
-        contemplaciones = cargar_json(ruta_contemplaciones)
-        fuente_agente = cargar_json(ruta_fuente_agente)
-        
-        print(f"- contemplaciones.json: {len(contemplaciones)} entradas")
-        print(f"- fuente_agente.json: {len(fuente_agente)} entradas")
+        # Conciliar de antemano todos los títulos en cascada; contemplaciones.json se recorre en flujo
+        conciliador = Conciliador.desde_archivo(
+            ruta_fuente_agente, niveles=args.niveles, motor=args.motor,
+            workers=args.workers or os.cpu_count() or 1,
+            ruta_cache=None if args.sin_cache else ruta_cache(ruta_contemplaciones),
+            usar_cache_catalogo=not args.sin_cache,
+        )
+        print(f"- Contemplaciones en fuente_agente: {len(conciliador)}")
+        mejores = conciliador.conciliar(r.get('titulo', '') for r in cargar_json(ruta_contemplaciones, campos=('titulo',)))
+        conciliador.mostrar_resumen()
         
-        # Crear backup completo
+        # Crear backup completo (copia directa, sin cargar el JSON)
         print(f"\nCreando backup completo en: {ruta_backup}")
-        guardar_json(ruta_backup, contemplaciones)
+        shutil.copyfile(ruta_contemplaciones, ruta_backup)
         
         # Actualizar links
         print("\nActualizando links automáticamente...")
         actualizaciones = 0
         coincidencias_parciales = 0
         sin_coincidencias = 0
+        total = 0
+        modificadas = []
         
-        for i, contemplacion in enumerate(contemplaciones):
+        def actualizar_contemplacion(contemplacion: Dict):
+            nonlocal actualizaciones, coincidencias_parciales, sin_coincidencias
             titulo_cont = contemplacion.get('titulo', '')
             if not titulo_cont:
-                continue
+                return
             
-            resultado = buscar_mejor_coincidencia(titulo_cont, fuente_agente, umbral=0.2)
+            resultado = mejores.get(titulo_cont)
             
             if resultado:
                 entrada_fuente, similitud = resultado
@@ -145,6 +90,7 @@ def main():
                 if nuevo_link and nuevo_link != link_actual:
                     contemplacion['link'] = nuevo_link
                     actualizaciones += 1
+                    modificadas.append(contemplacion)
                     
                     if similitud >= 0.9:
                         status = "✓ PERFECTO"
@@ -162,20 +108,36 @@ def main():
                 print(f"✗ NO ENCONTRADO: {titulo_cont[:60]}...")
                 sin_coincidencias += 1
         
+        def contemplaciones_actualizadas():
+            nonlocal total
+            for contemplacion in cargar_json(ruta_contemplaciones):
+                total += 1
+                actualizar_contemplacion(contemplacion)
+                yield contemplacion
+        
+        # Escribir en flujo a un archivo temporal; solo reemplaza el original si hubo cambios
+        ruta_temporal = ruta_contemplaciones + '.actualizado'
+        guardar_json(ruta_temporal, contemplaciones_actualizadas())
+        
         # Guardar cambios
         if actualizaciones > 0:
             print(f"\nGuardando {actualizaciones} actualizaciones...")
-            guardar_json(ruta_contemplaciones, contemplaciones)
+            os.replace(ruta_temporal, ruta_contemplaciones)
             print(f"✓ Archivo actualizado: {ruta_contemplaciones}")
+            # La exportación indexada (LectorIndexado) tiene que ver los links nuevos
+            actualizar_exportacion_indexada(ruta_contemplaciones)
+            # El año de los registros sin link_origen sale del link
+            actualizar_estadisticas(ruta_contemplaciones, "contemplaciones", modificadas)
         else:
+            os.remove(ruta_temporal)
             print("\n! No se realizaron actualizaciones")
         
         print(f"\n=== RESUMEN FINAL ===")
         print(f"✓ Links actualizados: {actualizaciones}")
         print(f"~ Coincidencias parciales: {coincidencias_parciales}")
         print(f"✗ Sin coincidencias: {sin_coincidencias}")
-        print(f"📁 Total procesado: {len(contemplaciones)}")
-        print(f"📊 Porcentaje de éxito: {(actualizaciones/len(contemplaciones)*100):.1f}%")
+        print(f"📁 Total procesado: {total}")
+        print(f"📊 Porcentaje de éxito: {(actualizaciones/total*100):.1f}%")
         print(f"💾 Backup guardado en: {ruta_backup}")
         
     except FileNotFoundError as e:
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacén append-only para contemplaciones y ejercicios espirituales
+Los registros nuevos o actualizados se añaden a un log JSONL y se
+compactan periódicamente en la instantánea JSON publicada
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lector_indexado import escribir_exportacion_indexada
+from lector_json import iterar_registros
+from serializador import codificar_registro, escribir_json
+from sincronizacion import (
+    IndiceSincronizacion, ResultadoSincronizacion, cargar_links, clasificar_registro, fusionar_actualizacion,
+    normalizar_link
+)
+
+
+# Campos que bastan para encontrar un registro existente y decidir si cambió
+CAMPOS_CLAVE = ('id', 'titulo', 'link', 'link_origen', 'hash_contenido')
+
+
+def ruta_log(archivo_instantanea: str) -> Path:
+    """salida/contemplaciones.json -> salida/contemplaciones.log.jsonl"""
+    return Path(archivo_instantanea).with_suffix('.log.jsonl')
+
+
+class AlmacenJSONL:
+    """Almacén con log JSONL append-only y compactación en una instantánea JSON"""
+
+    def __init__(self, archivo_instantanea: str, archivo_log: Optional[str] = None,
+                 umbral_compactacion: int = 200):
+        self.archivo_instantanea = Path(archivo_instantanea)
+        if archivo_log:
+            self.archivo_log = Path(archivo_log)
+        else:
+            self.archivo_log = ruta_log(archivo_instantanea)
+        self.umbral_compactacion = umbral_compactacion
+        self._lock = threading.Lock()
+        self._hilo_compactacion = None
+
+    def _leer_instantanea(self) -> List[Dict]:
+        """Lee la instantánea JSON (lista vacía si todavía no existe)"""
+        try:
+            with open(self.archivo_instantanea, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _leer_log(self) -> List[Dict]:
+        """Lee los registros pendientes del log, ignorando una última línea truncada"""
+        registros = []
+        try:
+            with open(self.archivo_log, 'r', encoding='utf-8') as f:
+                for linea in f:
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        registros.append(json.loads(linea))
+                    except json.JSONDecodeError:
+                        # Escritura interrumpida: el lote no llegó a hacer fsync
+                        print(f"⚠️  Línea incompleta ignorada en {self.archivo_log}")
+        except FileNotFoundError:
+            pass
+        return registros
+
+    def registros_pendientes(self) -> int:
+        """Cuenta los registros del log que aún no están en la instantánea"""
+        return len(self._leer_log())
+
+    def urls_existentes(self) -> set:
+        """Devuelve los links normalizados (link y link_origen) de la instantánea, leída en flujo, y del log"""
+        urls = cargar_links(str(self.archivo_instantanea)) if self.archivo_instantanea.exists() else set()
+        for registro in self._leer_log():
+            for campo in ('link', 'link_origen'):
+                if registro.get(campo):
+                    urls.add(normalizar_link(registro[campo]))
+        return urls
+
+    def cargar_todos(self) -> List[Dict]:
+        """Devuelve la vista consolidada (instantánea + log) sin compactar"""
+        return self._fusionar(self._leer_instantanea(), self._leer_log())
+
+    @staticmethod
+    def _fusionar(registros: List[Dict], log: Iterable[Dict]) -> List[Dict]:
+        """Aplica los registros del log sobre la instantánea, por clave de sincronización"""
+        indice = IndiceSincronizacion()
+        for i, registro in enumerate(registros):
+            indice.agregar(registro, i)
+
+        for registro in log:
+            posicion = indice.buscar(registro)
+            if posicion is not None:
+                # Actualización: se reemplaza en su posición original
+                registros[posicion] = registro
+            else:
+                posicion = len(registros)
+                registros.append(registro)
+            indice.reemplazar(registro, posicion)
+
+        return registros
+
+    def agregar(self, registros: Iterable[Dict]) -> int:
+        """Añade un lote de registros al log y hace fsync; devuelve cuántos se escribieron"""
+        lineas = [codificar_registro(registro, 'min') + '\n' for registro in registros]
+        if not lineas:
+            return 0
+
+        self.archivo_log.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            with open(self.archivo_log, 'a', encoding='utf-8') as f:
+                f.writelines(lineas)
+                f.flush()
+                os.fsync(f.fileno())
+
+        return len(lineas)
+
+    def _indice_claves(self) -> Tuple[IndiceSincronizacion, List[Dict]]:
+        """Índice de sincronización de la vista consolidada, con memoria acotada
+
+        La instantánea se lee en flujo y solo con los campos de la clave y el
+        hash (como en sincronizar_archivo); el log se aplica encima. Devuelve
+        el índice, que apunta a posiciones, y esos campos por posición.
+        """
+        indice = IndiceSincronizacion()
+        claves = []
+        if self.archivo_instantanea.exists():
+            for registro in iterar_registros(str(self.archivo_instantanea), campos=CAMPOS_CLAVE):
+                indice.agregar(registro, len(claves))
+                claves.append(registro)
+
+        for registro in self._leer_log():
+            ligero = {campo: registro[campo] for campo in CAMPOS_CLAVE if campo in registro}
+            posicion = indice.buscar(registro)
+            if posicion is not None:
+                claves[posicion] = ligero
+            else:
+                posicion = len(claves)
+                claves.append(ligero)
+            indice.reemplazar(registro, posicion)
+
+        return indice, claves
+
+    def sincronizar(self, registros: Iterable[Dict]) -> ResultadoSincronizacion:
+        """Añade al log solo los registros nuevos o cuyo hash de contenido cambió"""
+        indice, claves = self._indice_claves()
+
+        resultado = ResultadoSincronizacion()
+        pendientes = []
+        for nuevo in registros:
+            posicion = indice.buscar(nuevo)
+            existente = claves[posicion] if posicion is not None else None
+
+            estado = clasificar_registro(existente, nuevo)
+            if estado == 'sin_cambios':
+                resultado.sin_cambios += 1
+                continue
+
+            if estado == 'insertado':
+                registro = nuevo
+                resultado.insertados += 1
+            else:
+                registro = fusionar_actualizacion(existente, nuevo)
+                resultado.actualizados += 1
+
+            pendientes.append(registro)
+            if posicion is None:
+                posicion = len(claves)
+                claves.append(registro)
+            else:
+                claves[posicion] = registro
+            indice.reemplazar(registro, posicion)
+
+        self.agregar(pendientes)
+        resultado.registros = pendientes
+        return resultado
+
+    def necesita_compactacion(self) -> bool:
+        """Indica si el log superó el umbral de compactación"""
+        return self.registros_pendientes() >= self.umbral_compactacion
+
+    def compactar(self) -> int:
+        """Integra el log en la instantánea y lo vacía; devuelve el total de registros"""
+        with self._lock:
+            log = self._leer_log()
+            if not log:
+                return len(self._leer_instantanea())
+
+            registros = self._fusionar(self._leer_instantanea(), log)
+
+            # Escritura atómica: si se interrumpe, la instantánea anterior sigue intacta
+            # y reaplicar el log es idempotente (las claves son los links de origen)
+            escribir_json(str(self.archivo_instantanea), registros)
+            # La instantánea tiene que estar en disco antes de vaciar el log
+            with open(self.archivo_instantanea, 'rb') as f:
+                os.fsync(f.fileno())
+
+            with open(self.archivo_log, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Con el log ya vacío, la cabecera del índice registra que no hay pendientes
+            escribir_exportacion_indexada(registros, str(self.archivo_instantanea))
+
+            return len(registros)
+
+    def compactar_en_segundo_plano(self) -> threading.Thread:
+        """Lanza la compactación en un hilo (no daemon, para que termine antes de salir)"""
+        if self._hilo_compactacion and self._hilo_compactacion.is_alive():
+            return self._hilo_compactacion
+
+        self._hilo_compactacion = threading.Thread(
+            target=self.compactar, name="compactacion-jsonl", daemon=False
+        )
+        self._hilo_compactacion.start()
+        return self._hilo_compactacion
+
+    def compactar_si_necesario(self, en_segundo_plano: bool = False) -> Optional[threading.Thread]:
+        """Compacta el log si pasó el umbral
+
+        Por defecto compacta en el mismo hilo: estadísticas, particiones y deltas
+        leen la instantánea a continuación y no deben verla a medio reemplazar.
+        """
+        if not self.necesita_compactacion():
+            return None
+
+        print(f"🗜️  Compactando {self.archivo_log} en {self.archivo_instantanea}...")
+        if en_segundo_plano:
+            return self.compactar_en_segundo_plano()
+
+        self.compactar()
+        return None
+
+
+def cargar_corpus_completo(archivo_json: str) -> List[Dict]:
+    """Vista consolidada del corpus: JSON publicado más el log JSONL pendiente, si lo hay"""
+    return AlmacenJSONL(archivo_json).cargar_todos()
+
+
+def iterar_corpus_completo(archivo_json: str) -> Iterator[Dict]:
+    """Como cargar_corpus_completo, pero en flujo cuando no hay registros pendientes en el log"""
+    almacen = AlmacenJSONL(archivo_json)
+    if almacen.registros_pendientes():
+        yield from almacen.cargar_todos()
+    elif almacen.archivo_instantanea.exists():
+        yield from iterar_registros(archivo_json)
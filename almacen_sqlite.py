@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend SQLite opcional para contemplaciones y ejercicios espirituales
+Guarda ambos corpus en tablas indexadas (link, ciclo, tiempo litúrgico,
+categoría, tipo y libro bíblico) y puede exportar al formato JSON actual
+"""
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from almacen_jsonl import AlmacenJSONL
+from archivos import firma_archivo, hash_archivo
+from lector_json import iterar_registros
+from referencias import extraer_libros
+from serializador import escribir_json
+from sincronizacion import ResultadoSincronizacion, clasificar_registro, clave_sincronizacion, normalizar_link
+
+
+# Campos de cada tipo de registro, en el orden en que se publican en el JSON
+CAMPOS = {
+    'contemplaciones': ('id', 'ciclo', 'tiempo_liturgico', 'titulo', 'lecturas', 'resumen', 'link', 'link_origen',
+                        'hash_contenido'),
+    'ejercicios': ('id', 'categoria', 'tipo', 'titulo', 'lecturas', 'resumen', 'link', 'link_origen',
+                   'hash_contenido'),
+}
+
+# Campos categóricos por los que se filtra habitualmente
+CAMPOS_INDEXADOS = {
+    'contemplaciones': ('ciclo', 'tiempo_liturgico'),
+    'ejercicios': ('categoria', 'tipo'),
+}
+
+# Archivo JSON publicado de cada corpus
+ARCHIVOS_JSON = {
+    'contemplaciones': 'salida/contemplaciones.json',
+    'ejercicios': 'salida/ejercicios_espirituales.json',
+}
+
+
+class AlmacenSQLite:
+    """Almacén SQLite con upserts por link normalizado y modo WAL"""
+
+    def __init__(self, ruta: str = "salida/corpus.sqlite3"):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.conexion = sqlite3.connect(str(self.ruta))
+        self.conexion.row_factory = sqlite3.Row
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.execute("PRAGMA foreign_keys=ON")
+        self._crear_esquema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos"""
+        self.conexion.close()
+
+    def _crear_esquema(self):
+        """Crea las tablas e índices si no existen"""
+        for tabla, campos in CAMPOS.items():
+            columnas = ",\n                ".join(
+                f"{campo} INTEGER NOT NULL UNIQUE" if campo == 'id' else f"{campo} TEXT NOT NULL DEFAULT ''"
+                for campo in campos
+            )
+            # La clave (link de origen normalizado, ver clave_sincronizacion) no es única:
+            # en los registros anteriores a link_origen es el link, y tras la reconciliación
+            # varias contemplaciones pueden apuntar al mismo archivo de Drive
+            self.conexion.executescript(f"""
+            CREATE TABLE IF NOT EXISTS {tabla} (
+                clave TEXT NOT NULL,
+                {columnas}
+            );
+            CREATE INDEX IF NOT EXISTS idx_{tabla}_clave ON {tabla}(clave);
+            CREATE INDEX IF NOT EXISTS idx_{tabla}_link ON {tabla}(link);
+            CREATE TABLE IF NOT EXISTS {tabla}_libros (
+                id INTEGER NOT NULL REFERENCES {tabla}(id) ON DELETE CASCADE,
+                libro TEXT NOT NULL,
+                PRIMARY KEY (id, libro)
+            );
+            CREATE INDEX IF NOT EXISTS idx_{tabla}_libros_libro ON {tabla}_libros(libro);
+            """)
+
+            # Bases creadas antes de añadir columnas nuevas (ej: hash_contenido, link_origen)
+            existentes = {fila['name'] for fila in self.conexion.execute(f"PRAGMA table_info({tabla})")}
+            for campo in campos:
+                if campo not in existentes:
+                    self.conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {campo} TEXT NOT NULL DEFAULT ''")
+
+            primero, segundo = CAMPOS_INDEXADOS[tabla]
+            # El índice compuesto cubre las consultas por el primer campo y por ambos
+            self.conexion.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{primero}_{segundo} ON {tabla}({primero}, {segundo})"
+            )
+            self.conexion.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{tabla}_{segundo} ON {tabla}({segundo})"
+            )
+
+        # Firma y SHA-256 del JSON publicado tal como quedó tras la última exportación o importación
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS exportaciones (
+                tabla TEXT PRIMARY KEY,
+                tamano INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL
+            )
+        """)
+        self.conexion.commit()
+
+    def contar(self, tabla: str) -> int:
+        """Cuenta los registros de una tabla"""
+        return self.conexion.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+    def upsert(self, tabla: str, registros: Iterable[Dict], por_link: bool = True) -> ResultadoSincronizacion:
+        """Inserta o actualiza registros cuyo hash de contenido cambió
+
+        Con por_link=True un registro cuyo link de origen ya existe actualiza
+        esa fila (conservando su id y su link); una fila anterior a link_origen
+        se encuentra también por título, si es el único; si no, se inserta. Con
+        por_link=False se actualiza la fila con el mismo id solo si además
+        tiene el mismo link (de origen o publicado). Nunca se pisa otra
+        publicación: si el id ya está ocupado por otro link, el registro nuevo
+        recibe el id siguiente al mayor.
+        """
+        campos = CAMPOS[tabla]
+        columnas = ", ".join(campos)
+        marcadores = ", ".join("?" for _ in campos)
+        insertar = f"INSERT INTO {tabla} (clave, {columnas}) VALUES (?, {marcadores})"
+        actualizar = f"UPDATE {tabla} SET clave = ?, {', '.join(f'{campo} = ?' for campo in campos)} WHERE rowid = ?"
+
+        resultado = ResultadoSincronizacion()
+        with self.conexion:
+            for registro in registros:
+                clave = clave_sincronizacion(registro)
+                valores = {campo: registro.get(campo, '') for campo in campos}
+
+                existente = None
+                if por_link:
+                    if clave:
+                        existente = self.conexion.execute(
+                            f"SELECT rowid, * FROM {tabla} WHERE clave = ? ORDER BY rowid LIMIT 1", (clave,)
+                        ).fetchone()
+                    if existente is None and valores['titulo']:
+                        filas = self.conexion.execute(
+                            f"SELECT rowid, * FROM {tabla} WHERE titulo = ? AND link_origen = '' LIMIT 2",
+                            (valores['titulo'],)
+                        ).fetchall()
+                        existente = filas[0] if len(filas) == 1 else None
+                else:
+                    existente = self.conexion.execute(
+                        f"SELECT rowid, * FROM {tabla} WHERE id = ? AND (clave = ? OR link = ?)",
+                        (valores['id'], clave, valores['link'])
+                    ).fetchone()
+
+                if existente:
+                    valores['id'] = existente['id']
+                    valores['link'] = existente['link']
+                    valores['link_origen'] = valores['link_origen'] or existente['link_origen']
+                    # Sin link de origen la clave sigue siendo el link con el que se guardó la fila
+                    clave = clave_sincronizacion(valores) if valores['link_origen'] else existente['clave']
+                elif self.conexion.execute(f"SELECT 1 FROM {tabla} WHERE id = ?", (valores['id'],)).fetchone():
+                    # Id ocupado por otra publicación (ej: colisión del id derivado del hash del link)
+                    valores['id'] = self.conexion.execute(f"SELECT MAX(id) + 1 FROM {tabla}").fetchone()[0]
+
+                fila = {campo: existente[campo] for campo in campos} if existente else None
+                estado = clasificar_registro(fila, valores)
+                if estado == 'sin_cambios':
+                    resultado.sin_cambios += 1
+                    continue
+
+                datos = tuple(valores[campo] for campo in campos)
+                if existente:
+                    self.conexion.execute(actualizar, (clave,) + datos + (existente['rowid'],))
+                else:
+                    self.conexion.execute(insertar, (clave,) + datos)
+
+                self.conexion.execute(f"DELETE FROM {tabla}_libros WHERE id = ?", (valores['id'],))
+                self.conexion.executemany(
+                    f"INSERT INTO {tabla}_libros (id, libro) VALUES (?, ?)",
+                    [(valores['id'], libro) for libro in extraer_libros(valores['lecturas'])]
+                )
+
+                if estado == 'insertado':
+                    resultado.insertados += 1
+                else:
+                    resultado.actualizados += 1
+                resultado.registros.append(valores)
+
+        return resultado
+
+    def _a_dict(self, tabla: str, fila: sqlite3.Row) -> Dict:
+        """Convierte una fila en un registro con el formato del JSON publicado"""
+        registro = {campo: fila[campo] for campo in CAMPOS[tabla]}
+        # Los registros anteriores al hash de contenido o al link de origen se publican sin esos campos
+        for campo in ('link_origen', 'hash_contenido'):
+            if not registro[campo]:
+                del registro[campo]
+        return registro
+
+    def buscar(self, tabla: str, **filtros) -> List[Dict]:
+        """Busca registros por igualdad en campos (ej: ciclo="C", tiempo_liturgico="Cuaresma")"""
+        for campo in filtros:
+            if campo not in CAMPOS[tabla]:
+                raise ValueError(f"Campo desconocido para {tabla}: {campo}")
+
+        condiciones = " AND ".join(f"{campo} = ?" for campo in filtros) or "1"
+        filas = self.conexion.execute(
+            f"SELECT * FROM {tabla} WHERE {condiciones} ORDER BY rowid", tuple(filtros.values())
+        )
+        return [self._a_dict(tabla, fila) for fila in filas]
+
+    def buscar_por_id(self, tabla: str, id_registro: int) -> Optional[Dict]:
+        """Devuelve el registro con ese id, o None"""
+        fila = self.conexion.execute(f"SELECT * FROM {tabla} WHERE id = ?", (id_registro,)).fetchone()
+        return self._a_dict(tabla, fila) if fila else None
+
+    def buscar_por_link(self, tabla: str, link: str) -> Optional[Dict]:
+        """Devuelve el primer registro con ese link o link de origen (normalizado), o None"""
+        fila = self.conexion.execute(
+            f"SELECT * FROM {tabla} WHERE clave = ? OR link = ? ORDER BY rowid LIMIT 1", (normalizar_link(link), link)
+        ).fetchone()
+        return self._a_dict(tabla, fila) if fila else None
+
+    def buscar_por_libro(self, tabla: str, libro: str) -> List[Dict]:
+        """Devuelve los registros que citan un libro bíblico (abreviatura canónica, ej: "Lc")"""
+        filas = self.conexion.execute(
+            f"SELECT t.* FROM {tabla} t JOIN {tabla}_libros l ON l.id = t.id "
+            f"WHERE l.libro = ? ORDER BY t.rowid", (libro,)
+        )
+        return [self._a_dict(tabla, fila) for fila in filas]
+
+    def importar_json(self, tabla: str, archivo_json: str) -> ResultadoSincronizacion:
+        """Importa un archivo JSON publicado a la tabla (leído en flujo)"""
+        # Se respeta cada registro publicado, aunque compartan link
+        return self.upsert(tabla, iterar_registros(archivo_json), por_link=False)
+
+    def _firma_guardada(self, tabla: str) -> Optional[sqlite3.Row]:
+        return self.conexion.execute(
+            "SELECT tamano, mtime_ns, sha256 FROM exportaciones WHERE tabla = ?", (tabla,)
+        ).fetchone()
+
+    def _registrar_json(self, tabla: str, archivo_json: str, sha256: Optional[str] = None):
+        """Guarda la firma del JSON publicado, que ya refleja el contenido de la tabla"""
+        tamano, mtime_ns = firma_archivo(archivo_json)
+        with self.conexion:
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO exportaciones (tabla, tamano, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (tabla, tamano, mtime_ns, sha256 or hash_archivo(archivo_json))
+            )
+
+    def importar_si_cambio(self, tabla: str, archivo_json: str) -> Optional[ResultadoSincronizacion]:
+        """Importa el JSON publicado si cambió fuera de SQLite desde la última exportación
+
+        Una ejecución con --almacen json o jsonl, o actualizar_links.py, escribe
+        el JSON directamente; sin esto, la próxima exportación desde la tabla
+        revertiría esos cambios. El log JSONL pendiente se compacta antes en el
+        JSON. Primero se toman los links reescritos y después se importan los
+        registros (los nuevos se insertan). Devuelve None si no hubo que importar.
+        """
+        almacen_jsonl = AlmacenJSONL(archivo_json)
+        if almacen_jsonl.registros_pendientes():
+            almacen_jsonl.compactar()
+        if not Path(archivo_json).exists():
+            return None
+
+        guardada = self._firma_guardada(tabla)
+        if guardada and (guardada['tamano'], guardada['mtime_ns']) == firma_archivo(archivo_json):
+            return None
+        sha256 = hash_archivo(archivo_json)
+        if guardada and guardada['sha256'] == sha256:
+            # Solo cambió la fecha de modificación
+            self._registrar_json(tabla, archivo_json, sha256)
+            return None
+
+        self.adoptar_links(tabla, archivo_json)
+        resultado = self.importar_json(tabla, archivo_json)
+        self._registrar_json(tabla, archivo_json, sha256)
+        return resultado
+
+    def adoptar_links(self, tabla: str, archivo_json: str) -> int:
+        """Toma los links que cambiaron en el JSON publicado después de importarlo (por id)
+
+        actualizar_links.py y actualizar_links_completo.py reescriben el link
+        en el JSON; la clave de la fila no cambia, para que la próxima
+        sincronización siga encontrando la publicación por su link original.
+        """
+        if not Path(archivo_json).exists():
+            return 0
+        links = ((registro['link'], registro['id'], registro['link'])
+                 for registro in iterar_registros(archivo_json, campos=('id', 'link'))
+                 if 'id' in registro and registro.get('link'))
+        with self.conexion:
+            cursor = self.conexion.executemany(f"UPDATE {tabla} SET link = ? WHERE id = ? AND link != ?", links)
+        return max(cursor.rowcount, 0)
+
+    def exportar_json(self, tabla: str, archivo_json: str) -> int:
+        """Exporta la tabla al formato JSON actual (mismo orden de inserción), de forma atómica"""
+        adoptados = self.adoptar_links(tabla, archivo_json)
+        if adoptados:
+            print(f"🔗 {adoptados} links tomados de {archivo_json}")
+        total = escribir_json(archivo_json, self.buscar(tabla))
+        self._registrar_json(tabla, archivo_json)
+        return total
+
+
+def main():
+    """Importa, exporta o consulta el almacén SQLite desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default='salida/corpus.sqlite3', help="Ruta de la base de datos")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    for comando in ('importar', 'exportar'):
+        sub = subparsers.add_parser(comando, help=f"{comando.capitalize()} un corpus en formato JSON")
+        sub.add_argument('tabla', choices=sorted(CAMPOS))
+        sub.add_argument('archivo', nargs='?', help="Archivo JSON (por defecto el publicado en salida/)")
+
+    consultar = subparsers.add_parser('consultar', help="Consulta registros por campos, link o libro")
+    consultar.add_argument('tabla', choices=sorted(CAMPOS))
+    consultar.add_argument('--link')
+    consultar.add_argument('--libro')
+    consultar.add_argument('filtros', nargs='*', help="Filtros campo=valor (ej: ciclo=C)")
+
+    args = parser.parse_args()
+
+    with AlmacenSQLite(args.db) as almacen:
+        if args.comando == 'importar':
+            archivo = args.archivo or ARCHIVOS_JSON[args.tabla]
+            resultado = almacen.importar_json(args.tabla, archivo)
+            print(f"✓ Importados desde {archivo}:")
+            resultado.mostrar()
+        elif args.comando == 'exportar':
+            archivo = args.archivo or ARCHIVOS_JSON[args.tabla]
+            total = almacen.exportar_json(args.tabla, archivo)
+            print(f"✓ Exportados {total} registros a {archivo}")
+        else:
+            if args.link:
+                registro = almacen.buscar_por_link(args.tabla, args.link)
+                resultados = [registro] if registro else []
+            elif args.libro:
+                resultados = almacen.buscar_por_libro(args.tabla, args.libro)
+            else:
+                filtros = dict(filtro.split('=', 1) for filtro in args.filtros)
+                resultados = almacen.buscar(args.tabla, **filtros)
+            print(json.dumps(resultados, ensure_ascii=False, indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
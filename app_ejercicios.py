@@ -5,6 +5,7 @@ Aplicación para generar ejercicios espirituales en formato JSON
 Obtiene entradas desde el API de WordPress de ejerciciosespirituales.wordpress.com
 """
 
+import argparse
 import json
 import os
 import re
@@ -15,8 +16,20 @@ from pathlib import Path
 from bs4 import BeautifulSoup
 import time
 
+from almacen_jsonl import AlmacenJSONL
+from almacen_sqlite import AlmacenSQLite
+from busqueda import actualizar_indice_busqueda
+from deltas import publicar_delta
+from estadisticas import actualizar_estadisticas, consultar as consultar_estadisticas, mostrar as mostrar_resumen
+from lector_indexado import actualizar_exportacion_indexada
+from particiones import PARTICIONES, escribir_particiones
+from relacionados import actualizar_relacionados
+from relaciones import actualizar_relaciones
+from serializador import FORMATOS, publicar_formatos
+from sincronizacion import calcular_hash_contenido, sincronizar_archivo
 
-@dataclass
+
+@dataclass(slots=True)
 class EjercicioEspiritual:
     """Clase que representa un ejercicio espiritual"""
     id: int  # ID numérico de WordPress
@@ -26,6 +39,8 @@ class EjercicioEspiritual:
     lecturas: str
     resumen: str
     link: str  # URL del post original
+    hash_contenido: str = ""  # Hash del HTML de origen y de los campos derivados
+    link_origen: str = ""  # URL en WordPress (link puede pasar a ser el de Drive)
     
     def to_dict(self) -> Dict:
         return {
@@ -35,15 +50,19 @@ class EjercicioEspiritual:
             "titulo": self.titulo,
             "lecturas": self.lecturas,
             "resumen": self.resumen,
-            "link": self.link
+            "link": self.link,
+            "link_origen": self.link_origen,
+            "hash_contenido": self.hash_contenido
         }
 
 
 class WordPressAPI:
     """Cliente para interactuar con el API de WordPress"""
     
-    def __init__(self, base_url: str = "https://ejerciciosespirituales.wordpress.com"):
+    def __init__(self, base_url: str = "https://ejerciciosespirituales.wordpress.com", refrescar: bool = False):
         self.base_url = base_url.rstrip('/')
+        # Volver a descargar también las URLs que ya están en el JSON
+        self.refrescar = refrescar
         self.api_url = f"{self.base_url}/wp-json/wp/v2"
         self.session = requests.Session()
         self.session.headers.update({
@@ -197,8 +216,12 @@ class WordPressAPI:
                     print(f"✗ Error en página {page_num}: {e}")
                     continue
             
-            # Cargar URLs ya procesadas para evitar duplicados
-            existing_urls = self._load_existing_urls_from_json()
+            # Cargar URLs ya procesadas para evitar duplicados (salvo que se pida refrescarlas)
+            if self.refrescar:
+                print("🔁 Refresco pedido: se descargan también las URLs ya procesadas")
+                existing_urls = set()
+            else:
+                existing_urls = self._load_existing_urls_from_json()
             
             # Convertir a lista y ordenar por fecha (más recientes primero)
             all_urls_sorted = sorted(list(all_post_urls), reverse=True)
@@ -319,26 +342,17 @@ class WordPressAPI:
             return []
     
     def _load_existing_urls_from_json(self, json_filename="salida/ejercicios_espirituales.json"):
-        """Carga URLs ya procesadas desde el archivo JSON existente"""
+        """Carga URLs ya procesadas desde el archivo JSON existente (y su log JSONL, si lo hay)"""
+        almacen_jsonl = AlmacenJSONL(json_filename)
+        if not Path(json_filename).exists() and not almacen_jsonl.archivo_log.exists():
+            print(f"📝 Archivo JSON no encontrado: {json_filename} - Empezando desde cero")
+            return set()
+
         try:
-            import json
-            with open(json_filename, 'r', encoding='utf-8') as f:
-                ejercicios = json.load(f)
-                
-            existing_urls = set()
-            for ejercicio in ejercicios:
-                link = ejercicio.get('link', '')
-                if link:
-                    # Normalizar URL (quitar fragmentos y parámetros)
-                    clean_link = link.split('#')[0].split('?')[0].rstrip('/')
-                    existing_urls.add(clean_link)
-            
+            existing_urls = almacen_jsonl.urls_existentes()
             print(f"📚 Encontradas {len(existing_urls)} URLs ya procesadas en {json_filename}")
             return existing_urls
-                
-        except FileNotFoundError:
-            print(f"📝 Archivo JSON no encontrado: {json_filename} - Empezando desde cero")
-            return set()
+
         except Exception as e:
             print(f"⚠️  Error al cargar URLs existentes: {e}")
             return set()
@@ -466,8 +480,8 @@ class ProcesadorEjercicios:
         "Ejercicios Generales"
     ]
     
-    def __init__(self, wordpress_url: str = "https://ejerciciosespirituales.wordpress.com"):
-        self.wordpress_api = WordPressAPI(wordpress_url)
+    def __init__(self, wordpress_url: str = "https://ejerciciosespirituales.wordpress.com", refrescar: bool = False):
+        self.wordpress_api = WordPressAPI(wordpress_url, refrescar=refrescar)
         self.ejercicios = []
     
     def validar_categoria(self, categoria: str) -> bool:
@@ -573,15 +587,21 @@ class ProcesadorEjercicios:
         # Obtener el link del post
         link = post.get('link', '') or post.get('guid', {}).get('rendered', '')
         
-        return EjercicioEspiritual(
+        registro = EjercicioEspiritual(
             id=post_id,
             categoria=categoria,
             tipo=tipo,
             titulo=titulo,
             lecturas=lecturas,
             resumen=resumen,
-            link=link
+            link=link,
+            link_origen=link
         )
+        
+        # Hash del contenido de origen para detectar cambios en sincronizaciones posteriores
+        registro.hash_contenido = calcular_hash_contenido(contenido_html, registro.to_dict())
+        
+        return registro
     
     def cargar_desde_wordpress(self, max_posts: int = 100):
         """Carga ejercicios desde WordPress"""
@@ -616,54 +636,98 @@ class ProcesadorEjercicios:
             print(f"Error al cargar desde WordPress: {e}")
             raise
     
-    def generar_json(self, archivo_salida: str = "salida/ejercicios_espirituales.json"):
-        """Genera el archivo JSON con los ejercicios (añade a los existentes)"""
+    def generar_json(self, archivo_salida: str = "salida/ejercicios_espirituales.json", almacen: str = "json",
+                     particionar: bool = False, deltas: bool = True):
+        """Genera el archivo JSON con los ejercicios (inserta los nuevos y actualiza los modificados)"""
         
         # Crear directorio de salida si no existe
         Path(archivo_salida).parent.mkdir(parents=True, exist_ok=True)
         
-        # Cargar ejercicios existentes si el archivo existe
-        ejercicios_existentes = []
-        try:
-            with open(archivo_salida, 'r', encoding='utf-8') as f:
-                ejercicios_existentes = json.load(f)
-            print(f"📚 Cargados {len(ejercicios_existentes)} ejercicios existentes")
-        except FileNotFoundError:
-            print("📝 Creando nuevo archivo de ejercicios")
-        except Exception as e:
-            print(f"⚠️  Error al cargar archivo existente: {e}")
+        if almacen == "jsonl":
+            resultado = self._generar_jsonl(archivo_salida)
+        elif almacen == "sqlite":
+            resultado = self._generar_sqlite(archivo_salida)
+        else:
+            resultado = self._generar_json_completo(archivo_salida)
         
-        # Crear conjunto de URLs existentes para evitar duplicados
-        urls_existentes = set()
-        for ejercicio in ejercicios_existentes:
-            link = ejercicio.get('link', '')
-            if link:
-                clean_link = link.split('#')[0].split('?')[0].rstrip('/')
-                urls_existentes.add(clean_link)
+        # Exportación compacta con índice para lecturas puntuales por id o link: se reconstruye
+        # si el JSON o su log JSONL cambiaron desde que se generó (también por actualizar_links.py)
+        if Path(archivo_salida).exists():
+            actualizar_exportacion_indexada(archivo_salida)
         
-        # Añadir solo ejercicios nuevos
-        nuevos_ejercicios = []
-        duplicados = 0
+        # Conteos del corpus completo, actualizados solo con los registros escritos
+        actualizar_estadisticas(archivo_salida, "ejercicios", resultado.registros)
         
-        for ejercicio in self.ejercicios:
-            clean_link = ejercicio.link.split('#')[0].split('?')[0].rstrip('/')
-            if clean_link not in urls_existentes:
-                nuevos_ejercicios.append(ejercicio.to_dict())
-                urls_existentes.add(clean_link)
-            else:
-                duplicados += 1
+        # Índice de búsqueda de texto completo: solo se indexan los registros escritos
+        actualizar_indice_busqueda(archivo_salida, resultado.registros)
+        
+        # Contemplaciones y ejercicios que citan los mismos pasajes: solo se cruzan los registros escritos
+        actualizar_relaciones(archivo_salida, resultado.registros)
+        
+        # Registros parecidos por titulo y resumen (MinHash/LSH): solo se firman los textos nuevos o modificados
+        actualizar_relacionados(archivo_salida, resultado.registros)
+        
+        # Un archivo por combinación de campos categóricos, con manifiesto
+        if particionar and Path(archivo_salida).exists():
+            escribir_particiones(archivo_salida, PARTICIONES["ejercicios"])
+        
+        # Delta respecto de la publicación anterior para los clientes que ya tienen una copia
+        if deltas and Path(archivo_salida).exists():
+            publicar_delta(archivo_salida)
+    
+    def _generar_json_completo(self, archivo_salida: str):
+        """Sincroniza el JSON publicado completo, leyéndolo y reescribiéndolo en flujo"""
+        if not Path(archivo_salida).exists():
+            print("📝 Creando nuevo archivo de ejercicios")
+        
+        # Insertar los nuevos y actualizar en su lugar los que cambiaron (por hash de contenido),
+        # leyendo el archivo existente en flujo y sin reescribirlo si nada cambió
+        resultado, total = sincronizar_archivo(archivo_salida, (e.to_dict() for e in self.ejercicios))
         
-        # Combinar ejercicios existentes con nuevos
-        todos_los_ejercicios = ejercicios_existentes + nuevos_ejercicios
+        if resultado.modificados:
+            print(f"Archivo actualizado: {archivo_salida}")
+        else:
+            print(f"Sin cambios en: {archivo_salida}")
         
-        # Escribir archivo JSON actualizado
-        with open(archivo_salida, 'w', encoding='utf-8') as f:
-            json.dump(todos_los_ejercicios, f, ensure_ascii=False, indent=2)
+        resultado.mostrar("ejercicios")
+        print(f"Total de ejercicios en archivo: {total}")
         
-        print(f"Archivo actualizado: {archivo_salida}")
-        print(f"Ejercicios nuevos añadidos: {len(nuevos_ejercicios)}")
-        print(f"Duplicados omitidos: {duplicados}")
-        print(f"Total de ejercicios en archivo: {len(todos_los_ejercicios)}")
+        return resultado
+    
+    def _generar_jsonl(self, archivo_salida: str):
+        """Añade al log JSONL los ejercicios nuevos o modificados sin reescribir la instantánea"""
+        almacen_jsonl = AlmacenJSONL(archivo_salida)
+        resultado = almacen_jsonl.sincronizar(e.to_dict() for e in self.ejercicios)
+
+        print(f"Log actualizado: {almacen_jsonl.archivo_log}")
+        resultado.mostrar("ejercicios")
+
+        almacen_jsonl.compactar_si_necesario(en_segundo_plano=False)
+
+        return resultado
+    
+    def _generar_sqlite(self, archivo_salida: str):
+        """Hace upsert de los ejercicios en SQLite y exporta el JSON publicado"""
+        ruta_db = Path(archivo_salida).parent / "corpus.sqlite3"
+        
+        with AlmacenSQLite(str(ruta_db)) as almacen_sqlite:
+            # Primera ejecución, o el JSON publicado cambió fuera de SQLite (--almacen json/jsonl o
+            # actualizar_links.py): se importa antes del upsert para no revertirlo al exportar
+            importados = almacen_sqlite.importar_si_cambio("ejercicios", archivo_salida)
+            if importados:
+                print(f"📚 Importados desde {archivo_salida}: {importados.insertados} nuevos, "
+                      f"{importados.actualizados} actualizados")
+            
+            resultado = almacen_sqlite.upsert("ejercicios", [e.to_dict() for e in self.ejercicios])
+            if resultado.modificados or not Path(archivo_salida).exists():
+                almacen_sqlite.exportar_json("ejercicios", archivo_salida)
+            total = almacen_sqlite.contar("ejercicios")
+        
+        print(f"Base de datos actualizada: {ruta_db}")
+        resultado.mostrar("ejercicios")
+        print(f"Total de ejercicios en archivo: {total}")
+        
+        return resultado
     
     def mostrar_estadisticas(self):
         """Muestra estadísticas de los ejercicios procesados"""
@@ -692,12 +756,31 @@ class ProcesadorEjercicios:
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--almacen', choices=['json', 'jsonl', 'sqlite'], default='json',
+                        help="Modo de almacenamiento: JSON completo, log JSONL o base SQLite indexada")
+    parser.add_argument('--formatos', nargs='*', default=[], choices=[f for f in FORMATOS if f != 'legible'],
+                        help="Publicar además el JSON minificado (min) y/o comprimido con gzip (gz)")
+    parser.add_argument('--particionar', action='store_true',
+                        help="Escribir también un archivo por partición y su manifiesto")
+    parser.add_argument('--sin-deltas', action='store_true',
+                        help="No publicar el delta respecto de la publicación anterior")
+    parser.add_argument('--refrescar', action='store_true',
+                        help="Volver a descargar también las entradas ya procesadas para detectar cambios")
+    parser.add_argument('--stats', action='store_true',
+                        help="Mostrar las estadísticas del corpus almacenado y salir (sin conectarse)")
+    args = parser.parse_args()
+    
+    if args.stats:
+        mostrar_resumen(consultar_estadisticas("salida/ejercicios_espirituales.json"))
+        return 0
+    
     print("=== GENERADOR DE EJERCICIOS ESPIRITUALES ===")
     print("Obteniendo entradas desde https://ejerciciosespirituales.wordpress.com/\n")
     
     try:
         # Crear procesador
-        procesador = ProcesadorEjercicios("https://ejerciciosespirituales.wordpress.com")
+        procesador = ProcesadorEjercicios("https://ejerciciosespirituales.wordpress.com", refrescar=args.refrescar)
         
         # Cargar datos desde WordPress (sin límite para procesar todas)
         print("Conectando con WordPress...")
@@ -712,7 +795,12 @@ def main():
         
         # Generar archivo JSON
         print("\nGenerando archivo JSON...")
-        procesador.generar_json()
+        procesador.generar_json(almacen=args.almacen, particionar=args.particionar,
+                                deltas=not args.sin_deltas)
+        
+        # Variantes minificada y gzip para la descarga
+        for ruta in publicar_formatos("salida/ejercicios_espirituales.json", args.formatos):
+            print(f"📦 Generado: {ruta}")
         
         print("\n¡Proceso completado exitosamente!")
         print(f"Archivo generado: salida/ejercicios_espirituales.json")
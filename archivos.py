@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades comunes sobre archivos
+Firma rápida (tamaño y fecha de modificación) y SHA-256 leído por bloques,
+para decidir si un artefacto derivado de un archivo sigue vigente
+"""
+
+import hashlib
+import os
+from typing import Tuple
+
+
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def hash_archivo(ruta: str) -> str:
+    """SHA-256 de un archivo, leído por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def firma_archivo(ruta: str) -> Tuple[int, int]:
+    """(tamaño, fecha de modificación en ns): si no cambió, se asume el mismo contenido"""
+    estado = os.stat(ruta)
+    return estado.st_size, estado.st_mtime_ns
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Búsqueda de texto completo en los corpus con BM25
+Los registros se tokenizan con la misma normalización que los títulos
+(normalizar_texto: sin acentos, minúsculas, sin signos) y cada término
+guarda su lista de documentos y frecuencias en arreglos compactos. El
+índice se guarda en salida/<corpus>.busqueda, se abre con mmap (solo se
+leen las listas de los términos consultados) y se actualiza con los
+registros que escribe cada ejecución, sin volver a tokenizar el corpus
+"""
+
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from coincidencias import normalizar_texto
+from corpus_compacto import CorpusCompacto
+from deltas import clave_registro
+
+
+MAGIA = b'BM25'
+VERSION = 1
+# Cabecera: magia, versión, largo de los metadatos (JSON)
+CABECERA = struct.Struct('<4sII')
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+
+# Campos que se indexan; el título cuenta doble
+CAMPOS_TEXTO = ('titulo', 'resumen', 'lecturas', 'ciclo', 'tiempo_liturgico', 'categoria', 'tipo')
+PESO_TITULO = 2
+
+
+def tokenizar(texto: str) -> List[str]:
+    """Términos de un texto normalizado (se descartan los de una sola letra)"""
+    return [termino for termino in normalizar_texto(texto or '').split() if len(termino) > 1]
+
+
+def tokens_registro(registro: Dict) -> List[str]:
+    tokens = tokenizar(registro.get('titulo', '')) * PESO_TITULO
+    for campo in CAMPOS_TEXTO[1:]:
+        tokens.extend(tokenizar(registro.get(campo, '') or ''))
+    return tokens
+
+
+def ruta_indice(archivo_json: str) -> Path:
+    """salida/contemplaciones.json -> salida/contemplaciones.busqueda"""
+    return Path(archivo_json).with_suffix('.busqueda')
+
+
+def _arreglo(datos) -> array:
+    """Arreglo de enteros sin signo de 32 bits leído en little-endian"""
+    resultado = array('I', datos)
+    if sys.byteorder != 'little':
+        resultado.byteswap()
+    return resultado
+
+
+def _bytes(arreglo: array) -> bytes:
+    if sys.byteorder != 'little':
+        arreglo = array('I', arreglo)
+        arreglo.byteswap()
+    return arreglo.tobytes()
+
+
+class IndiceBusqueda:
+    """Índice invertido con listas de documentos y frecuencias en array('I')
+
+    Un registro actualizado reemplaza al anterior: el documento viejo queda
+    marcado como eliminado hasta que guardar() compacta el índice.
+    """
+
+    def __init__(self):
+        self.claves: List[str] = []
+        self.posicion: Dict[str, int] = {}
+        self.longitudes = array('I')
+        self.vivos = bytearray()
+        self.documentos = 0
+        self.total_longitud = 0
+        self.terminos: Dict[str, Tuple[array, array]] = {}
+        self.modificado = False
+        # Índice abierto con mmap: las listas se leen del archivo hasta que se modifica
+        self._mapa: Optional[mmap.mmap] = None
+        self._vista: Optional[memoryview] = None
+        self._ubicaciones: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return self.documentos
+
+    @classmethod
+    def abrir(cls, ruta: str) -> 'IndiceBusqueda':
+        """Abre un índice guardado; las listas de cada término quedan en el archivo mapeado"""
+        indice = cls()
+        with open(ruta, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magia, version, largo = CABECERA.unpack_from(mapa, 0)
+        if magia != MAGIA or version != VERSION:
+            mapa.close()
+            raise ValueError(f"{ruta} no es un índice de búsqueda compatible")
+
+        inicio = CABECERA.size
+        metadatos = json.loads(mapa[inicio:inicio + largo].decode('utf-8'))
+        inicio += largo
+        inicio += -inicio % 4
+
+        indice.claves = metadatos['claves']
+        indice.posicion = {clave: doc for doc, clave in enumerate(indice.claves)}
+        indice.documentos = len(indice.claves)
+        indice.total_longitud = metadatos['total_longitud']
+        indice.vivos = bytearray(b'\x01') * indice.documentos
+        fin_longitudes = inicio + 4 * indice.documentos
+        indice.longitudes = _arreglo(mapa[inicio:fin_longitudes])
+        indice._ubicaciones = {termino: tuple(ubicacion) for termino, ubicacion in metadatos['terminos'].items()}
+
+        if sys.byteorder == 'little':
+            indice._mapa = mapa
+            indice._vista = memoryview(mapa)[fin_longitudes:].cast('I')
+        else:
+            # Sin el mismo orden de bytes no se pueden leer directamente del mapa
+            indice._vista = _arreglo(mapa[fin_longitudes:])
+            mapa.close()
+        return indice
+
+    def cerrar(self) -> None:
+        if self._vista is not None and isinstance(self._vista, memoryview):
+            self._vista.release()
+        if self._mapa is not None:
+            self._mapa.close()
+        self._mapa = None
+        self._vista = None
+
+    def _materializar(self) -> None:
+        """Copia a memoria las listas del archivo mapeado (antes de modificar el índice)"""
+        if self._vista is None:
+            return
+        self.terminos = {
+            termino: (array('I', self._vista[inicio:inicio + cantidad]),
+                      array('I', self._vista[inicio + cantidad:inicio + 2 * cantidad]))
+            for termino, (inicio, cantidad) in self._ubicaciones.items()
+        }
+        self._ubicaciones = {}
+        self.cerrar()
+
+    def _postings(self, termino: str) -> Tuple[Sequence[int], Sequence[int]]:
+        """Documentos y frecuencias de un término"""
+        if self._vista is not None:
+            ubicacion = self._ubicaciones.get(termino)
+            if ubicacion is None:
+                return (), ()
+            inicio, cantidad = ubicacion
+            return self._vista[inicio:inicio + cantidad], self._vista[inicio + cantidad:inicio + 2 * cantidad]
+        return self.terminos.get(termino, ((), ()))
+
+    def _retirar(self, clave: str) -> bool:
+        doc = self.posicion.pop(clave, None)
+        if doc is None:
+            return False
+        self.vivos[doc] = 0
+        self.documentos -= 1
+        self.total_longitud -= self.longitudes[doc]
+        return True
+
+    def agregar(self, registros: Iterable[Dict]) -> int:
+        """Indexa registros nuevos o actualizados (reemplazan al de la misma clave)"""
+        self._materializar()
+        cantidad = 0
+        for registro in registros:
+            clave = clave_registro(registro)
+            self._retirar(clave)
+            tokens = tokens_registro(registro)
+            doc = len(self.claves)
+            for termino, frecuencia in Counter(tokens).items():
+                documentos, frecuencias = self.terminos.setdefault(termino, (array('I'), array('I')))
+                documentos.append(doc)
+                frecuencias.append(frecuencia)
+            self.claves.append(clave)
+            self.posicion[clave] = doc
+            self.longitudes.append(len(tokens))
+            self.vivos.append(1)
+            self.documentos += 1
+            self.total_longitud += len(tokens)
+            cantidad += 1
+        self.modificado = self.modificado or cantidad > 0
+        return cantidad
+
+    def eliminar(self, claves: Iterable[str]) -> int:
+        """Quita registros por clave ("id:..." o "link:...")"""
+        self._materializar()
+        cantidad = sum(1 for clave in claves if self._retirar(clave))
+        self.modificado = self.modificado or cantidad > 0
+        return cantidad
+
+    def buscar(self, consulta: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Las k claves con mayor puntaje BM25 para la consulta"""
+        if not self.documentos:
+            return []
+        promedio = self.total_longitud / self.documentos
+        puntajes: Dict[int, float] = {}
+        for termino in dict.fromkeys(tokenizar(consulta)):
+            documentos, frecuencias = self._postings(termino)
+            vigentes = [(doc, frecuencia) for doc, frecuencia in zip(documentos, frecuencias) if self.vivos[doc]]
+            if not vigentes:
+                continue
+            idf = math.log(1 + (self.documentos - len(vigentes) + 0.5) / (len(vigentes) + 0.5))
+            for doc, frecuencia in vigentes:
+                normalizacion = K1 * (1 - B + B * self.longitudes[doc] / promedio)
+                puntajes[doc] = puntajes.get(doc, 0.0) + idf * frecuencia * (K1 + 1) / (frecuencia + normalizacion)
+        mejores = heapq.nlargest(k, puntajes.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.claves[doc], puntaje) for doc, puntaje in mejores]
+
+    def guardar(self, ruta: str) -> None:
+        """Escribe el índice compactado (sin documentos eliminados) de forma atómica"""
+        self._materializar()
+        nuevos = array('i', [-1]) * len(self.claves)
+        claves = []
+        longitudes = array('I')
+        for doc, clave in enumerate(self.claves):
+            if self.vivos[doc]:
+                nuevos[doc] = len(claves)
+                claves.append(clave)
+                longitudes.append(self.longitudes[doc])
+
+        ubicaciones = {}
+        listas = []
+        inicio = 0
+        for termino in sorted(self.terminos):
+            documentos, frecuencias = self.terminos[termino]
+            vigentes = [(nuevos[doc], frecuencia) for doc, frecuencia in zip(documentos, frecuencias) if nuevos[doc] >= 0]
+            if not vigentes:
+                continue
+            listas.append(array('I', (doc for doc, _ in vigentes)))
+            listas.append(array('I', (frecuencia for _, frecuencia in vigentes)))
+            ubicaciones[termino] = [inicio, len(vigentes)]
+            inicio += 2 * len(vigentes)
+
+        metadatos = json.dumps({'claves': claves, 'total_longitud': self.total_longitud, 'terminos': ubicaciones},
+                               ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta.with_name(ruta.name + '.tmp')
+        with open(temporal, 'wb') as f:
+            f.write(CABECERA.pack(MAGIA, VERSION, len(metadatos)))
+            f.write(metadatos)
+            f.write(b'\x00' * (-(CABECERA.size + len(metadatos)) % 4))
+            f.write(_bytes(longitudes))
+            for lista in listas:
+                f.write(_bytes(lista))
+        os.replace(temporal, ruta)
+
+        # El índice en memoria queda igual al guardado
+        self.claves = claves
+        self.posicion = {clave: doc for doc, clave in enumerate(claves)}
+        self.longitudes = longitudes
+        self.vivos = bytearray(b'\x01') * len(claves)
+        self.terminos = {
+            termino: (listas[2 * i], listas[2 * i + 1]) for i, termino in enumerate(ubicaciones)
+        }
+        self.modificado = False
+
+
+def construir_indice(registros: Iterable[Dict]) -> IndiceBusqueda:
+    indice = IndiceBusqueda()
+    indice.agregar(registros)
+    return indice
+
+
+def actualizar_indice_busqueda(archivo_json: str, registros: Iterable[Dict],
+                               eliminados: Iterable[str] = ()) -> IndiceBusqueda:
+    """Aplica los registros escritos en esta ejecución; la primera vez indexa el corpus completo"""
+    ruta = ruta_indice(archivo_json)
+    try:
+        indice = IndiceBusqueda.abrir(ruta)
+    except (OSError, ValueError):
+        indice = construir_indice(CorpusCompacto.desde_json(archivo_json))
+        indice.modificado = True
+
+    indice.agregar(registros)
+    indice.eliminar(eliminados)
+    if indice.modificado:
+        indice.guardar(ruta)
+        print(f"🔎 Índice de búsqueda actualizado: {len(indice)} registros en {ruta}")
+    indice.cerrar()
+    return indice
+
+
+def main():
+    """Busca en un corpus publicado"""
+    from lector_json import iterar_registros
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('consulta')
+    parser.add_argument('--archivo', default='salida/contemplaciones.json')
+    parser.add_argument('-k', type=int, default=10, help="Cantidad de resultados")
+    parser.add_argument('--reconstruir', action='store_true', help="Volver a indexar el corpus completo")
+    args = parser.parse_args()
+
+    ruta = ruta_indice(args.archivo)
+    if args.reconstruir or not ruta.exists():
+        construir_indice(CorpusCompacto.desde_json(args.archivo)).guardar(ruta)
+
+    inicio = time.perf_counter()
+    indice = IndiceBusqueda.abrir(ruta)
+    resultados = indice.buscar(args.consulta, args.k)
+    duracion = time.perf_counter() - inicio
+
+    claves = {clave for clave, _ in resultados}
+    titulos = {
+        clave_registro(registro): registro.get('titulo', '')
+        for registro in iterar_registros(args.archivo, campos=('id', 'link', 'titulo'))
+        if clave_registro(registro) in claves
+    }
+    print(f"🔎 {len(resultados)} resultados para «{args.consulta}» ({duracion * 1000:.1f} ms)")
+    for clave, puntaje in resultados:
+        print(f"  [{puntaje:.2f}] {titulos.get(clave, clave)}")
+    indice.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache persistente de coincidencias de títulos
+Guarda, por hash de título de contemplación, la posición de la mejor entrada
+de fuente_agente y su similitud. Mientras el catálogo tenga los mismos títulos
+en el mismo orden solo se buscan los títulos nuevos o modificados; si se
+agregan o quitan entradas se vuelve a buscar todo
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+Resultado = Optional[Tuple[Dict, float]]
+
+
+def hash_titulo(titulo: str) -> str:
+    return hashlib.blake2b(titulo.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def version_catalogo(entradas: Sequence[Dict], parametros: str) -> str:
+    """Versión del catálogo para la búsqueda: motor, umbral y títulos en orden
+
+    Los links no forman parte de la versión: si cambia solo un link, la
+    posición guardada sigue siendo válida y se lee el link actual.
+    """
+    h = hashlib.blake2b(parametros.encode('utf-8'), digest_size=16)
+    for entrada in entradas:
+        h.update(b'\x00')
+        h.update(entrada.get('title', '').encode('utf-8'))
+    return h.hexdigest()
+
+
+def _clave_entrada(entrada: Dict) -> tuple:
+    # Los resultados de otros procesos son copias: se identifican por valor
+    return tuple(sorted(entrada.items()))
+
+
+def ruta_cache(ruta_contemplaciones: str) -> Path:
+    """salida/contemplaciones.json -> salida/contemplaciones.coincidencias.json"""
+    return Path(ruta_contemplaciones).with_suffix('.coincidencias.json')
+
+
+class CacheCoincidencias:
+    """Resultados de búsqueda guardados entre ejecuciones para un catálogo dado"""
+
+    def __init__(self, ruta: str, entradas: Sequence[Dict], parametros: str):
+        self.ruta = Path(ruta)
+        self.entradas = entradas
+        self.version = version_catalogo(entradas, parametros)
+        self.posiciones = {_clave_entrada(entrada): i for i, entrada in enumerate(entradas)}
+        self.resultados: Dict[str, Optional[List]] = {}
+        self.reutilizados = 0
+        self.calculados = 0
+
+    def cargar(self) -> 'CacheCoincidencias':
+        """Lee la cache; si es de otra versión del catálogo se descarta"""
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return self
+        if datos.get('version') == self.version:
+            self.resultados = datos.get('resultados', {})
+        else:
+            print("🔁 El catálogo cambió: se vuelven a buscar todos los títulos")
+        return self
+
+    def resolver(self, titulos: Iterable[str],
+                 buscar_varios: Callable[[List[str]], List[Resultado]]) -> Dict[str, Resultado]:
+        """Mejor coincidencia de cada título; buscar_varios solo recibe los que no están en la cache"""
+        distintos = {hash_titulo(titulo): titulo for titulo in titulos if titulo}
+        pendientes = [titulo for clave, titulo in distintos.items() if clave not in self.resultados]
+
+        for titulo, resultado in zip(pendientes, buscar_varios(pendientes)):
+            if resultado is None:
+                self.resultados[hash_titulo(titulo)] = None
+            else:
+                entrada, similitud = resultado
+                self.resultados[hash_titulo(titulo)] = [self.posiciones[_clave_entrada(entrada)], similitud]
+
+        self.calculados = len(pendientes)
+        self.reutilizados = len(distintos) - len(pendientes)
+        # Solo se conservan los títulos vigentes
+        self.resultados = {clave: self.resultados[clave] for clave in distintos}
+
+        mejores: Dict[str, Resultado] = {}
+        for clave, titulo in distintos.items():
+            guardado = self.resultados[clave]
+            mejores[titulo] = None if guardado is None else (self.entradas[guardado[0]], guardado[1])
+        return mejores
+
+    def guardar(self) -> None:
+        """Escribe la cache de forma atómica"""
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_name(self.ruta.name + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'resultados': self.resultados}, f)
+        os.replace(temporal, self.ruta)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calendario litúrgico: fecha -> (ciclo, tiempo litúrgico, semana)
+Calcula la Pascua (cómputo gregoriano), el primer domingo de Adviento y el
+Bautismo del Señor, y precalcula una tabla con un valor por día para un
+rango de años, de modo que cada consulta es un acceso a un arreglo. Un
+índice sobre el corpus por (ciclo, tiempo, semana) responde qué
+contemplaciones corresponden a un día
+
+Convenciones (las mismas que usa la clasificación del corpus):
+- La Semana Santa (desde el Domingo de Ramos) cuenta como Pascua, semana 0
+- De Miércoles de Ceniza al sábado siguiente es Cuaresma, semana 0
+- Las semanas empiezan en domingo; el domingo después del Bautismo del
+  Señor es el 2.º del Tiempo Ordinario y la semana de Cristo Rey, la 34
+"""
+
+import argparse
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+TIEMPOS = ("Adviento", "Navidad", "Cuaresma", "Pascua", "Tiempo Ordinario")
+CICLOS = ("A", "B", "C")
+
+ANIO_DESDE = 1970
+ANIO_HASTA = 2100
+
+# Códigos de domingo en los títulos: "Domingo 28 A 2011", "(31 A 2017)", "Pascua 4 B 2021", "(2 B Pascua 2018)"
+PATRON_CODIGO = re.compile(
+    r'\b(?:(adviento|cuaresma|pascua|domingo)\s+)?(\d{1,2})\s+([ABC])\b(?:\s+(adviento|cuaresma|pascua))?\s+(?:19|20)\d{2}',
+    re.IGNORECASE,
+)
+PATRON_RAMOS = re.compile(r'domingo\s+de\s+ramos\s+([ABC])\b', re.IGNORECASE)
+SEMANAS_MAXIMAS = {"Adviento": 4, "Cuaresma": 5, "Pascua": 8, "Tiempo Ordinario": 34}
+
+
+@dataclass(frozen=True)
+class DiaLiturgico:
+    """Ubicación de una fecha en el año litúrgico"""
+    fecha: date
+    ciclo: str
+    tiempo: str
+    semana: int
+
+    def to_dict(self) -> Dict:
+        return {"fecha": self.fecha.isoformat(), "ciclo": self.ciclo, "tiempo": self.tiempo, "semana": self.semana}
+
+
+def fecha_pascua(anio: int) -> date:
+    """Domingo de Pascua (algoritmo gregoriano anónimo de Meeus/Jones/Butcher)"""
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def primer_domingo_adviento(anio: int) -> date:
+    """Domingo entre el 27 de noviembre y el 3 de diciembre"""
+    tope = date(anio, 12, 3)
+    return tope - timedelta(days=(tope.weekday() + 1) % 7)
+
+
+def bautismo_del_senor(anio: int) -> date:
+    """Domingo siguiente al 6 de enero"""
+    inicio = date(anio, 1, 7)
+    return inicio + timedelta(days=(6 - inicio.weekday()) % 7)
+
+
+def ciclo_de(anio_liturgico: int) -> str:
+    """Ciclo dominical del año litúrgico que termina en anio_liturgico (A si el resto por 3 es 1)"""
+    return CICLOS[(anio_liturgico - 1) % 3]
+
+
+def calcular_dia(fecha: date) -> DiaLiturgico:
+    """Calcula directamente el día litúrgico de una fecha (la tabla se llena con esta función)"""
+    anio = fecha.year
+    adviento = primer_domingo_adviento(anio)
+    if fecha >= adviento:
+        ciclo = ciclo_de(anio + 1)
+        navidad = date(anio, 12, 25)
+        if fecha < navidad:
+            return DiaLiturgico(fecha, ciclo, "Adviento", (fecha - adviento).days // 7 + 1)
+        return DiaLiturgico(fecha, ciclo, "Navidad", (fecha - navidad).days // 7 + 1)
+
+    ciclo = ciclo_de(anio)
+    bautismo = bautismo_del_senor(anio)
+    if fecha <= bautismo:
+        return DiaLiturgico(fecha, ciclo, "Navidad", (fecha - date(anio - 1, 12, 25)).days // 7 + 1)
+
+    pascua = fecha_pascua(anio)
+    if fecha < pascua - timedelta(days=46):
+        return DiaLiturgico(fecha, ciclo, "Tiempo Ordinario", (fecha - bautismo).days // 7 + 1)
+    if fecha < pascua - timedelta(days=7):
+        primer_domingo = pascua - timedelta(days=42)
+        semana = 0 if fecha < primer_domingo else (fecha - primer_domingo).days // 7 + 1
+        return DiaLiturgico(fecha, ciclo, "Cuaresma", semana)
+    if fecha < pascua:
+        # Semana Santa
+        return DiaLiturgico(fecha, ciclo, "Pascua", 0)
+    if fecha <= pascua + timedelta(days=49):
+        return DiaLiturgico(fecha, ciclo, "Pascua", (fecha - pascua).days // 7 + 1)
+    # Se cuenta hacia atrás desde Cristo Rey (semana 34)
+    return DiaLiturgico(fecha, ciclo, "Tiempo Ordinario", 34 - ((adviento - fecha).days - 1) // 7)
+
+
+class CalendarioLiturgico:
+    """Tabla precalculada: ciclo, tiempo y semana de cada día en [desde, hasta]"""
+
+    def __init__(self, desde: int = ANIO_DESDE, hasta: int = ANIO_HASTA):
+        self.inicio = date(desde, 1, 1)
+        self.base = self.inicio.toordinal()
+        dias = date(hasta, 12, 31).toordinal() - self.base + 1
+        self.ciclos = bytearray(dias)
+        self.tiempos = bytearray(dias)
+        self.semanas = bytearray(dias)
+        for i in range(dias):
+            dia = calcular_dia(self.inicio + timedelta(days=i))
+            self.ciclos[i] = CICLOS.index(dia.ciclo)
+            self.tiempos[i] = TIEMPOS.index(dia.tiempo)
+            self.semanas[i] = dia.semana
+
+    def dia(self, fecha: date) -> DiaLiturgico:
+        """Día litúrgico de una fecha: un acceso a la tabla (se calcula si está fuera del rango)"""
+        i = fecha.toordinal() - self.base
+        if not 0 <= i < len(self.tiempos):
+            return calcular_dia(fecha)
+        return DiaLiturgico(fecha, CICLOS[self.ciclos[i]], TIEMPOS[self.tiempos[i]], self.semanas[i])
+
+
+@lru_cache(maxsize=4)
+def calendario(desde: int = ANIO_DESDE, hasta: int = ANIO_HASTA) -> CalendarioLiturgico:
+    """Calendario compartido (se calcula una vez por proceso)"""
+    return CalendarioLiturgico(desde, hasta)
+
+
+def proximo_domingo(fecha: date) -> date:
+    """El mismo día si es domingo; si no, el domingo siguiente"""
+    return fecha + timedelta(days=(6 - fecha.weekday()) % 7)
+
+
+def codigo_liturgico(titulo: str) -> Optional[Tuple[str, str, int]]:
+    """(ciclo, tiempo, semana) según el código de domingo del título, si lo tiene"""
+    ramos = PATRON_RAMOS.search(titulo or '')
+    if ramos:
+        return ramos.group(1).upper(), "Pascua", 0
+    coincidencia = PATRON_CODIGO.search(titulo or '')
+    if not coincidencia:
+        return None
+    prefijo, numero, ciclo, sufijo = coincidencia.groups()
+    # En "Domingo 2 C Cuaresma 2022" el tiempo es el sufijo, no el prefijo
+    nombre = (sufijo or prefijo or 'domingo').lower()
+    tiempo = {"adviento": "Adviento", "cuaresma": "Cuaresma", "pascua": "Pascua"}.get(nombre, "Tiempo Ordinario")
+    semana = int(numero)
+    if not 1 <= semana <= SEMANAS_MAXIMAS[tiempo]:
+        return None
+    return ciclo.upper(), tiempo, semana
+
+
+class IndiceLiturgico:
+    """Posiciones de los registros por (ciclo, tiempo, semana) y por (ciclo, tiempo)
+
+    La semana sale del código del título ("Domingo 28 A 2011"); los registros
+    sin código solo entran en el índice por ciclo y tiempo de sus campos.
+    """
+
+    def __init__(self, registros: Iterable[Dict]):
+        self.por_semana: Dict[Tuple[str, str, int], List[int]] = {}
+        self.por_tiempo: Dict[Tuple[str, str], List[int]] = {}
+        for posicion, registro in enumerate(registros):
+            codigo = codigo_liturgico(registro.get('titulo', ''))
+            if codigo is not None:
+                self.por_semana.setdefault(codigo, []).append(posicion)
+                self.por_tiempo.setdefault(codigo[:2], []).append(posicion)
+            else:
+                clave = (registro.get('ciclo', ''), registro.get('tiempo_liturgico', ''))
+                self.por_tiempo.setdefault(clave, []).append(posicion)
+
+    def para(self, dia: DiaLiturgico) -> List[int]:
+        """Registros de la semana del día; si no hay ninguno, los de su ciclo y tiempo"""
+        posiciones = self.por_semana.get((dia.ciclo, dia.tiempo, dia.semana))
+        if posiciones:
+            return posiciones
+        return self.por_tiempo.get((dia.ciclo, dia.tiempo), [])
+
+
+def main():
+    """Muestra el día litúrgico de una fecha y las contemplaciones que le corresponden"""
+    from lector_json import iterar_registros
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fecha', type=date.fromisoformat, default=date.today(), help="AAAA-MM-DD (hoy por defecto)")
+    parser.add_argument('--domingo', action='store_true', help="Usar el próximo domingo a partir de la fecha")
+    parser.add_argument('--archivo', default='salida/contemplaciones.json')
+    parser.add_argument('--limite', type=int, default=10)
+    args = parser.parse_args()
+
+    fecha = proximo_domingo(args.fecha) if args.domingo else args.fecha
+    dia = calendario().dia(fecha)
+    print(f"📅 {fecha.isoformat()}: {dia.tiempo}, semana {dia.semana}, ciclo {dia.ciclo}")
+
+    registros = list(iterar_registros(args.archivo, campos=('id', 'titulo', 'ciclo', 'tiempo_liturgico', 'link')))
+    posiciones = IndiceLiturgico(registros).para(dia)
+    print(f"📖 Contemplaciones: {len(posiciones)}")
+    for posicion in posiciones[:args.limite]:
+        print(f"  - {registros[posicion].get('titulo', '')}")
+    if len(posiciones) > args.limite:
+        print(f"  ... y {len(posiciones) - args.limite} más")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Coincidencia de títulos entre contemplaciones.json y fuente_agente.json
+El catálogo de fuente_agente se prepara una sola vez (título normalizado,
+palabras clave y longitud) y la comparación trabaja solo sobre esos datos
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+# Mismos reemplazos que la cadena de str.replace original, en una sola tabla
+TABLA_NORMALIZACION = str.maketrans({
+    'á': 'a', 'é': 'e', 'í': 'i', 'ó': 'o', 'ú': 'u', 'ñ': 'n',
+    'à': 'a', 'è': 'e', 'ì': 'i', 'ò': 'o', 'ù': 'u',
+    'â': 'a', 'ê': 'e', 'î': 'i', 'ô': 'o', 'û': 'u',
+    'ä': 'a', 'ë': 'e', 'ï': 'i', 'ö': 'o', 'ü': 'u',
+    'ç': 'c', '«': '"', '»': '"', '–': '-', '—': '-',
+})
+
+PATRON_SIMBOLOS = re.compile(r'[^\w\s-]')
+PATRON_ESPACIOS = re.compile(r'\s+')
+
+PALABRAS_COMUNES = frozenset({
+    'el', 'la', 'los', 'las', 'un', 'una', 'y', 'o', 'de', 'del', 'al',
+    'en', 'con', 'por', 'para', 'que', 'es', 'se', 'a', 'e', 'i', 'o', 'u',
+    'domingo', 'b', 'c', 'a', 'cuaresma', 'pascua', 'adviento', 'navidad'
+})
+
+PREFIJO_CONTEMPLACIONES = 'contemplaciones -'
+
+# Sin palabras clave en común la similitud es solo 0.4 * ratio de secuencia: nunca supera 0.4
+COTA_SIN_PALABRAS = 0.4
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza un texto para comparación: quita acentos, espacios extra, etc."""
+    texto = texto.lower().translate(TABLA_NORMALIZACION)
+    texto = PATRON_SIMBOLOS.sub(' ', texto)
+    return PATRON_ESPACIOS.sub(' ', texto).strip()
+
+
+def _palabras_clave(texto_normalizado: str) -> List[str]:
+    return [p for p in texto_normalizado.split() if len(p) > 2 and p not in PALABRAS_COMUNES]
+
+
+def extraer_palabras_clave(titulo: str) -> List[str]:
+    """Extrae palabras clave de un título, excluyendo palabras comunes"""
+    return _palabras_clave(normalizar_texto(titulo))
+
+
+@dataclass(slots=True)
+class TituloPreparado:
+    """Título con su forma normalizada y sus palabras clave ya calculadas"""
+    titulo: str
+    normalizado: str
+    palabras: FrozenSet[str]
+    longitud: int
+    entrada: Optional[Dict] = None
+
+
+def preparar_titulo(titulo: str, entrada: Optional[Dict] = None) -> TituloPreparado:
+    """Normaliza un título una sola vez"""
+    normalizado = normalizar_texto(titulo)
+    return TituloPreparado(
+        titulo=titulo,
+        normalizado=normalizado,
+        palabras=frozenset(_palabras_clave(normalizado)),
+        longitud=len(normalizado),
+        entrada=entrada,
+    )
+
+
+def similitud_palabras(a: TituloPreparado, b: TituloPreparado) -> float:
+    """Jaccard de las palabras clave de dos títulos preparados"""
+    if not a.palabras or not b.palabras:
+        return 0.0
+    union = len(a.palabras | b.palabras)
+    return len(a.palabras & b.palabras) / union if union > 0 else 0.0
+
+
+def similitud_preparada(a: TituloPreparado, b: TituloPreparado) -> float:
+    """Similitud entre dos títulos preparados: 40% secuencia, 60% palabras clave (Jaccard)"""
+    similitud_basica = SequenceMatcher(None, a.normalizado, b.normalizado).ratio()
+    return (similitud_basica * 0.4) + (similitud_palabras(a, b) * 0.6)
+
+
+def similitud_acotada(a: TituloPreparado, b: TituloPreparado, comparador: SequenceMatcher,
+                      umbral: float, mejor: float) -> Optional[float]:
+    """Igual que similitud_preparada, o None si no puede alcanzar el umbral ni superar a mejor
+
+    comparador tiene b como segunda secuencia (su tabla se reutiliza entre búsquedas).
+    Las cotas de real_quick_ratio y quick_ratio nunca son menores que ratio, así que
+    solo se descartan candidatos que de todos modos no ganarían.
+    """
+    aporte_palabras = similitud_palabras(a, b) * 0.6
+    comparador.set_seq1(a.normalizado)
+    for cota in (comparador.real_quick_ratio, comparador.quick_ratio):
+        maximo = (cota() * 0.4) + aporte_palabras
+        if maximo < umbral or maximo <= mejor:
+            return None
+    return (comparador.ratio() * 0.4) + aporte_palabras
+
+
+def calcular_similitud(titulo1: str, titulo2: str) -> float:
+    """Calcula la similitud entre dos títulos usando diferentes métodos"""
+    return similitud_preparada(preparar_titulo(titulo1), preparar_titulo(titulo2))
+
+
+class CatalogoPreparado:
+    """Entradas de contemplaciones de fuente_agente con sus títulos ya normalizados
+
+    Un índice invertido palabra clave -> posiciones permite comparar solo las
+    entradas que comparten alguna palabra con el título buscado.
+    """
+
+    def __init__(self, fuente_agente: Iterable[Dict]):
+        self.entradas: List[TituloPreparado] = [
+            preparar_titulo(entrada.get('title', ''), entrada)
+            for entrada in fuente_agente
+            # Solo considerar entradas que son contemplaciones
+            if entrada.get('file', '').startswith(PREFIJO_CONTEMPLACIONES)
+        ]
+        # Un SequenceMatcher por entrada con su título como segunda secuencia: la tabla
+        # de caracteres de cada entrada se arma una sola vez, la primera vez que se compara
+        self.comparadores: List[Optional[SequenceMatcher]] = [None] * len(self.entradas)
+        self.indice: Dict[str, List[int]] = {}
+        for posicion, entrada in enumerate(self.entradas):
+            for palabra in entrada.palabras:
+                self.indice.setdefault(palabra, []).append(posicion)
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def __getstate__(self) -> Dict:
+        # Las tablas de los comparadores ocupan más que el resto: se rearman al usarlas
+        estado = self.__dict__.copy()
+        estado['comparadores'] = [None] * len(self.entradas)
+        return estado
+
+    def _comparador(self, posicion: int) -> SequenceMatcher:
+        comparador = self.comparadores[posicion]
+        if comparador is None:
+            comparador = self.comparadores[posicion] = SequenceMatcher(None, '', self.entradas[posicion].normalizado)
+        return comparador
+
+    def candidatos(self, preparado: TituloPreparado) -> List[int]:
+        """Posiciones (en orden de catálogo) de las entradas que comparten alguna palabra clave"""
+        posiciones = set()
+        for palabra in preparado.palabras:
+            posiciones.update(self.indice.get(palabra, ()))
+        return sorted(posiciones)
+
+    def _mejor(self, preparado: TituloPreparado, posiciones: Iterable[int], umbral: float,
+               puntajes: Dict[int, float]) -> Optional[Tuple[Dict, float]]:
+        """Mejor entrada entre las posiciones dadas, reutilizando los puntajes ya calculados
+
+        El ratio completo solo se calcula para candidatos cuya cota puede ganar.
+        """
+        mejor_coincidencia = None
+        mejor_similitud = 0.0
+        for posicion in posiciones:
+            candidato = self.entradas[posicion]
+            similitud = puntajes.get(posicion)
+            if similitud is None:
+                similitud = similitud_acotada(preparado, candidato, self._comparador(posicion),
+                                              umbral, mejor_similitud)
+                if similitud is None:
+                    continue
+                puntajes[posicion] = similitud
+            if similitud > mejor_similitud and similitud >= umbral:
+                mejor_similitud = similitud
+                mejor_coincidencia = (candidato.entrada, similitud)
+        return mejor_coincidencia
+
+    def buscar_mejor_coincidencia(self, titulo: str, umbral: float = 0.2) -> Optional[Tuple[Dict, float]]:
+        """Busca la mejor coincidencia para un título de contemplación en el catálogo
+
+        Primero se comparan solo las entradas con palabras clave en común; si la
+        mejor no supera la cota de las demás (o no hay ninguna) se recorre todo el
+        catálogo, así que el resultado es el mismo que el de la búsqueda completa.
+        """
+        preparado = preparar_titulo(titulo)
+        puntajes: Dict[int, float] = {}
+
+        mejor = self._mejor(preparado, self.candidatos(preparado), umbral, puntajes)
+        if mejor is not None and mejor[1] > COTA_SIN_PALABRAS:
+            return mejor
+
+        return self._mejor(preparado, range(len(self.entradas)), umbral, puntajes)
+
+
+# Catálogo de cada proceso de trabajo: llega una sola vez, por el inicializador del pool
+_catalogo_proceso: Optional[CatalogoPreparado] = None
+
+
+def _iniciar_proceso(catalogo: CatalogoPreparado) -> None:
+    global _catalogo_proceso
+    _catalogo_proceso = catalogo
+
+
+def _buscar_bloque(titulos: Sequence[str], umbral: float) -> List[Optional[Tuple[Dict, float]]]:
+    return [_catalogo_proceso.buscar_mejor_coincidencia(titulo, umbral) for titulo in titulos]
+
+
+def buscar_en_paralelo(catalogo: CatalogoPreparado, titulos: Sequence[str], umbral: float = 0.2,
+                       workers: Optional[int] = None,
+                       tamano_bloque: Optional[int] = None) -> List[Optional[Tuple[Dict, float]]]:
+    """Mejor coincidencia de cada título usando varios procesos, en el mismo orden que titulos
+
+    El catálogo se envía a cada proceso una vez al crearlo; a las tareas solo
+    viajan bloques de títulos. Con un solo proceso se busca sin crear el pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(titulos) <= 1:
+        return [catalogo.buscar_mejor_coincidencia(titulo, umbral) for titulo in titulos]
+
+    # Bloques chicos reparten mejor la carga (los títulos no cuestan todos lo mismo)
+    tamano_bloque = tamano_bloque or max(1, len(titulos) // (workers * 4))
+    bloques = [titulos[i:i + tamano_bloque] for i in range(0, len(titulos), tamano_bloque)]
+
+    resultados: List[Optional[Tuple[Dict, float]]] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_proceso,
+                             initargs=(catalogo,)) as executor:
+        # map devuelve los bloques en el orden en que se enviaron
+        for resultado in executor.map(_buscar_bloque, bloques, [umbral] * len(bloques)):
+            resultados.extend(resultado)
+    return resultados
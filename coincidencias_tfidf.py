@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor opcional de coincidencia de títulos con TF-IDF de n-gramas de caracteres
+Los títulos de contemplaciones y de fuente_agente se convierten en matrices
+dispersas (NumPy/SciPy); la similitud coseno de todos contra todos sale de un
+solo producto disperso y se toman los k mejores por fila
+"""
+
+import argparse
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+from coincidencias import PREFIJO_CONTEMPLACIONES, CatalogoPreparado, normalizar_texto
+
+
+DISPONIBLE = np is not None and sparse is not None
+
+
+def _ngramas(texto: str, n_min: int, n_max: int) -> Counter:
+    """N-gramas de caracteres del texto normalizado, con un espacio en cada borde"""
+    texto = f" {normalizar_texto(texto)} "
+    conteo = Counter()
+    for n in range(n_min, n_max + 1):
+        for i in range(len(texto) - n + 1):
+            conteo[texto[i:i + n]] += 1
+    return conteo
+
+
+class VectorizadorTFIDF:
+    """TF-IDF de n-gramas de caracteres con filas normalizadas (L2)"""
+
+    def __init__(self, n_min: int = 2, n_max: int = 4):
+        if not DISPONIBLE:
+            raise ImportError("El motor TF-IDF necesita numpy y scipy: pip install numpy scipy")
+        self.n_min = n_min
+        self.n_max = n_max
+        self.vocabulario: Dict[str, int] = {}
+        self.idf = None
+
+    def _matriz(self, textos: Iterable[str], ampliar: bool):
+        indices, datos, punteros = [], [], [0]
+        for texto in textos:
+            for ngrama, cantidad in _ngramas(texto, self.n_min, self.n_max).items():
+                columna = self.vocabulario.get(ngrama)
+                if columna is None:
+                    if not ampliar:
+                        continue
+                    columna = self.vocabulario[ngrama] = len(self.vocabulario)
+                indices.append(columna)
+                datos.append(cantidad)
+            punteros.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(datos, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(punteros)),
+            shape=(len(punteros) - 1, len(self.vocabulario)),
+        )
+
+    def _normalizar(self, matriz):
+        """Aplica el idf y normaliza cada fila para que el producto sea la similitud coseno"""
+        matriz = matriz @ sparse.diags(self.idf)
+        normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+        normas[normas == 0] = 1.0
+        return sparse.diags(1.0 / normas) @ matriz
+
+    def ajustar(self, textos: Sequence[str]):
+        """Aprende el vocabulario y el idf del catálogo; devuelve su matriz"""
+        conteos = self._matriz(textos, ampliar=True).tocsr()
+        frecuencia_documento = np.bincount(conteos.indices, minlength=len(self.vocabulario))
+        total = conteos.shape[0]
+        self.idf = (np.log((1 + total) / (1 + frecuencia_documento)) + 1).astype(np.float32)
+        return self._normalizar(conteos).tocsr()
+
+    def transformar(self, textos: Sequence[str]):
+        """Matriz de consultas con el vocabulario del catálogo (los n-gramas nuevos se ignoran)"""
+        return self._normalizar(self._matriz(textos, ampliar=False)).tocsr()
+
+
+def mejores_por_fila(similitudes, k: int = 1) -> List[List[Tuple[int, float]]]:
+    """Los k mayores valores de cada fila de una matriz dispersa (columna, valor), de mayor a menor"""
+    similitudes = similitudes.tocsr()
+    resultado = []
+    for fila in range(similitudes.shape[0]):
+        inicio, fin = similitudes.indptr[fila], similitudes.indptr[fila + 1]
+        valores = similitudes.data[inicio:fin]
+        columnas = similitudes.indices[inicio:fin]
+        if len(valores) > k:
+            elegidos = np.argpartition(-valores, k - 1)[:k]
+        else:
+            elegidos = np.arange(len(valores))
+        # Orden por valor descendente y, a igualdad, por posición en el catálogo
+        elegidos = sorted(elegidos, key=lambda i: (-valores[i], columnas[i]))
+        resultado.append([(int(columnas[i]), float(valores[i])) for i in elegidos])
+    return resultado
+
+
+class CatalogoTFIDF:
+    """Catálogo de fuente_agente con la misma interfaz que CatalogoPreparado, puntuado por TF-IDF"""
+
+    def __init__(self, fuente_agente: Iterable[Dict], n_min: int = 2, n_max: int = 4):
+        self.entradas = [
+            entrada for entrada in fuente_agente
+            if entrada.get('file', '').startswith(PREFIJO_CONTEMPLACIONES)
+        ]
+        self.vectorizador = VectorizadorTFIDF(n_min, n_max)
+        self.matriz = self.vectorizador.ajustar([entrada.get('title', '') for entrada in self.entradas])
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def buscar_todas(self, titulos: Sequence[str], umbral: float = 0.3,
+                     k: int = 1) -> List[List[Tuple[Dict, float]]]:
+        """Las k mejores entradas para cada título, con un solo producto disperso"""
+        if not self.entradas or not titulos:
+            return [[] for _ in titulos]
+        similitudes = self.vectorizador.transformar(titulos) @ self.matriz.T
+        return [
+            [(self.entradas[columna], valor) for columna, valor in fila if valor >= umbral]
+            for fila in mejores_por_fila(similitudes, k)
+        ]
+
+    def mejores_por_titulo(self, titulos: Iterable[str], umbral: float = 0.3) -> Dict[str, Optional[Tuple[Dict, float]]]:
+        """Mejor entrada de cada título distinto, calculadas todas juntas"""
+        distintos = list(dict.fromkeys(titulo for titulo in titulos if titulo))
+        return {
+            titulo: (mejores[0] if mejores else None)
+            for titulo, mejores in zip(distintos, self.buscar_todas(distintos, umbral))
+        }
+
+    def buscar_mejor_coincidencia(self, titulo: str, umbral: float = 0.3) -> Optional[Tuple[Dict, float]]:
+        """Mejor entrada para un título (para muchos títulos conviene buscar_todas)"""
+        mejores = self.buscar_todas([titulo], umbral)[0]
+        return mejores[0] if mejores else None
+
+
+def comparar_motores(titulos: Sequence[str], fuente_agente: List[Dict], umbral: float = 0.2,
+                     umbral_tfidf: float = 0.3) -> Dict:
+    """Tiempo de cada motor sobre los mismos títulos y coincidencia entre sus resultados"""
+    inicio = time.perf_counter()
+    actual = CatalogoPreparado(fuente_agente)
+    resultados_actual = [actual.buscar_mejor_coincidencia(titulo, umbral) for titulo in titulos]
+    tiempo_actual = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    tfidf = CatalogoTFIDF(fuente_agente)
+    resultados_tfidf = [fila[0] if fila else None for fila in tfidf.buscar_todas(titulos, umbral_tfidf)]
+    tiempo_tfidf = time.perf_counter() - inicio
+
+    def link(resultado):
+        return resultado[0].get('link') if resultado else None
+
+    iguales = sum(1 for a, b in zip(resultados_actual, resultados_tfidf) if link(a) == link(b))
+    return {
+        'titulos': len(titulos),
+        'catalogo': len(actual),
+        'segundos_actual': tiempo_actual,
+        'segundos_tfidf': tiempo_tfidf,
+        'mismo_resultado': iguales,
+    }
+
+
+def main():
+    """Compara el motor actual con el TF-IDF sobre los archivos reales"""
+    from lector_json import iterar_registros
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('contemplaciones', nargs='?', default='salida/contemplaciones.json')
+    parser.add_argument('fuente_agente', nargs='?', default='salida/fuente_agente.json')
+    parser.add_argument('--muestra', type=int, help="Usar solo los primeros N títulos")
+    args = parser.parse_args()
+
+    titulos = [r.get('titulo', '') for r in iterar_registros(args.contemplaciones, campos=('titulo',))]
+    titulos = [titulo for titulo in titulos if titulo][:args.muestra]
+    fuente_agente = list(iterar_registros(args.fuente_agente, campos=('title', 'link', 'file')))
+
+    r = comparar_motores(titulos, fuente_agente)
+    print(f"Títulos: {r['titulos']} | Catálogo: {r['catalogo']} entradas")
+    print(f"  Similitud actual (SequenceMatcher + Jaccard): {r['segundos_actual']:.2f} s")
+    print(f"  TF-IDF de n-gramas (producto disperso):       {r['segundos_tfidf']:.3f} s")
+    print(f"  Mismo link elegido: {r['mismo_resultado']}/{r['titulos']} "
+          f"({r['mismo_resultado'] / max(r['titulos'], 1) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
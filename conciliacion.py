@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Conciliación de títulos de contemplaciones con fuente_agente.json en cascada
+Cada título se busca primero por igualdad exacta, después por título
+normalizado (ambas búsquedas en diccionarios) y solo los que quedan pasan a
+la búsqueda difusa por similitud; se cuentan aciertos y tiempo de cada nivel
+"""
+
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from archivos import firma_archivo, hash_archivo
+from cache_coincidencias import CacheCoincidencias
+from coincidencias import PREFIJO_CONTEMPLACIONES, CatalogoPreparado, buscar_en_paralelo, normalizar_texto
+from lector_json import iterar_registros
+
+
+NIVELES = ('exacto', 'normalizado', 'difuso')
+SIN_COINCIDENCIA = 'sin_coincidencia'
+
+UMBRAL_SIMILITUD = 0.2
+# La similitud coseno de TF-IDF tiene otra escala que la de SequenceMatcher + Jaccard
+UMBRAL_TFIDF = 0.3
+
+Resultado = Optional[Tuple[Dict, float]]
+
+# Cambia si cambia la estructura del catálogo preparado: los artefactos viejos se descartan
+VERSION_FORMATO_CATALOGO = 3
+
+# Los índices exacto y normalizado exigen el prefijo con el espacio final, como el
+# índice original de actualizar_links.py; el nivel difuso usa PREFIJO_CONTEMPLACIONES
+PREFIJO_INDICES = PREFIJO_CONTEMPLACIONES + ' '
+
+
+class CatalogoConciliacion:
+    """Entradas de contemplaciones de fuente_agente con todo lo que la conciliación precalcula
+
+    Los índices exacto y normalizado solo consideran entradas con título y link
+    y, como el índice original de actualizar_links.py (indice[title] = link), a
+    igual clave gana la última entrada de fuente_agente. La búsqueda difusa, en
+    cambio, se queda con la primera de igual puntaje.
+    """
+
+    def __init__(self, fuente_agente: Iterable[Dict]):
+        self.entradas: List[Dict] = [
+            entrada for entrada in fuente_agente
+            if entrada.get('file', '').startswith(PREFIJO_CONTEMPLACIONES)
+        ]
+        self.indice_exacto: Dict[str, Dict] = {}
+        self.indice_normalizado: Dict[str, Dict] = {}
+        for entrada in self.entradas:
+            titulo = entrada.get('title', '')
+            if titulo and entrada.get('link', '') and entrada['file'].startswith(PREFIJO_INDICES):
+                self.indice_exacto[titulo] = entrada
+                self.indice_normalizado[normalizar_texto(titulo)] = entrada
+        # Títulos normalizados, palabras clave e índice invertido del nivel difuso
+        self.preparado = CatalogoPreparado(self.entradas)
+
+
+def ruta_catalogo_preparado(ruta_fuente_agente: str) -> Path:
+    """salida/fuente_agente.json -> salida/fuente_agente.preparado.pickle"""
+    return Path(ruta_fuente_agente).with_suffix('.preparado.pickle')
+
+
+def cargar_catalogo(ruta_fuente_agente: str, usar_cache: bool = True) -> CatalogoConciliacion:
+    """Catálogo preparado de fuente_agente; se reconstruye solo si el archivo fuente cambió
+
+    Si coinciden tamaño y fecha de modificación se usa el artefacto sin más; si
+    la fecha cambió pero el SHA-256 es el mismo, también (y se actualiza la fecha).
+    """
+    if not usar_cache:
+        return CatalogoConciliacion(iterar_registros(ruta_fuente_agente, campos=('title', 'link', 'file')))
+
+    ruta_artefacto = ruta_catalogo_preparado(ruta_fuente_agente)
+    firma = firma_archivo(ruta_fuente_agente)
+    guardado = None
+    try:
+        with open(ruta_artefacto, 'rb') as f:
+            guardado = pickle.load(f)
+        if guardado.get('formato') != VERSION_FORMATO_CATALOGO:
+            guardado = None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+        guardado = None
+
+    if guardado is not None:
+        if guardado['firma'] == firma:
+            return guardado['catalogo']
+        if guardado['sha256'] == hash_archivo(ruta_fuente_agente):
+            guardado['firma'] = firma
+            _guardar_artefacto(ruta_artefacto, guardado)
+            return guardado['catalogo']
+
+    print(f"🔧 Preparando el catálogo de {ruta_fuente_agente}...")
+    catalogo = CatalogoConciliacion(iterar_registros(ruta_fuente_agente, campos=('title', 'link', 'file')))
+    _guardar_artefacto(ruta_artefacto, {
+        'formato': VERSION_FORMATO_CATALOGO,
+        'firma': firma,
+        'sha256': hash_archivo(ruta_fuente_agente),
+        'catalogo': catalogo,
+    })
+    return catalogo
+
+
+def _guardar_artefacto(ruta: Path, datos: Dict) -> None:
+    temporal = ruta.with_name(ruta.name + '.tmp')
+    with open(temporal, 'wb') as f:
+        pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta)
+
+
+class Conciliador:
+    """Busca la entrada de fuente_agente de cada título con una cascada de niveles"""
+
+    def __init__(self, fuente_agente: Iterable[Dict] = (), niveles: Sequence[str] = NIVELES,
+                 motor: str = 'similitud', workers: int = 1, ruta_cache: Optional[str] = None,
+                 catalogo: Optional[CatalogoConciliacion] = None):
+        self.catalogo = catalogo if catalogo is not None else CatalogoConciliacion(fuente_agente)
+        self.entradas = self.catalogo.entradas
+        self.indice_exacto = self.catalogo.indice_exacto
+        self.indice_normalizado = self.catalogo.indice_normalizado
+        self.niveles = tuple(nivel for nivel in NIVELES if nivel in niveles)
+        self.motor = motor
+        self.workers = workers
+        self.ruta_cache = ruta_cache
+
+        self.nivel_de: Dict[str, str] = {}
+        self.conteos: Dict[str, int] = dict.fromkeys(NIVELES + (SIN_COINCIDENCIA,), 0)
+        self.tiempos: Dict[str, float] = dict.fromkeys(NIVELES, 0.0)
+        self.cache: Optional[CacheCoincidencias] = None
+
+    @classmethod
+    def desde_archivo(cls, ruta_fuente_agente: str, usar_cache_catalogo: bool = True, **opciones) -> 'Conciliador':
+        """Usa el catálogo preparado de fuente_agente.json (se prepara solo si el archivo cambió)"""
+        return cls(catalogo=cargar_catalogo(ruta_fuente_agente, usar_cache_catalogo), **opciones)
+
+    def __len__(self) -> int:
+        return len(self.entradas)
+
+    def _buscador_difuso(self) -> Tuple[str, Callable[[List[str]], List[Resultado]]]:
+        """Motor del nivel difuso: parámetros (para la versión de la cache) y búsqueda de varios títulos"""
+        if self.motor == 'tfidf':
+            from coincidencias_tfidf import CatalogoTFIDF
+            catalogo = CatalogoTFIDF(self.entradas)
+
+            def buscar_varios(titulos):
+                # Todos los títulos de una vez, con un producto de matrices dispersas
+                return [mejores[0] if mejores else None
+                        for mejores in catalogo.buscar_todas(titulos, umbral=UMBRAL_TFIDF)]
+            return f"tfidf:{UMBRAL_TFIDF}", buscar_varios
+
+        catalogo = self.catalogo.preparado
+
+        def buscar_varios(titulos):
+            # Con más de un proceso los títulos se reparten; el resultado no depende de cuántos haya
+            return buscar_en_paralelo(catalogo, titulos, umbral=UMBRAL_SIMILITUD, workers=self.workers)
+        return f"similitud:{UMBRAL_SIMILITUD}", buscar_varios
+
+    def _difuso(self, titulos: List[str]) -> Dict[str, Resultado]:
+        parametros, buscar_varios = self._buscador_difuso()
+        if self.ruta_cache is None:
+            return dict(zip(titulos, buscar_varios(titulos)))
+        self.cache = CacheCoincidencias(self.ruta_cache, self.entradas, parametros).cargar()
+        mejores = self.cache.resolver(titulos, buscar_varios)
+        self.cache.guardar()
+        return mejores
+
+    def conciliar(self, titulos: Iterable[str]) -> Dict[str, Resultado]:
+        """Mejor entrada (y similitud) de cada título distinto; None si ningún nivel la encuentra"""
+        pendientes = list(dict.fromkeys(titulo for titulo in titulos if titulo))
+        resultados: Dict[str, Resultado] = {}
+
+        for nivel in self.niveles:
+            if not pendientes:
+                break
+            inicio = time.perf_counter()
+            if nivel == 'difuso':
+                encontrados = self._difuso(pendientes)
+            else:
+                indice = self.indice_exacto if nivel == 'exacto' else self.indice_normalizado
+                encontrados = {}
+                for titulo in pendientes:
+                    entrada = indice.get(titulo if nivel == 'exacto' else normalizar_texto(titulo))
+                    if entrada is not None:
+                        encontrados[titulo] = (entrada, 1.0)
+
+            restantes = []
+            for titulo in pendientes:
+                resultado = encontrados.get(titulo)
+                if resultado is None:
+                    restantes.append(titulo)
+                else:
+                    resultados[titulo] = resultado
+                    self.nivel_de[titulo] = nivel
+                    self.conteos[nivel] += 1
+            pendientes = restantes
+            self.tiempos[nivel] += time.perf_counter() - inicio
+
+        for titulo in pendientes:
+            resultados[titulo] = None
+            self.nivel_de[titulo] = SIN_COINCIDENCIA
+        self.conteos[SIN_COINCIDENCIA] += len(pendientes)
+        return resultados
+
+    def mostrar_resumen(self) -> None:
+        """Aciertos y tiempo de cada nivel (en títulos distintos)"""
+        print("- Conciliación por niveles (títulos distintos):")
+        for nivel in self.niveles:
+            print(f"    {nivel}: {self.conteos[nivel]} en {self.tiempos[nivel] * 1000:.1f} ms")
+        print(f"    sin coincidencia: {self.conteos[SIN_COINCIDENCIA]}")
+        if self.cache is not None:
+            print(f"- Coincidencias difusas en cache: {self.cache.reutilizados} reutilizadas, "
+                  f"{self.cache.calculados} calculadas")
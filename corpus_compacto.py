@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Representación compacta en memoria de un corpus completo
+Los registros se guardan por columnas; los campos de baja cardinalidad
+(ciclo, tiempo litúrgico, categoría, tipo) se codifican como índices a un
+vocabulario internado y el JSON se escribe directamente desde las columnas.
+Es la forma en que se tiene un corpus entero en memoria: estadísticas,
+índice de búsqueda, relaciones y servidor de consultas
+"""
+
+import json
+import os
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from almacen_jsonl import iterar_corpus_completo
+
+
+# Campos categóricos de cada corpus
+CAMPOS_CATEGORICOS = {
+    "contemplaciones": ("ciclo", "tiempo_liturgico"),
+    "ejercicios": ("categoria", "tipo"),
+}
+
+# Codificadores reutilizados: el de cadenas es la versión en C de la biblioteca estándar
+_codificar_cadena = json.encoder.encode_basestring
+_codificador = json.JSONEncoder(ensure_ascii=False, indent=2)
+
+# Marca de campo ausente en un registro (los JSON antiguos no tienen hash_contenido)
+_AUSENTE = object()
+
+
+class ColumnaCategorica:
+    """Columna codificada por diccionario: un código por registro y un vocabulario internado"""
+
+    def __init__(self):
+        self.vocabulario: List[str] = []
+        self._codigos_por_valor: Dict[str, int] = {}
+        # El código 0 queda reservado para "campo ausente"
+        self.codigos = array('H')
+
+    def agregar(self, valor) -> None:
+        if valor is _AUSENTE:
+            self.codigos.append(0)
+            return
+        codigo = self._codigos_por_valor.get(valor)
+        if codigo is None:
+            if isinstance(valor, str):
+                valor = sys.intern(valor)
+            self.vocabulario.append(valor)
+            codigo = len(self.vocabulario)
+            self._codigos_por_valor[valor] = codigo
+        self.codigos.append(codigo)
+
+    def valor(self, posicion: int):
+        codigo = self.codigos[posicion]
+        return _AUSENTE if codigo == 0 else self.vocabulario[codigo - 1]
+
+    def contar(self) -> Dict[str, int]:
+        """Cuenta los registros por valor sin reconstruir los registros"""
+        conteo = Counter(self.codigos)
+        return {self.vocabulario[codigo - 1]: cantidad for codigo, cantidad in conteo.items() if codigo}
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+
+class CorpusCompacto:
+    """Corpus almacenado por columnas con los campos categóricos codificados"""
+
+    def __init__(self, campos: Sequence[str], campos_categoricos: Sequence[str] = ()):
+        self.campos: List[str] = []
+        self.campos_categoricos = tuple(campos_categoricos)
+        self._columnas = {}
+        self._total = 0
+        for campo in campos:
+            self._agregar_columna(campo)
+
+    @classmethod
+    def desde_registros(cls, registros: Iterable, campos_categoricos: Sequence[str] = (),
+                        campos: Optional[Sequence[str]] = None) -> 'CorpusCompacto':
+        """Construye el corpus desde diccionarios u objetos con to_dict()"""
+        corpus = None
+        for registro in registros:
+            if not isinstance(registro, dict):
+                registro = registro.to_dict()
+            if corpus is None:
+                corpus = cls(campos or list(registro.keys()), campos_categoricos)
+            corpus.agregar(registro)
+        return corpus if corpus is not None else cls(campos or [], campos_categoricos)
+
+    @classmethod
+    def desde_json(cls, ruta: str, campos_categoricos: Optional[Sequence[str]] = None) -> 'CorpusCompacto':
+        """Carga en flujo un JSON publicado más su log JSONL pendiente; infiere el corpus por el nombre del archivo"""
+        if campos_categoricos is None:
+            campos_categoricos = campos_categoricos_de(ruta)
+        return cls.desde_registros(iterar_corpus_completo(ruta), campos_categoricos)
+
+    def agregar(self, registro: Dict) -> None:
+        """Añade un registro; los campos que no estaban en el corpus se agregan como columnas nuevas"""
+        for campo in registro:
+            if campo not in self._columnas:
+                self._agregar_columna(campo)
+        for campo in self.campos:
+            valor = registro.get(campo, _AUSENTE)
+            if campo in self.campos_categoricos:
+                self._columnas[campo].agregar(valor)
+            else:
+                self._columnas[campo].append(valor)
+        self._total += 1
+
+    def _agregar_columna(self, campo: str) -> None:
+        """Crea una columna vacía, con el campo ausente en los registros ya cargados"""
+        self.campos.append(campo)
+        if campo in self.campos_categoricos:
+            columna = ColumnaCategorica()
+            columna.codigos.extend([0] * self._total)
+        else:
+            columna = [_AUSENTE] * self._total
+        self._columnas[campo] = columna
+
+    def __len__(self) -> int:
+        return self._total
+
+    def _valor(self, campo: str, posicion: int):
+        columna = self._columnas[campo]
+        if campo in self.campos_categoricos:
+            return columna.valor(posicion)
+        return columna[posicion]
+
+    def registro(self, posicion: int) -> Dict:
+        """Reconstruye un registro como diccionario"""
+        resultado = {}
+        for campo in self.campos:
+            valor = self._valor(campo, posicion)
+            if valor is not _AUSENTE:
+                resultado[campo] = valor
+        return resultado
+
+    def __iter__(self) -> Iterator[Dict]:
+        for posicion in range(self._total):
+            yield self.registro(posicion)
+
+    def columna(self, campo: str) -> List:
+        """Valores de una columna (None donde el campo no está)"""
+        return [
+            None if valor is _AUSENTE else valor
+            for valor in (self._valor(campo, i) for i in range(self._total))
+        ]
+
+    def contar_por(self, campo: str) -> Dict[str, int]:
+        """Cantidad de registros por valor de un campo"""
+        if campo in self.campos_categoricos:
+            return self._columnas[campo].contar()
+        return dict(Counter(valor for valor in self._columnas[campo] if valor is not _AUSENTE))
+
+    def _lineas_registro(self, posicion: int, claves: Dict[str, str], vocabularios: Dict[str, List[str]]) -> List[str]:
+        """Líneas "clave": valor de un registro, con los valores categóricos ya codificados"""
+        lineas = []
+        for campo in self.campos:
+            if campo in vocabularios:
+                codigo = self._columnas[campo].codigos[posicion]
+                if codigo == 0:
+                    continue
+                texto = vocabularios[campo][codigo - 1]
+            else:
+                valor = self._columnas[campo][posicion]
+                if valor is _AUSENTE:
+                    continue
+                if isinstance(valor, str):
+                    texto = _codificar_cadena(valor)
+                elif type(valor) is int:
+                    texto = int.__repr__(valor)
+                else:
+                    texto = _codificador.encode(valor).replace('\n', '\n    ')
+            lineas.append(claves[campo] + texto)
+        return lineas
+
+    def escribir_json(self, ruta: str) -> int:
+        """Escribe el corpus como array JSON (mismo formato que json.dump con indent=2), de forma atómica"""
+        destino = Path(ruta)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporal = destino.with_name(destino.name + '.tmp')
+
+        # Claves y valores categóricos se codifican una sola vez
+        claves = {campo: '    ' + _codificar_cadena(campo) + ': ' for campo in self.campos}
+        vocabularios = {
+            campo: [_codificador.encode(valor) for valor in self._columnas[campo].vocabulario]
+            for campo in self.campos_categoricos if campo in self._columnas
+        }
+
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                if not self._total:
+                    f.write('[]')
+                for posicion in range(self._total):
+                    lineas = self._lineas_registro(posicion, claves, vocabularios)
+                    cuerpo = '{\n' + ',\n'.join(lineas) + '\n  }' if lineas else '{}'
+                    f.write(('[\n  ' if posicion == 0 else ',\n  ') + cuerpo)
+                if self._total:
+                    f.write('\n]')
+            os.replace(temporal, destino)
+        except BaseException:
+            temporal.unlink(missing_ok=True)
+            raise
+        return self._total
+
+
+def campos_categoricos_de(ruta: str) -> Sequence[str]:
+    """Campos categóricos según el corpus del archivo (contemplaciones o ejercicios)"""
+    nombre = Path(ruta).name
+    if 'ejercicio' in nombre:
+        return CAMPOS_CATEGORICOS["ejercicios"]
+    return CAMPOS_CATEGORICOS["contemplaciones"]
+
+
+def main():
+    """Carga un JSON publicado en forma compacta y muestra sus conteos por campo categórico"""
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivo', nargs='?', default='salida/contemplaciones.json')
+    parser.add_argument('--salida', help="Reescribir el corpus desde las columnas en este archivo")
+    args = parser.parse_args()
+
+    corpus = CorpusCompacto.desde_json(args.archivo)
+    print(f"📚 {len(corpus)} registros cargados de {args.archivo}")
+    for campo in corpus.campos_categoricos:
+        print(f"\nPor {campo}:")
+        for valor, cantidad in sorted(corpus.contar_por(campo).items(), key=lambda x: -x[1]):
+            print(f"  {valor}: {cantidad}")
+
+    if args.salida:
+        corpus.escribir_json(args.salida)
+        print(f"\n✓ Corpus escrito en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publicación por deltas de los corpus
+Cada publicación compara el JSON publicado con el estado anterior (un hash
+por registro, clave id o link) y escribe un delta con los registros
+agregados, actualizados y eliminados; los clientes aplican la cadena de
+deltas sobre su copia en lugar de volver a descargar el corpus completo.
+Cada delta lleva el SHA-256 de la codificación canónica del corpus
+resultante (serializador.hash_canonico: el formato del JSON publicado, de
+modo que coincide con el SHA-256 de ese archivo)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from almacen_jsonl import AlmacenJSONL
+from lector_json import escribir_array_json, iterar_registros
+from serializador import hash_canonico
+from sincronizacion import normalizar_link
+
+
+NOMBRE_INDICE = "indice.json"
+NOMBRE_ESTADO = "estado.json"
+
+
+def clave_registro(registro: Dict) -> str:
+    """Clave estable de un registro: el id, o el link normalizado si no tiene id"""
+    if registro.get('id') is not None:
+        return f"id:{registro['id']}"
+    return f"link:{normalizar_link(registro.get('link', ''))}"
+
+
+def hash_registro(registro: Dict) -> str:
+    """Hash del registro completo (independiente del orden de los campos)"""
+    texto = json.dumps(registro, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def directorio_deltas(archivo_json: str) -> Path:
+    """salida/contemplaciones.json -> salida/contemplaciones.deltas/"""
+    return Path(archivo_json).with_suffix('.deltas')
+
+
+def calcular_delta(hashes_anteriores: Dict[str, str], actuales: Iterable[Dict]) -> Tuple[Dict, Dict[str, str]]:
+    """Compara en una pasada los registros actuales con los hashes anteriores
+
+    Devuelve el delta (agregados, actualizados, eliminados) y los hashes actuales.
+    """
+    agregados, actualizados = [], []
+    hashes = {}
+    for registro in actuales:
+        clave = clave_registro(registro)
+        valor = hash_registro(registro)
+        hashes[clave] = valor
+        anterior = hashes_anteriores.get(clave)
+        if anterior is None:
+            agregados.append(registro)
+        elif anterior != valor:
+            actualizados.append(registro)
+
+    eliminados = [clave for clave in hashes_anteriores if clave not in hashes]
+    delta = {'agregados': agregados, 'actualizados': actualizados, 'eliminados': eliminados}
+    return delta, hashes
+
+
+def comparar_archivos(archivo_anterior: str, archivo_actual: str) -> Dict:
+    """Delta entre dos instantáneas JSON, leídas en flujo"""
+    hashes_anteriores = {clave_registro(r): hash_registro(r) for r in iterar_registros(archivo_anterior)}
+    delta, _ = calcular_delta(hashes_anteriores, iterar_registros(archivo_actual))
+    return delta
+
+
+def _leer_json(ruta: Path, defecto):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return defecto
+
+
+def _escribir_json(ruta: Path, datos) -> int:
+    """Escribe un JSON de forma atómica; devuelve el tamaño en bytes"""
+    contenido = json.dumps(datos, ensure_ascii=False, indent=2).encode('utf-8')
+    temporal = ruta.with_name(ruta.name + '.tmp')
+    with open(temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+    return len(contenido)
+
+
+def publicar_delta(archivo_json: str) -> Optional[Dict]:
+    """Escribe el delta de la publicación actual respecto de la anterior; None si no hubo cambios
+
+    La primera vez solo registra el estado (versión 0): los clientes parten del JSON completo.
+    """
+    directorio = directorio_deltas(archivo_json)
+    directorio.mkdir(parents=True, exist_ok=True)
+    estado = _leer_json(directorio / NOMBRE_ESTADO, None)
+    indice = _leer_json(directorio / NOMBRE_INDICE, {'version': 0, 'deltas': []})
+
+    # El hash es el mismo que calcula aplicar_cadena sobre la copia del cliente
+    hashes_anteriores = estado['hashes'] if estado else {}
+    almacen = AlmacenJSONL(archivo_json)
+    if almacen.registros_pendientes():
+        # Modo JSONL: se publica la vista consolidada (instantánea más log)
+        registros = almacen.cargar_todos()
+        delta, hashes = calcular_delta(hashes_anteriores, registros)
+        hash_instantanea = hash_canonico(registros)
+    else:
+        # Dos pasadas en flujo sobre el JSON publicado
+        delta, hashes = calcular_delta(hashes_anteriores, iterar_registros(archivo_json))
+        hash_instantanea = hash_canonico(iterar_registros(archivo_json))
+
+    if estado is None:
+        version = 0
+        publicado = None
+        print(f"📌 Estado inicial de deltas registrado en {directorio}")
+    elif not (delta['agregados'] or delta['actualizados'] or delta['eliminados']):
+        print(f"= Sin cambios para publicar en {directorio}")
+        return None
+    else:
+        version = estado['version'] + 1
+        publicado = {'version': version, 'base': estado['version'], 'sha256': hash_instantanea, **delta}
+        archivo_delta = f"{version:06d}.json"
+        tamano = _escribir_json(directorio / archivo_delta, publicado)
+        indice['deltas'].append({
+            'version': version,
+            'archivo': archivo_delta,
+            'agregados': len(delta['agregados']),
+            'actualizados': len(delta['actualizados']),
+            'eliminados': len(delta['eliminados']),
+            'bytes': tamano,
+        })
+        print(f"🧩 Delta {archivo_delta}: +{len(delta['agregados'])} "
+              f"~{len(delta['actualizados'])} -{len(delta['eliminados'])} ({tamano} bytes)")
+
+    # El índice se escribe después del delta y el estado al final: si algo se interrumpe,
+    # la próxima publicación vuelve a calcular el mismo delta
+    indice.update({'version': version, 'sha256': hash_instantanea, 'total': len(hashes)})
+    _escribir_json(directorio / NOMBRE_INDICE, indice)
+    _escribir_json(directorio / NOMBRE_ESTADO, {'version': version, 'hashes': hashes})
+    return publicado
+
+
+def aplicar_delta(registros: List[Dict], delta: Dict) -> List[Dict]:
+    """Aplica un delta a una lista de registros: actualiza en su lugar, agrega al final y elimina"""
+    posiciones = {clave_registro(registro): i for i, registro in enumerate(registros)}
+    for registro in delta.get('actualizados', []):
+        clave = clave_registro(registro)
+        if clave in posiciones:
+            registros[posiciones[clave]] = registro
+        else:
+            posiciones[clave] = len(registros)
+            registros.append(registro)
+    for registro in delta.get('agregados', []):
+        posiciones[clave_registro(registro)] = len(registros)
+        registros.append(registro)
+
+    eliminados = set(delta.get('eliminados', []))
+    if eliminados:
+        registros = [registro for registro in registros if clave_registro(registro) not in eliminados]
+    return registros
+
+
+def aplicar_cadena(registros: List[Dict], directorio: str, version_local: int,
+                   verificar: bool = True) -> Tuple[List[Dict], int]:
+    """Lleva una copia local desde version_local hasta la última versión publicada
+
+    Con verificar=True se compara el SHA-256 de la codificación canónica del
+    resultado (serializador.hash_canonico) con el de la última versión.
+    """
+    directorio = Path(directorio)
+    indice = _leer_json(directorio / NOMBRE_INDICE, None)
+    if indice is None:
+        raise FileNotFoundError(f"No hay índice de deltas en {directorio}")
+
+    pendientes = [d for d in indice['deltas'] if d['version'] > version_local]
+    if pendientes and pendientes[0]['version'] != version_local + 1:
+        raise ValueError(f"Faltan deltas entre la versión {version_local} y {pendientes[0]['version']}: "
+                         "descargar el JSON completo")
+
+    delta = None
+    for entrada in pendientes:
+        with open(directorio / entrada['archivo'], 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        registros = aplicar_delta(registros, delta)
+
+    if verificar and delta is not None:
+        if hash_canonico(registros) != delta['sha256']:
+            raise ValueError("La copia local no coincide con la instantánea publicada tras aplicar los deltas")
+
+    return registros, max(version_local, indice['version'])
+
+
+def main():
+    """Publica deltas, compara instantáneas o aplica deltas a una copia local"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    publicar = subcomandos.add_parser('publicar', help="Escribir el delta de la publicación actual")
+    publicar.add_argument('archivo', nargs='?', default='salida/contemplaciones.json')
+
+    comparar = subcomandos.add_parser('comparar', help="Delta entre dos instantáneas")
+    comparar.add_argument('anterior')
+    comparar.add_argument('actual')
+    comparar.add_argument('--salida', help="Guardar el delta en este archivo")
+
+    aplicar = subcomandos.add_parser('aplicar', help="Actualizar una copia local con la cadena de deltas")
+    aplicar.add_argument('copia_local')
+    aplicar.add_argument('directorio', help="Directorio de deltas publicado")
+    aplicar.add_argument('--desde', type=int, required=True, help="Versión de la copia local")
+
+    args = parser.parse_args()
+
+    if args.comando == 'publicar':
+        publicar_delta(args.archivo)
+    elif args.comando == 'comparar':
+        delta = comparar_archivos(args.anterior, args.actual)
+        print(f"➕ Agregados: {len(delta['agregados'])}")
+        print(f"🔄 Actualizados: {len(delta['actualizados'])}")
+        print(f"➖ Eliminados: {len(delta['eliminados'])}")
+        if args.salida:
+            _escribir_json(Path(args.salida), delta)
+    else:
+        registros, version = aplicar_cadena(list(iterar_registros(args.copia_local)), args.directorio, args.desde)
+        escribir_array_json(args.copia_local, registros)
+        print(f"✓ {args.copia_local} actualizado a la versión {version} ({len(registros)} registros)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Estadísticas materializadas de los corpus
+Los conteos por ciclo, tiempo litúrgico, categoría, tipo, libro bíblico y
+año se mantienen en salida/<corpus>.estadisticas.json y se actualizan con
+cada registro insertado o actualizado (también por los scripts de links),
+sin releer el corpus
+"""
+
+import argparse
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from corpus_compacto import CorpusCompacto
+from deltas import clave_registro
+from referencias import extraer_libros
+
+
+# Dimensiones categóricas de cada corpus (además de libro y año)
+DIMENSIONES = {
+    "contemplaciones": ("ciclo", "tiempo_liturgico"),
+    "ejercicios": ("categoria", "tipo"),
+}
+
+SIN_ANIO = "sin año"
+PATRON_ANIO_URL = re.compile(r'/((?:19|20)\d{2})/\d{2}/')
+PATRON_ANIO_TITULO = re.compile(r'\b((?:19|20)\d{2})\b')
+
+
+def extraer_anio(registro: Dict) -> str:
+    """Año de publicación: el de la URL de WordPress (link_origen o, en registros
+    anteriores a ese campo, link) o, si el link ya es el de Drive, el del título"""
+    for campo in ('link_origen', 'link'):
+        coincidencia = PATRON_ANIO_URL.search(registro.get(campo, '') or '')
+        if coincidencia:
+            return coincidencia.group(1)
+    coincidencia = PATRON_ANIO_TITULO.search(registro.get('titulo', '') or '')
+    return coincidencia.group(1) if coincidencia else SIN_ANIO
+
+
+def corpus_de(archivo_json: str) -> str:
+    """Corpus según el nombre del archivo publicado"""
+    return "ejercicios" if 'ejercicio' in Path(archivo_json).name else "contemplaciones"
+
+
+class EstadisticasCorpus:
+    """Conteos agregados de un corpus con el aporte de cada registro, para actualizarlos en O(1)"""
+
+    def __init__(self, archivo_json: str, corpus: Optional[str] = None):
+        base = Path(archivo_json)
+        self.corpus = corpus or corpus_de(archivo_json)
+        self.dimensiones = DIMENSIONES[self.corpus] + ("libro", "anio")
+        # Los conteos (lo que consultan los tableros) y los aportes por registro van por separado
+        self.ruta = base.with_suffix('.estadisticas.json')
+        self.ruta_aportes = base.with_suffix('.estadisticas.aportes.json')
+        self.total = 0
+        self.conteos: Dict[str, Dict[str, int]] = {dimension: {} for dimension in self.dimensiones}
+        self.aportes: Dict[str, Dict] = {}
+
+    def existe(self) -> bool:
+        return self.ruta.exists() and self.ruta_aportes.exists()
+
+    def cargar(self, con_aportes: bool = True) -> 'EstadisticasCorpus':
+        """Lee los conteos y, si se van a actualizar, los aportes guardados"""
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        if con_aportes:
+            with open(self.ruta_aportes, 'r', encoding='utf-8') as f:
+                self.aportes = json.load(f)
+        self.total = datos['total']
+        self.conteos = {dimension: dict(datos['conteos'].get(dimension, {})) for dimension in self.dimensiones}
+        return self
+
+    def _facetas(self, registro: Dict) -> Dict:
+        """Valores de cada dimensión para un registro (libro admite varios)"""
+        facetas = {dimension: registro.get(dimension, '') or '' for dimension in DIMENSIONES[self.corpus]}
+        facetas['libro'] = extraer_libros(registro.get('lecturas', '') or '')
+        facetas['anio'] = extraer_anio(registro)
+        return facetas
+
+    def _sumar(self, facetas: Dict, signo: int) -> None:
+        self.total += signo
+        for dimension in self.dimensiones:
+            valores = facetas.get(dimension, [])
+            for valor in (valores if isinstance(valores, list) else [valores]):
+                conteo = self.conteos[dimension].get(valor, 0) + signo
+                if conteo:
+                    self.conteos[dimension][valor] = conteo
+                else:
+                    self.conteos[dimension].pop(valor, None)
+
+    def registrar(self, registros: Iterable[Dict]) -> int:
+        """Suma registros insertados o actualizados (reemplaza el aporte anterior de la misma clave)"""
+        cantidad = 0
+        for registro in registros:
+            clave = clave_registro(registro)
+            anterior = self.aportes.get(clave)
+            if anterior is not None:
+                self._sumar(anterior, -1)
+            facetas = self._facetas(registro)
+            self._sumar(facetas, +1)
+            self.aportes[clave] = facetas
+            cantidad += 1
+        return cantidad
+
+    def reconstruir(self, registros: Iterable[Dict]) -> 'EstadisticasCorpus':
+        """Recalcula todo desde el corpus completo"""
+        self.total = 0
+        self.conteos = {dimension: {} for dimension in self.dimensiones}
+        self.aportes = {}
+        self.registrar(registros)
+        return self
+
+    def resumen(self) -> Dict:
+        """Conteos ordenados de mayor a menor"""
+        return {
+            'corpus': self.corpus,
+            'total': self.total,
+            'conteos': {
+                dimension: dict(sorted(valores.items(), key=lambda x: (-x[1], x[0])))
+                for dimension, valores in self.conteos.items()
+            },
+        }
+
+    def guardar(self) -> None:
+        """Escribe los conteos y los aportes de forma atómica"""
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        for ruta, datos, indentar in ((self.ruta_aportes, self.aportes, None), (self.ruta, self.resumen(), 2)):
+            temporal = ruta.with_name(ruta.name + '.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False, indent=indentar)
+            os.replace(temporal, ruta)
+
+
+def actualizar_estadisticas(archivo_json: str, corpus: str, registros: Iterable[Dict]) -> EstadisticasCorpus:
+    """Aplica los registros escritos en esta ejecución; la primera vez calcula todo desde el corpus
+
+    La sincronización nunca elimina registros (una actualización conserva el
+    id, que es la clave del aporte); si el JSON se edita a mano, se
+    reconstruye con `python estadisticas.py --reconstruir`.
+    """
+    estadisticas = EstadisticasCorpus(archivo_json, corpus)
+    if estadisticas.existe():
+        estadisticas.cargar()
+    else:
+        estadisticas.reconstruir(CorpusCompacto.desde_json(archivo_json))
+
+    # Registrar es idempotente por clave: no importa si ya estaban en la reconstrucción
+    estadisticas.registrar(registros)
+    estadisticas.guardar()
+    return estadisticas
+
+
+def consultar(archivo_json: str, reconstruir: bool = False) -> Dict:
+    """Resumen de conteos leído del archivo materializado (se calcula solo si no existe)"""
+    estadisticas = EstadisticasCorpus(archivo_json)
+    if reconstruir or not estadisticas.existe():
+        estadisticas.reconstruir(CorpusCompacto.desde_json(archivo_json)).guardar()
+    else:
+        # Solo los conteos: no hace falta leer los aportes ni el corpus
+        estadisticas.cargar(con_aportes=False)
+    return estadisticas.resumen()
+
+
+def mostrar(resumen: Dict, limite: int = 10) -> None:
+    """Imprime los conteos de cada dimensión"""
+    titulos = {
+        'ciclo': "Por ciclo", 'tiempo_liturgico': "Por tiempo litúrgico",
+        'categoria': "Por categoría", 'tipo': "Por tipo",
+        'libro': "Por libro bíblico", 'anio': "Por año",
+    }
+    print(f"=== ESTADÍSTICAS DEL CORPUS ({resumen['corpus']}) ===")
+    print(f"Total: {resumen['total']}")
+    for dimension, valores in resumen['conteos'].items():
+        print(f"\n{titulos.get(dimension, dimension)}:")
+        for valor, cantidad in list(valores.items())[:limite]:
+            print(f"  {valor or '(vacío)'}: {cantidad}")
+        if len(valores) > limite:
+            print(f"  ... y {len(valores) - limite} más")
+
+
+def main():
+    """Muestra las estadísticas materializadas de un corpus"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivo', nargs='?', default='salida/contemplaciones.json')
+    parser.add_argument('--reconstruir', action='store_true', help="Recalcular desde el corpus completo")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resumen como JSON")
+    parser.add_argument('--limite', type=int, default=10, help="Valores a mostrar por dimensión")
+    args = parser.parse_args()
+
+    resumen = consultar(args.archivo, args.reconstruir)
+    if args.json:
+        print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    else:
+        mostrar(resumen, args.limite)
+
+
+if __name__ == "__main__":
+    main()
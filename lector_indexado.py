@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura indexada del JSON publicado sin cargarlo completo
+Junto a salida/contemplaciones.json se genera una exportación compacta
+(un registro por línea) y un índice binario que mapea id y link normalizado
+a la posición del registro; la lectura usa mmap y búsqueda binaria. La
+cabecera del índice guarda la firma y el SHA-256 del JSON del que salió y
+la firma del log JSONL pendiente: si alguno cambió (ej: actualizar_links.py
+o una ejecución con --almacen jsonl), se reconstruye desde la vista
+consolidada
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from archivos import firma_archivo, hash_archivo
+from serializador import codificar_registro
+from sincronizacion import normalizar_link
+
+
+MAGIA = b'CIDX'
+VERSION = 3
+# Cabecera: magia, versión, cantidad de entradas, del JSON de origen tamaño,
+# fecha de modificación (ns) y SHA-256, y del log JSONL tamaño y fecha de modificación
+CABECERA = struct.Struct('<4sIIQQ32sQQ')
+# Posición de la fecha de modificación en la cabecera (para actualizarla en su lugar)
+OFFSET_MTIME = struct.calcsize('<4sIIQ')
+# Entrada: hash de la clave, offset y longitud del registro en la exportación compacta
+ENTRADA = struct.Struct('<QQI')
+
+
+def rutas_exportacion(archivo_json: str) -> Tuple[Path, Path]:
+    """Devuelve las rutas de la exportación compacta y del índice de un JSON publicado"""
+    base = Path(archivo_json)
+    return base.with_suffix('.compacto.jsonl'), base.with_suffix('.indice')
+
+
+def _firma_log(archivo_json: str) -> Tuple[int, int]:
+    """Firma del log JSONL pendiente del JSON publicado; (0, 0) si no hay registros pendientes"""
+    from almacen_jsonl import ruta_log
+
+    try:
+        firma = firma_archivo(str(ruta_log(archivo_json)))
+    except OSError:
+        return 0, 0
+    # Un log vacío (recién compactado) equivale a no tener log
+    return firma if firma[0] else (0, 0)
+
+
+def _hash_clave(clave: str) -> int:
+    """Hash de 64 bits de una clave ("id:123" o "link:https://...")"""
+    return int.from_bytes(hashlib.blake2b(clave.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _claves_registro(registro: Dict) -> Iterable[str]:
+    """Claves por las que se puede buscar un registro"""
+    if registro.get('id') is not None:
+        yield f"id:{registro['id']}"
+    link = normalizar_link(registro.get('link', ''))
+    if link:
+        yield f"link:{link}"
+
+
+def escribir_exportacion_indexada(registros: Iterable[Dict], archivo_json: str) -> int:
+    """Escribe la exportación compacta y su índice junto al JSON publicado; devuelve el total
+
+    Los registros son la vista consolidada (JSON publicado más log pendiente):
+    la cabecera registra la firma de ambos.
+    """
+    ruta_compacto, ruta_indice = rutas_exportacion(archivo_json)
+    ruta_compacto.parent.mkdir(parents=True, exist_ok=True)
+
+    entradas = []
+    total = 0
+    offset = 0
+    temporal_compacto = ruta_compacto.with_name(ruta_compacto.name + '.tmp')
+    with open(temporal_compacto, 'wb') as f:
+        for registro in registros:
+            linea = codificar_registro(registro, 'min').encode('utf-8')
+            f.write(linea + b'\n')
+            for clave in _claves_registro(registro):
+                entradas.append((_hash_clave(clave), offset, len(linea)))
+            offset += len(linea) + 1
+            total += 1
+
+    # El JSON de origen ya está escrito: su firma y su hash identifican esta exportación
+    if Path(archivo_json).exists():
+        tamano, mtime_ns = firma_archivo(archivo_json)
+        sha256 = bytes.fromhex(hash_archivo(archivo_json))
+    else:
+        tamano, mtime_ns, sha256 = 0, 0, bytes(32)
+    tamano_log, mtime_ns_log = _firma_log(archivo_json)
+
+    # Orden por hash (y por offset, para que ante links repetidos gane el primero)
+    entradas.sort()
+    temporal_indice = ruta_indice.with_name(ruta_indice.name + '.tmp')
+    with open(temporal_indice, 'wb') as f:
+        f.write(CABECERA.pack(MAGIA, VERSION, len(entradas), tamano, mtime_ns, sha256, tamano_log, mtime_ns_log))
+        for entrada in entradas:
+            f.write(ENTRADA.pack(*entrada))
+
+    # Se reemplaza primero la exportación y después el índice que apunta a ella
+    os.replace(temporal_compacto, ruta_compacto)
+    os.replace(temporal_indice, ruta_indice)
+    return total
+
+
+def construir_desde_json(archivo_json: str) -> int:
+    """Genera la exportación indexada de un JSON publicado ya existente y su log pendiente
+
+    Sin log pendiente, el JSON se lee en flujo.
+    """
+    from almacen_jsonl import iterar_corpus_completo
+
+    return escribir_exportacion_indexada(iterar_corpus_completo(archivo_json), archivo_json)
+
+
+def exportacion_vigente(archivo_json: str) -> bool:
+    """True si la exportación indexada salió del contenido actual del JSON y de su log
+
+    Si el log pendiente cambió, no está vigente. Si coinciden tamaño y fecha de modificación no se lee el JSON; si solo
+    cambió la fecha pero el SHA-256 es el mismo, se actualiza la fecha en la
+    cabecera.
+    """
+    ruta_compacto, ruta_indice = rutas_exportacion(archivo_json)
+    try:
+        with open(ruta_indice, 'rb') as f:
+            cabecera = f.read(CABECERA.size)
+        firma = firma_archivo(archivo_json)
+    except OSError:
+        return False
+    if len(cabecera) < CABECERA.size or not ruta_compacto.exists():
+        return False
+    magia, version, _, tamano, mtime_ns, sha256, tamano_log, mtime_ns_log = CABECERA.unpack(cabecera)
+    if magia != MAGIA or version != VERSION:
+        return False
+    if (tamano_log, mtime_ns_log) != _firma_log(archivo_json):
+        return False
+    if (tamano, mtime_ns) == firma:
+        return True
+    if tamano != firma[0] or sha256 != bytes.fromhex(hash_archivo(archivo_json)):
+        return False
+    with open(ruta_indice, 'r+b') as f:
+        f.seek(OFFSET_MTIME)
+        f.write(struct.pack('<Q', firma[1]))
+    return True
+
+
+def actualizar_exportacion_indexada(archivo_json: str) -> bool:
+    """Reconstruye la exportación indexada si el JSON cambió desde que se generó; True si se reconstruyó"""
+    if exportacion_vigente(archivo_json):
+        return False
+    total = construir_desde_json(archivo_json)
+    print(f"📇 Índice de {archivo_json} reconstruido ({total} registros)")
+    return True
+
+
+class LectorIndexado:
+    """Lector de registros individuales por id o link usando mmap
+
+    Al abrirlo se reconstruye la exportación si el JSON cambió desde que se
+    generó (con verificar=False se usa tal como está).
+    """
+
+    def __init__(self, archivo_json: str = "salida/contemplaciones.json", verificar: bool = True):
+        if verificar and Path(archivo_json).exists():
+            actualizar_exportacion_indexada(archivo_json)
+        ruta_compacto, ruta_indice = rutas_exportacion(archivo_json)
+        self._archivo_compacto = open(ruta_compacto, 'rb')
+        self._archivo_indice = open(ruta_indice, 'rb')
+        self._datos = self._mapear(self._archivo_compacto)
+        self._indice = self._mapear(self._archivo_indice)
+
+        magia, version, self.total_entradas = CABECERA.unpack_from(self._indice, 0)[:3]
+        if magia != MAGIA or version != VERSION:
+            self.cerrar()
+            raise ValueError(f"Índice no reconocido: {ruta_indice}")
+
+    @staticmethod
+    def _mapear(archivo) -> Optional[mmap.mmap]:
+        """Mapea un archivo en memoria (None si está vacío)"""
+        if os.fstat(archivo.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Libera los mapas de memoria y cierra los archivos"""
+        for mapa in (self._datos, self._indice):
+            if mapa is not None:
+                mapa.close()
+        self._archivo_compacto.close()
+        self._archivo_indice.close()
+
+    def _entrada(self, posicion: int) -> Tuple[int, int, int]:
+        return ENTRADA.unpack_from(self._indice, CABECERA.size + posicion * ENTRADA.size)
+
+    def _buscar(self, clave: str) -> Optional[Dict]:
+        """Búsqueda binaria del hash de la clave y verificación del registro"""
+        objetivo = _hash_clave(clave)
+
+        inicio, fin = 0, self.total_entradas
+        while inicio < fin:
+            medio = (inicio + fin) // 2
+            if self._entrada(medio)[0] < objetivo:
+                inicio = medio + 1
+            else:
+                fin = medio
+
+        # Recorrer las entradas con el mismo hash (colisiones o links repetidos)
+        while inicio < self.total_entradas:
+            valor_hash, offset, longitud = self._entrada(inicio)
+            if valor_hash != objetivo:
+                break
+            registro = json.loads(self._datos[offset:offset + longitud])
+            if clave in _claves_registro(registro):
+                return registro
+            inicio += 1
+
+        return None
+
+    def por_id(self, id_registro: int) -> Optional[Dict]:
+        """Devuelve el registro con ese id, o None"""
+        return self._buscar(f"id:{id_registro}")
+
+    def por_link(self, link: str) -> Optional[Dict]:
+        """Devuelve el primer registro con ese link (normalizado), o None"""
+        return self._buscar(f"link:{normalizar_link(link)}")
+
+
+def main():
+    """Construye el índice o consulta un registro desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivo', nargs='?', default='salida/contemplaciones.json',
+                        help="JSON publicado (contemplaciones o ejercicios)")
+    parser.add_argument('--construir', action='store_true', help="Regenerar la exportación indexada")
+    parser.add_argument('--id', type=int, help="Buscar por id")
+    parser.add_argument('--link', help="Buscar por link")
+    args = parser.parse_args()
+
+    if args.construir:
+        total = construir_desde_json(args.archivo)
+        print(f"✓ Índice generado para {total} registros de {args.archivo}")
+
+    if args.id is None and not args.link:
+        return 0
+
+    with LectorIndexado(args.archivo) as lector:
+        registro = lector.por_id(args.id) if args.id is not None else lector.por_link(args.link)
+
+    if registro is None:
+        print("✗ Registro no encontrado")
+        return 1
+
+    print(json.dumps(registro, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
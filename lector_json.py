@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lector incremental de los corpus almacenados
+Recorre un array JSON (o un archivo JSONL) registro por registro con
+memoria constante, opcionalmente proyectando solo algunos campos
+"""
+
+import json
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from serializador import escribir_json
+
+
+TAMANO_BLOQUE = 64 * 1024
+_ESPACIOS = ' \t\r\n'
+
+
+def _proyectar(registro: Dict, campos: Optional[Sequence[str]]) -> Dict:
+    """Devuelve solo los campos pedidos de un registro"""
+    if campos is None:
+        return registro
+    return {campo: registro[campo] for campo in campos if campo in registro}
+
+
+def _iterar_jsonl(f, campos: Optional[Sequence[str]]) -> Iterator[Dict]:
+    """Recorre un archivo JSONL, un registro por línea"""
+    for linea in f:
+        linea = linea.strip()
+        if linea:
+            yield _proyectar(json.loads(linea), campos)
+
+
+def _iterar_array(f, campos: Optional[Sequence[str]], tamano_bloque: int) -> Iterator[Dict]:
+    """Recorre un array JSON leyendo bloques y decodificando un elemento por vez"""
+    decodificador = json.JSONDecoder()
+    buffer = ''
+    posicion = 0
+    fin_archivo = False
+
+    def completar() -> bool:
+        """Lee otro bloque del archivo; devuelve False si ya no quedan datos"""
+        nonlocal buffer, posicion, fin_archivo
+        bloque = f.read(tamano_bloque)
+        if not bloque:
+            fin_archivo = True
+            return False
+        buffer = buffer[posicion:] + bloque
+        posicion = 0
+        return True
+
+    def saltar_espacios():
+        nonlocal posicion
+        while True:
+            while posicion < len(buffer) and buffer[posicion] in _ESPACIOS:
+                posicion += 1
+            if posicion < len(buffer) or not completar():
+                return
+
+    saltar_espacios()
+    if posicion >= len(buffer):
+        return
+    if buffer[posicion] != '[':
+        raise ValueError("Se esperaba un array JSON")
+    posicion += 1
+
+    while True:
+        saltar_espacios()
+        if posicion >= len(buffer):
+            raise ValueError("Array JSON sin cerrar")
+        if buffer[posicion] == ']':
+            return
+        if buffer[posicion] == ',':
+            posicion += 1
+            saltar_espacios()
+
+        # Decodificar el siguiente elemento; si el bloque lo corta, leer más
+        while True:
+            try:
+                elemento, fin = decodificador.raw_decode(buffer, posicion)
+            except json.JSONDecodeError:
+                if fin_archivo or not completar():
+                    raise
+                continue
+            # Un número al final del buffer podría continuar en el bloque siguiente
+            if fin >= len(buffer) and not fin_archivo and completar():
+                continue
+            break
+
+        posicion = fin
+        yield _proyectar(elemento, campos)
+
+        # Descartar lo ya consumido para mantener el buffer acotado
+        if posicion > tamano_bloque:
+            buffer = buffer[posicion:]
+            posicion = 0
+
+
+def iterar_registros(ruta: str, campos: Optional[Sequence[str]] = None,
+                     tamano_bloque: int = TAMANO_BLOQUE) -> Iterator[Dict]:
+    """Itera los registros de un array JSON o de un archivo JSONL (.jsonl) con memoria constante"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        if str(ruta).endswith('.jsonl'):
+            yield from _iterar_jsonl(f, campos)
+        else:
+            yield from _iterar_array(f, campos, tamano_bloque)
+
+
+def escribir_array_json(ruta: str, registros: Iterable[Dict]) -> int:
+    """Escribe un array JSON (indent=2) registro por registro, de forma atómica; devuelve el total"""
+    return escribir_json(ruta, registros, 'legible')
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Publicación particionada de los corpus
+Además del JSON completo se escribe un archivo por combinación de campos
+categóricos (p. ej. salida/contemplaciones/ciclo=B/tiempo=Adviento.json)
+y un manifiesto con la cantidad de registros y el hash de cada partición
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from almacen_jsonl import iterar_corpus_completo
+from serializador import codificar_json
+
+
+# Particiones de cada corpus: (nombre en la ruta, campo del registro)
+PARTICIONES = {
+    "contemplaciones": (("ciclo", "ciclo"), ("tiempo", "tiempo_liturgico")),
+    "ejercicios": (("categoria", "categoria"), ("tipo", "tipo")),
+}
+
+NOMBRE_MANIFIESTO = "manifest.json"
+
+
+def _segmento(valor) -> str:
+    """Convierte un valor en un segmento de ruta seguro: sin acentos ni espacios"""
+    texto = unicodedata.normalize('NFKD', str(valor or ''))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^A-Za-z0-9]+', '_', texto).strip('_')
+    return texto or 'sin_valor'
+
+
+def segmentos_sin_colisiones(valores: Iterable) -> Dict:
+    """Segmento de ruta de cada valor distinto de un campo
+
+    Valores distintos pueden normalizarse al mismo segmento ("Tiempo
+    Ordinario", "Tiempo ordinario", "Tiempo-Ordinario"; o vacío y null), que
+    además se compara sin mayúsculas en sistemas de archivos como el de
+    macOS: esos valores llevan un sufijo con un hash corto del valor
+    original, para que cada uno tenga su propio archivo.
+    """
+    por_segmento: Dict[str, List] = {}
+    for valor in set(valores):
+        por_segmento.setdefault(_segmento(valor).casefold(), []).append(valor)
+
+    segmentos = {}
+    for colisiones in por_segmento.values():
+        for valor in colisiones:
+            segmento = _segmento(valor)
+            if len(colisiones) > 1:
+                original = json.dumps(valor, ensure_ascii=False).encode('utf-8')
+                segmento += '_' + hashlib.sha256(original).hexdigest()[:8]
+            segmentos[valor] = segmento
+    return segmentos
+
+
+def directorio_particiones(archivo_json: str) -> Path:
+    """salida/contemplaciones.json -> salida/contemplaciones/"""
+    return Path(archivo_json).with_suffix('')
+
+
+def ruta_particion(valores: Sequence, particiones: Sequence[Tuple[str, str]],
+                   segmentos: Optional[Sequence[Dict]] = None) -> str:
+    """Ruta relativa de una partición, p. ej. ciclo=B/tiempo=Adviento.json
+
+    segmentos (uno por campo, ver segmentos_sin_colisiones) resuelve los
+    valores que se normalizan igual; sin él se usa el segmento normalizado.
+    """
+    partes = []
+    for posicion, ((nombre, _), valor) in enumerate(zip(particiones, valores)):
+        segmento = segmentos[posicion][valor] if segmentos is not None else _segmento(valor)
+        partes.append(f"{nombre}={segmento}")
+    return '/'.join(partes) + '.json'
+
+
+def _leer_manifiesto(ruta: Path) -> Dict:
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _escribir_atomico(ruta: Path, contenido: bytes) -> None:
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(ruta.name + '.tmp')
+    with open(temporal, 'wb') as f:
+        f.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def escribir_particiones(archivo_json: str, particiones: Sequence[Tuple[str, str]],
+                         registros: Optional[Iterable[Dict]] = None) -> Dict:
+    """Escribe las particiones y el manifiesto; solo reescribe las particiones que cambiaron"""
+    directorio = directorio_particiones(archivo_json)
+    ruta_manifiesto = directorio / NOMBRE_MANIFIESTO
+    anterior = {p['ruta']: p for p in _leer_manifiesto(ruta_manifiesto).get('particiones', [])}
+
+    # Agrupar en el orden del archivo publicado (con los registros todavía en el log JSONL)
+    grupos: Dict[tuple, List[Dict]] = {}
+    total = 0
+    for registro in (registros if registros is not None else iterar_corpus_completo(archivo_json)):
+        clave = tuple(registro.get(campo, '') for _, campo in particiones)
+        grupos.setdefault(clave, []).append(registro)
+        total += 1
+
+    segmentos = [segmentos_sin_colisiones(clave[posicion] for clave in grupos)
+                 for posicion in range(len(particiones))]
+
+    entradas = []
+    escritas = 0
+    for valores in sorted(grupos, key=lambda v: tuple(str(x) for x in v)):
+        ruta = ruta_particion(valores, particiones, segmentos)
+        contenido = codificar_json(grupos[valores]).encode('utf-8')
+        hash_particion = hashlib.sha256(contenido).hexdigest()
+
+        previa = anterior.pop(ruta, None)
+        if previa is None or previa.get('sha256') != hash_particion or not (directorio / ruta).exists():
+            _escribir_atomico(directorio / ruta, contenido)
+            escritas += 1
+
+        entrada = {'ruta': ruta}
+        entrada.update({campo: valor for (_, campo), valor in zip(particiones, valores)})
+        entrada.update({'registros': len(grupos[valores]), 'bytes': len(contenido), 'sha256': hash_particion})
+        entradas.append(entrada)
+
+    # Particiones que quedaron vacías desde la publicación anterior
+    for ruta in anterior:
+        try:
+            (directorio / ruta).unlink()
+            (directorio / ruta).parent.rmdir()
+        except OSError:
+            # Ya no existía, o el directorio todavía tiene otras particiones
+            pass
+
+    manifiesto = {
+        'origen': Path(archivo_json).name,
+        'campos': [campo for _, campo in particiones],
+        'total': total,
+        'particiones': entradas,
+    }
+    _escribir_atomico(ruta_manifiesto, json.dumps(manifiesto, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    print(f"🗂️  Particiones en {directorio}: {len(entradas)} ({escritas} reescritas, {len(anterior)} eliminadas)")
+    return manifiesto
+
+
+def particiones_de(archivo_json: str) -> Sequence[Tuple[str, str]]:
+    """Particiones según el corpus del archivo (contemplaciones o ejercicios)"""
+    if 'ejercicio' in Path(archivo_json).name:
+        return PARTICIONES["ejercicios"]
+    return PARTICIONES["contemplaciones"]
+
+
+def main():
+    """Genera las particiones de un JSON publicado"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivo', nargs='?', default='salida/contemplaciones.json')
+    args = parser.parse_args()
+
+    manifiesto = escribir_particiones(args.archivo, particiones_de(args.archivo))
+    for entrada in manifiesto['particiones']:
+        print(f"  {entrada['ruta']}: {entrada['registros']}")
+
+
+if __name__ == "__main__":
+    main()
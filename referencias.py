@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades para interpretar las referencias bíblicas del campo "lecturas"
+Ejemplo: "Lc 10, 1-12; Lc 24, 38-41" -> libros ["Lc"]
+         -> referencias [Lc 10,1-10,12; Lc 24,38-24,41]
+
+IndiceReferencias guarda los pasajes de cada libro como intervalos
+(capítulo, versículo) ordenados en un árbol de intervalos implícito, así
+que la búsqueda de los registros que cubren un versículo o un rango es
+logarítmica en la cantidad de pasajes del libro (más los resultados)
+"""
+
+import argparse
+import re
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+# Abreviaturas canónicas (nomenclatura litúrgica en español)
+LIBROS = {
+    # Evangelios
+    'mt': 'Mt', 'mat': 'Mt', 'mateo': 'Mt',
+    'mc': 'Mc', 'mr': 'Mc', 'marcos': 'Mc',
+    'lc': 'Lc', 'lucas': 'Lc',
+    'jn': 'Jn', 'juan': 'Jn', 'gv': 'Jn',
+    # Resto del Nuevo Testamento
+    'hch': 'Hch', 'hc': 'Hch', 'hec': 'Hch', 'at': 'Hch',
+    'rm': 'Rm', 'rom': 'Rm', 'romanos': 'Rm',
+    'cor': 'Cor', 'co': 'Cor',
+    'ga': 'Ga', 'gal': 'Ga', 'galatas': 'Ga',
+    'ef': 'Ef', 'efesios': 'Ef',
+    'flp': 'Flp', 'fil': 'Flp', 'filipenses': 'Flp',
+    'col': 'Col',
+    'ts': 'Ts', 'tes': 'Ts',
+    'tm': 'Tm', 'tim': 'Tm',
+    'tit': 'Tit',
+    'hb': 'Hb', 'he': 'Hb', 'heb': 'Hb',
+    'st': 'St', 'sant': 'St', 'stgo': 'St',
+    'pe': 'Pe', 'pd': 'Pe',
+    'ap': 'Ap', 'apocalipsis': 'Ap',
+    # Antiguo Testamento
+    'gn': 'Gn', 'gen': 'Gn', 'genesis': 'Gn',
+    'ex': 'Ex', 'exodo': 'Ex',
+    'lv': 'Lv', 'nm': 'Nm', 'dt': 'Dt',
+    'jos': 'Jos', 'sm': 'Sm', 'sam': 'Sm', 're': 'Re', 'rey': 'Re',
+    'cro': 'Cro', 'tb': 'Tb', 'jb': 'Jb', 'job': 'Jb',
+    'sal': 'Sal', 'sl': 'Sal', 'slm': 'Sal', 'salmo': 'Sal', 'salmos': 'Sal',
+    'pr': 'Pr', 'prov': 'Pr', 'ecl': 'Qo', 'qo': 'Qo',
+    'sab': 'Sb', 'sb': 'Sb', 'si': 'Si', 'eclo': 'Si',
+    'is': 'Is', 'isaias': 'Is', 'jer': 'Jr', 'jr': 'Jr',
+    'ez': 'Ez', 'dn': 'Dn', 'os': 'Os', 'jl': 'Jl', 'am': 'Am',
+    'miq': 'Mi', 'mi': 'Mi', 'sof': 'So', 'za': 'Za', 'mal': 'Ml',
+    # Fragmentos que deja el scraper al cortar nombres completos a 3 letras
+    # ("Mateo 5, 1" -> "teo 5, 1", "Lucas" -> "cas", "Marcos" -> "cos", "Juan" -> "uan")
+    'teo': 'Mt', 'cos': 'Mc', 'cas': 'Lc', 'uan': 'Jn',
+}
+
+# Libro seguido de un capítulo: "Lc 10", "Jn\xa015", "Mateo 5"
+PATRON_LIBRO = re.compile(r'([A-Za-zÁÉÍÓÚáéíóúÑñ]+)[\s\xa0]*\d')
+
+_SIN_ACENTOS = str.maketrans('áéíóúÁÉÍÓÚ', 'aeiouaeiou')
+
+
+def normalizar_libro(nombre: str) -> Optional[str]:
+    """Devuelve la abreviatura canónica de un libro, o None si no se reconoce"""
+    return LIBROS.get(nombre.translate(_SIN_ACENTOS).lower())
+
+
+def extraer_libros(lecturas: str) -> List[str]:
+    """Extrae los libros citados en un campo de lecturas, sin repetir y en orden"""
+    libros = []
+    for nombre in PATRON_LIBRO.findall(lecturas or ''):
+        libro = normalizar_libro(nombre)
+        if libro and libro not in libros:
+            libros.append(libro)
+    return libros
+
+
+# "Lc 10, 1-12", "Jn 15,3", "Jn 20. 19-29", "Cor 12, 31-13" (hasta el capítulo 13), "Sal 23" (capítulo entero)
+PATRON_REFERENCIA = re.compile(
+    r'([A-Za-zÁÉÍÓÚáéíóúÑñ]+)\s*(\d{1,3})'
+    r'(?:\s*[,:.]\s*(\d{1,3})[a-d]?(?:\s*[-–]\s*(\d{1,3})[a-d]?(?:\s*[,:.]\s*(\d{1,3})[a-d]?)?)?)?'
+)
+
+# Un versículo final desconocido (capítulo entero o rango que sigue en otro capítulo)
+VERSICULO_FINAL = 999
+
+Posicion = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Referencia:
+    """Pasaje de un libro, de (capítulo, versículo) inicio a fin, ambos incluidos"""
+    libro: str
+    inicio: Posicion
+    fin: Posicion
+
+    def __str__(self) -> str:
+        return f"{self.libro} {self.inicio[0]},{self.inicio[1]}-{self.fin[0]},{self.fin[1]}"
+
+
+def _clave(posicion: Posicion) -> int:
+    return posicion[0] * (VERSICULO_FINAL + 1) + posicion[1]
+
+
+def extraer_referencias(lecturas: str) -> List[Referencia]:
+    """Pasajes citados en un campo de lecturas, en orden (se ignoran los libros no reconocidos)"""
+    referencias = []
+    for nombre, capitulo, desde, hasta, hasta_versiculo in PATRON_REFERENCIA.findall(lecturas or ''):
+        libro = normalizar_libro(nombre)
+        if not libro:
+            continue
+        capitulo = int(capitulo)
+        if not desde:
+            inicio, fin = (capitulo, 0), (capitulo, VERSICULO_FINAL)
+        elif not hasta:
+            inicio = fin = (capitulo, int(desde))
+        elif hasta_versiculo:
+            inicio, fin = (capitulo, int(desde)), (int(hasta), int(hasta_versiculo))
+        elif int(hasta) < int(desde):
+            # "Cor 12, 31-13": el rango sigue hasta el final del capítulo 13
+            inicio, fin = (capitulo, int(desde)), (int(hasta), VERSICULO_FINAL)
+        else:
+            inicio, fin = (capitulo, int(desde)), (capitulo, int(hasta))
+        if fin < inicio:
+            continue
+        referencias.append(Referencia(libro, inicio, fin))
+    return referencias
+
+
+class _IntervalosLibro:
+    """Intervalos de un libro ordenados por inicio, con el máximo fin de cada subárbol
+
+    El arreglo ordenado es un árbol binario implícito: el nodo del tramo
+    [izquierda, derecha) es su punto medio, y maximos[medio] guarda el mayor
+    fin del tramo, lo que permite descartar subárboles enteros.
+    """
+
+    def __init__(self, intervalos: List[Tuple[int, int, int]]):
+        intervalos.sort()
+        self.inicios = [inicio for inicio, _, _ in intervalos]
+        self.fines = [fin for _, fin, _ in intervalos]
+        self.valores = [valor for _, _, valor in intervalos]
+        self.maximos = list(self.fines)
+        self._armar(0, len(intervalos))
+
+    def _armar(self, izquierda: int, derecha: int) -> int:
+        if izquierda >= derecha:
+            return -1
+        medio = (izquierda + derecha) // 2
+        self.maximos[medio] = max(self.fines[medio], self._armar(izquierda, medio), self._armar(medio + 1, derecha))
+        return self.maximos[medio]
+
+    def solapados(self, inicio: int, fin: int) -> List[int]:
+        """Valores de los intervalos que se cruzan con [inicio, fin]"""
+        encontrados = []
+        pendientes = [(0, len(self.inicios))]
+        while pendientes:
+            izquierda, derecha = pendientes.pop()
+            if izquierda >= derecha:
+                continue
+            medio = (izquierda + derecha) // 2
+            if self.maximos[medio] < inicio:
+                continue
+            pendientes.append((izquierda, medio))
+            # Los intervalos a la derecha empiezan aún más tarde: si este empieza después de fin, se descartan
+            if self.inicios[medio] <= fin:
+                if self.fines[medio] >= inicio:
+                    encontrados.append(self.valores[medio])
+                pendientes.append((medio + 1, derecha))
+        return encontrados
+
+
+class IndiceReferencias:
+    """Qué registros citan cada pasaje, para consultas por versículo o por rango
+
+    Se arma una vez con pares (valor, lecturas); el valor identifica al
+    registro (p. ej. ("contemplaciones", id)) y es lo que devuelven las consultas.
+    """
+
+    def __init__(self, entradas: Iterable[Tuple[Hashable, str]]):
+        self.valores: List[Hashable] = []
+        intervalos: Dict[str, List[Tuple[int, int, int]]] = {}
+        for valor, lecturas in entradas:
+            numero = len(self.valores)
+            self.valores.append(valor)
+            for referencia in extraer_referencias(lecturas):
+                intervalos.setdefault(referencia.libro, []).append(
+                    (_clave(referencia.inicio), _clave(referencia.fin), numero))
+        self.pasajes = sum(len(lista) for lista in intervalos.values())
+        self.libros: Dict[str, _IntervalosLibro] = {
+            libro: _IntervalosLibro(lista) for libro, lista in intervalos.items()
+        }
+
+    def buscar(self, libro: str, inicio: Posicion, fin: Optional[Posicion] = None) -> List[Hashable]:
+        """Registros que citan algún versículo de [inicio, fin] del libro (fin=None: un versículo)"""
+        libro = normalizar_libro(libro) or libro
+        intervalos = self.libros.get(libro)
+        if intervalos is None:
+            return []
+        numeros = intervalos.solapados(_clave(inicio), _clave(fin if fin is not None else inicio))
+        return [self.valores[numero] for numero in sorted(set(numeros))]
+
+    def buscar_cita(self, cita: str) -> List[Hashable]:
+        """Registros que se cruzan con alguna referencia de una cita: "Lc 10, 5" o "Jn 6, 24-35; Mc 3" """
+        numeros = set()
+        for referencia in extraer_referencias(cita):
+            intervalos = self.libros.get(referencia.libro)
+            if intervalos is not None:
+                numeros.update(intervalos.solapados(_clave(referencia.inicio), _clave(referencia.fin)))
+        return [self.valores[numero] for numero in sorted(numeros)]
+
+
+def indice_de_corpus(archivos: Sequence[str]) -> IndiceReferencias:
+    """Índice de los pasajes de varios corpus; los valores son (corpus, id)"""
+    from estadisticas import corpus_de
+    from lector_json import iterar_registros
+
+    def entradas():
+        for archivo in archivos:
+            corpus = corpus_de(archivo)
+            for registro in iterar_registros(archivo, campos=('id', 'lecturas')):
+                yield (corpus, registro.get('id')), registro.get('lecturas', '') or ''
+    return IndiceReferencias(entradas())
+
+
+def main():
+    """Lista los registros de los corpus que citan un pasaje"""
+    parser = argparse.ArgumentParser(description="Registros que citan un pasaje bíblico")
+    parser.add_argument('cita', help='Por ejemplo "Lc 10, 5" o "Jn 6, 24-35"')
+    parser.add_argument('--archivos', nargs='*',
+                        default=['salida/contemplaciones.json', 'salida/ejercicios_espirituales.json'])
+    args = parser.parse_args()
+
+    indice = indice_de_corpus(args.archivos)
+    referencias = extraer_referencias(args.cita)
+    if not referencias:
+        print(f"❌ No se reconoce ninguna referencia en: {args.cita}")
+        return
+    print(f"📖 {'; '.join(str(r) for r in referencias)}")
+    encontrados = indice.buscar_cita(args.cita)
+    for corpus, id_registro in encontrados:
+        print(f"  - {corpus} {id_registro}")
+    print(f"✅ {len(encontrados)} registros ({indice.pasajes} pasajes indexados)")
+
+
+if __name__ == "__main__":
+    main()
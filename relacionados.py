@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registros relacionados por texto (titulo + resumen) con MinHash y LSH
+Cada registro se resume en una firma MinHash de sus palabras; las firmas se
+reparten en bandas y solo se comparan los pares que caen en el mismo balde
+de alguna banda, en lugar de todos contra todos. Se guardan las firmas y los
+k más parecidos de cada registro en salida/<corpus>.relacionados.json; en
+cada ejecución solo se calculan las firmas de los registros nuevos o con
+texto modificado, y solo se rearman las listas a las que pueden afectar
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from coincidencias import extraer_palabras_clave
+from corpus_compacto import CorpusCompacto
+from deltas import clave_registro
+
+
+VERSION_FORMATO = 1
+CAMPOS_TEXTO = ('titulo', 'resumen')
+
+# 64 bandas de 2 filas: un par con Jaccard 0.15 llega a compararse con probabilidad ~0.77
+# y uno con 0.03 (textos sin relación) con ~0.06
+PERMUTACIONES = 128
+FILAS_POR_BANDA = 2
+SEMILLA = 20240601
+K = 5
+# Similitud estimada mínima para figurar como relacionado
+UMBRAL = 0.1
+
+# Primo de Mersenne 2^61 - 1 para las permutaciones (a * x + b) mod P
+PRIMO = (1 << 61) - 1
+MASCARA = 0xFFFFFFFF
+
+# Además de PALABRAS_COMUNES: palabras frecuentes en los resúmenes que no distinguen un texto de otro
+PALABRAS_VACIAS = frozenset({
+    'mas', 'como', 'pero', 'sus', 'nos', 'les', 'este', 'esta', 'esto', 'estos', 'estas', 'ese', 'esa',
+    'eso', 'esos', 'esas', 'son', 'fue', 'era', 'ser', 'hay', 'muy', 'sin', 'sobre', 'tambien', 'cuando',
+    'donde', 'porque', 'todo', 'toda', 'todos', 'todas', 'nuestro', 'nuestra', 'nuestros', 'nuestras',
+    'ya', 'asi', 'desde', 'hasta', 'entre', 'cada', 'otro', 'otra', 'otros', 'otras', 'quien', 'cual',
+    'solo', 'sino', 'tan', 'bien', 'hace', 'puede', 'vez', 'aqui', 'alli', 'ahi', 'tiene', 'tienen',
+    'mismo', 'misma', 'ante', 'tras', 'mucho', 'mucha', 'muchos', 'muchas', 'poco', 'algo', 'nada',
+    'ellos', 'ella', 'ellas', 'uno', 'unos', 'unas', 'dos', 'han', 'habia', 'sea',
+})
+
+
+def palabras_registro(registro: Dict) -> Set[str]:
+    """Conjunto de palabras de titulo y resumen (sin palabras vacías ni números)"""
+    texto = ' '.join(registro.get(campo, '') or '' for campo in CAMPOS_TEXTO)
+    return {palabra for palabra in extraer_palabras_clave(texto)
+            if not palabra.isdigit() and palabra not in PALABRAS_VACIAS}
+
+
+def hash_texto(registro: Dict) -> str:
+    """Hash del texto que entra en la firma: si no cambia, la firma tampoco"""
+    texto = '\x1f'.join(registro.get(campo, '') or '' for campo in CAMPOS_TEXTO)
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def ruta_relacionados(archivo_json: str) -> Path:
+    """salida/contemplaciones.json -> salida/contemplaciones.relacionados.json"""
+    return Path(archivo_json).with_suffix('.relacionados.json')
+
+
+class GeneradorMinHash:
+    """Firmas MinHash con permutaciones (a * x + b) mod P fijadas por la semilla"""
+
+    def __init__(self, permutaciones: int = PERMUTACIONES, semilla: int = SEMILLA):
+        generador = random.Random(semilla)
+        self.coeficientes = [(generador.randrange(1, PRIMO), generador.randrange(0, PRIMO))
+                             for _ in range(permutaciones)]
+
+    def firma(self, palabras: Iterable[str]) -> array:
+        valores = [int.from_bytes(hashlib.blake2b(palabra.encode('utf-8'), digest_size=8).digest(), 'little')
+                   for palabra in palabras]
+        if not valores:
+            return array('I', [MASCARA] * len(self.coeficientes))
+        return array('I', (min((a * x + b) % PRIMO for x in valores) & MASCARA for a, b in self.coeficientes))
+
+
+def similitud_estimada(firma_a: array, firma_b: array) -> float:
+    """Fracción de posiciones iguales: estima la similitud de Jaccard de los dos conjuntos"""
+    return sum(1 for x, y in zip(firma_a, firma_b) if x == y) / len(firma_a)
+
+
+class IndiceRelacionados:
+    """Firmas de un corpus, baldes LSH y los k registros más parecidos de cada uno"""
+
+    def __init__(self, k: int = K, umbral: float = UMBRAL, permutaciones: int = PERMUTACIONES,
+                 filas_por_banda: int = FILAS_POR_BANDA, semilla: int = SEMILLA):
+        self.parametros = {'permutaciones': permutaciones, 'filas_por_banda': filas_por_banda,
+                           'semilla': semilla, 'k': k, 'umbral': umbral}
+        self.k = k
+        self.umbral = umbral
+        self.filas = filas_por_banda
+        self.generador = GeneradorMinHash(permutaciones, semilla)
+        self.textos: Dict[str, str] = {}
+        self.firmas: Dict[str, array] = {}
+        self.relacionados: Dict[str, List[Tuple[str, float]]] = {}
+        self.modificado = False
+        self._baldes: Optional[Dict[Tuple, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.firmas)
+
+    @classmethod
+    def abrir(cls, ruta: str, **opciones) -> 'IndiceRelacionados':
+        """Carga el índice guardado; falla (OSError o ValueError) si no existe o es de otra versión"""
+        indice = cls(**opciones)
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        if datos.get('formato') != VERSION_FORMATO or datos.get('parametros') != indice.parametros:
+            raise ValueError(f"{ruta} tiene otro formato o parámetros")
+        indice.textos = datos['textos']
+        for clave, codificada in datos['firmas'].items():
+            firma = array('I')
+            firma.frombytes(base64.b64decode(codificada))
+            if sys.byteorder != 'little':
+                firma.byteswap()
+            indice.firmas[clave] = firma
+        indice.relacionados = {clave: [tuple(par) for par in pares] for clave, pares in datos['relacionados'].items()}
+        return indice
+
+    def _bandas(self, firma: array) -> Iterable[Tuple]:
+        for inicio in range(0, len(firma), self.filas):
+            yield (inicio,) + tuple(firma[inicio:inicio + self.filas])
+
+    def baldes(self) -> Dict[Tuple, List[str]]:
+        if self._baldes is None:
+            self._baldes = {}
+            for clave, firma in self.firmas.items():
+                for banda in self._bandas(firma):
+                    self._baldes.setdefault(banda, []).append(clave)
+        return self._baldes
+
+    def candidatos(self, clave: str) -> Set[str]:
+        """Registros que comparten balde con este en alguna banda"""
+        baldes = self.baldes()
+        encontrados = set()
+        for banda in self._bandas(self.firmas[clave]):
+            encontrados.update(baldes.get(banda, ()))
+        encontrados.discard(clave)
+        return encontrados
+
+    def mas_parecidos(self, clave: str) -> List[Tuple[str, float]]:
+        """Los k candidatos con mayor similitud estimada (solo se verifican los candidatos)"""
+        firma = self.firmas[clave]
+        pares = []
+        for otro in self.candidatos(clave):
+            similitud = similitud_estimada(firma, self.firmas[otro])
+            if similitud >= self.umbral:
+                pares.append((otro, round(similitud, 4)))
+        pares.sort(key=lambda par: (-par[1], par[0]))
+        return pares[:self.k]
+
+    def actualizar(self, registros: Iterable[Dict], eliminados: Iterable[str] = ()) -> int:
+        """Recalcula las firmas de los registros con texto nuevo o modificado y las listas afectadas"""
+        cambiados = set()
+        for registro in registros:
+            clave = clave_registro(registro)
+            texto = hash_texto(registro)
+            if self.textos.get(clave) == texto:
+                continue
+            self.textos[clave] = texto
+            self.firmas[clave] = self.generador.firma(palabras_registro(registro))
+            cambiados.add(clave)
+        quitados = {clave for clave in eliminados if clave in self.firmas}
+        for clave in quitados:
+            del self.firmas[clave]
+            del self.textos[clave]
+            self.relacionados.pop(clave, None)
+        cambiados -= quitados
+        if not cambiados and not quitados:
+            return 0
+
+        # Una lista puede cambiar si el registro cambió, si hoy comparte balde con uno que cambió
+        # o si ya incluía a uno que cambió o se eliminó
+        self._baldes = None
+        afectados = set(cambiados)
+        for clave in cambiados:
+            afectados.update(self.candidatos(clave))
+        tocados = cambiados | quitados
+        for clave, pares in self.relacionados.items():
+            if any(otro in tocados for otro, _ in pares):
+                afectados.add(clave)
+        for clave in afectados:
+            self.relacionados[clave] = self.mas_parecidos(clave)
+        self.modificado = True
+        return len(cambiados)
+
+    def guardar(self, ruta: str) -> None:
+        def codificar(firma: array) -> str:
+            if sys.byteorder != 'little':
+                firma = array('I', firma)
+                firma.byteswap()
+            return base64.b64encode(firma.tobytes()).decode('ascii')
+
+        datos = {
+            'formato': VERSION_FORMATO,
+            'parametros': self.parametros,
+            'relacionados': {clave: [list(par) for par in pares]
+                             for clave, pares in sorted(self.relacionados.items()) if pares},
+            'textos': dict(sorted(self.textos.items())),
+            'firmas': {clave: codificar(firma) for clave, firma in sorted(self.firmas.items())},
+        }
+        temporal = Path(ruta).with_name(Path(ruta).name + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, ruta)
+        self.modificado = False
+
+
+def actualizar_relacionados(archivo_json: str, registros: Iterable[Dict],
+                            eliminados: Iterable[str] = ()) -> IndiceRelacionados:
+    """Aplica los registros escritos en esta ejecución; la primera vez procesa el corpus completo"""
+    ruta = ruta_relacionados(archivo_json)
+    cambiados = 0
+    try:
+        indice = IndiceRelacionados.abrir(ruta)
+    except (OSError, ValueError, KeyError):
+        indice = IndiceRelacionados()
+        cambiados = indice.actualizar(CorpusCompacto.desde_json(archivo_json))
+
+    cambiados += indice.actualizar(registros, eliminados)
+    if indice.modificado:
+        indice.guardar(ruta)
+        print(f"🧩 Relacionados por texto actualizados: {cambiados} firmas nuevas, {len(indice)} registros en {ruta}")
+    return indice
+
+
+def main():
+    """Muestra los registros relacionados de uno o recalcula el índice de un corpus"""
+    from lector_json import iterar_registros
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivo', nargs='?', default='salida/contemplaciones.json')
+    parser.add_argument('--id', help="Id del registro cuyos relacionados se muestran")
+    parser.add_argument('--reconstruir', action='store_true', help="Recalcular todas las firmas")
+    args = parser.parse_args()
+
+    ruta = ruta_relacionados(args.archivo)
+    if args.reconstruir and ruta.exists():
+        ruta.unlink()
+    indice = actualizar_relacionados(args.archivo, [])
+
+    titulos = {clave_registro(r): r.get('titulo', '') for r in iterar_registros(args.archivo, campos=('id', 'link', 'titulo'))}
+    if args.id:
+        clave = f"id:{args.id}"
+        print(f"📖 {titulos.get(clave, clave)}")
+        for otro, similitud in indice.relacionados.get(clave, []):
+            print(f"  {similitud:.2f}  {titulos.get(otro, otro)}")
+        return
+    con_relacionados = sum(1 for pares in indice.relacionados.values() if pares)
+    print(f"🧩 {con_relacionados} de {len(indice)} registros con algún relacionado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Relaciones entre contemplaciones y ejercicios por pasajes del Evangelio compartidos
+Las lecturas de ambos corpus se normalizan a pasajes ("Lc 10,1-10,12") y se
+cruzan con el índice de intervalos de referencias.py: una contemplación y un
+ejercicio quedan relacionados si citan algún versículo en común. El resultado
+se guarda en salida/relaciones.json (en los dos sentidos) y en cada ejecución
+solo se vuelven a cruzar los registros cuyos pasajes cambiaron
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Set
+
+from corpus_compacto import CorpusCompacto
+from deltas import clave_registro
+from estadisticas import corpus_de
+from referencias import IndiceReferencias, extraer_referencias
+
+
+NOMBRE_RELACIONES = "relaciones.json"
+ARCHIVOS_CORPUS = {
+    "contemplaciones": "contemplaciones.json",
+    "ejercicios": "ejercicios_espirituales.json",
+}
+# Solo se relacionan pasajes de los evangelios
+LIBROS_RELACION = ('Mt', 'Mc', 'Lc', 'Jn')
+VERSION_FORMATO = 1
+
+
+def otro_corpus(corpus: str) -> str:
+    return "ejercicios" if corpus == "contemplaciones" else "contemplaciones"
+
+
+def pasajes_de(lecturas: str, libros: Sequence[str] = LIBROS_RELACION) -> List[str]:
+    """Pasajes normalizados de un campo de lecturas, sin repetir y ordenados"""
+    return sorted({str(referencia) for referencia in extraer_referencias(lecturas) if referencia.libro in libros})
+
+
+class RelacionesCorpus:
+    """Pasajes de cada registro de los dos corpus y registros relacionados del otro corpus"""
+
+    def __init__(self, directorio: str, libros: Sequence[str] = LIBROS_RELACION):
+        self.directorio = Path(directorio)
+        self.ruta = self.directorio / NOMBRE_RELACIONES
+        self.libros = tuple(libros)
+        self.pasajes: Dict[str, Dict[str, List[str]]] = {corpus: {} for corpus in ARCHIVOS_CORPUS}
+        self.relacionados: Dict[str, Dict[str, Set[str]]] = {corpus: {} for corpus in ARCHIVOS_CORPUS}
+        # Corpus ya cargados completos alguna vez (el resto se carga de su archivo publicado)
+        self.cargados: Set[str] = set()
+        self.modificado = False
+
+    def cargar(self) -> 'RelacionesCorpus':
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return self
+        if datos.get('formato') != VERSION_FORMATO or tuple(datos.get('libros', ())) != self.libros:
+            print(f"🔁 {self.ruta} es de otra versión: se recalcula")
+            return self
+        for corpus in ARCHIVOS_CORPUS:
+            self.pasajes[corpus] = datos['pasajes'].get(corpus, {})
+            self.relacionados[corpus] = {clave: set(otros) for clave, otros in datos['relaciones'].get(corpus, {}).items()}
+        self.cargados = set(datos.get('cargados', ()))
+        return self
+
+    def _desvincular(self, corpus: str, clave: str) -> None:
+        otro = otro_corpus(corpus)
+        for relacionado in self.relacionados[corpus].pop(clave, ()):
+            vinculos = self.relacionados[otro].get(relacionado)
+            if vinculos is not None:
+                vinculos.discard(clave)
+                if not vinculos:
+                    del self.relacionados[otro][relacionado]
+
+    def _cruzar(self, corpus: str, claves: Iterable[str]) -> None:
+        """Relaciona los registros dados con los del otro corpus con un índice de intervalos"""
+        otro = otro_corpus(corpus)
+        indice = IndiceReferencias((clave, '; '.join(pasajes)) for clave, pasajes in self.pasajes[otro].items())
+        for clave in claves:
+            pasajes = self.pasajes[corpus].get(clave)
+            if not pasajes:
+                continue
+            for relacionado in indice.buscar_cita('; '.join(pasajes)):
+                self.relacionados[corpus].setdefault(clave, set()).add(relacionado)
+                self.relacionados[otro].setdefault(relacionado, set()).add(clave)
+
+    def actualizar(self, corpus: str, registros: Iterable[Dict], eliminados: Iterable[str] = ()) -> int:
+        """Aplica registros nuevos o modificados y eliminados; devuelve cuántos cambiaron de pasajes"""
+        cambiados = []
+        for registro in registros:
+            clave = clave_registro(registro)
+            pasajes = pasajes_de(registro.get('lecturas', '') or '', self.libros)
+            if self.pasajes[corpus].get(clave) == pasajes:
+                continue
+            self._desvincular(corpus, clave)
+            self.pasajes[corpus][clave] = pasajes
+            cambiados.append(clave)
+        for clave in eliminados:
+            if clave in self.pasajes[corpus]:
+                self._desvincular(corpus, clave)
+                del self.pasajes[corpus][clave]
+                self.modificado = True
+        if cambiados:
+            self._cruzar(corpus, cambiados)
+            self.modificado = True
+        return len(cambiados)
+
+    def completar(self, corpus: str, archivo_json: str) -> None:
+        """Carga el corpus completo desde su archivo publicado la primera vez que se lo ve"""
+        if corpus in self.cargados or not Path(archivo_json).exists():
+            return
+        self.actualizar(corpus, CorpusCompacto.desde_json(archivo_json))
+        self.cargados.add(corpus)
+        self.modificado = True
+
+    def guardar(self) -> None:
+        datos = {
+            'formato': VERSION_FORMATO,
+            'libros': list(self.libros),
+            'cargados': sorted(self.cargados),
+            'relaciones': {
+                corpus: {clave: sorted(otros) for clave, otros in sorted(relacionados.items())}
+                for corpus, relacionados in self.relacionados.items()
+            },
+            'pasajes': {corpus: dict(sorted(pasajes.items())) for corpus, pasajes in self.pasajes.items()},
+        }
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_name(self.ruta.name + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temporal, self.ruta)
+        self.modificado = False
+
+
+def actualizar_relaciones(archivo_json: str, registros: Iterable[Dict],
+                          eliminados: Iterable[str] = ()) -> RelacionesCorpus:
+    """Aplica los registros escritos en esta ejecución; la primera vez cruza los dos corpus completos"""
+    corpus = corpus_de(archivo_json)
+    directorio = Path(archivo_json).parent
+    relaciones = RelacionesCorpus(str(directorio)).cargar()
+    relaciones.completar(corpus, archivo_json)
+    relaciones.completar(otro_corpus(corpus), str(directorio / ARCHIVOS_CORPUS[otro_corpus(corpus)]))
+
+    relaciones.actualizar(corpus, registros, eliminados)
+    if relaciones.modificado:
+        relaciones.guardar()
+        total = sum(len(otros) for otros in relaciones.relacionados['contemplaciones'].values())
+        print(f"🔗 Relaciones por pasajes actualizadas: {total} pares contemplación-ejercicio en {relaciones.ruta}")
+    return relaciones
+
+
+def main():
+    """Muestra los registros relacionados de uno o recalcula todas las relaciones"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directorio', default='salida')
+    parser.add_argument('--corpus', choices=sorted(ARCHIVOS_CORPUS), default='contemplaciones')
+    parser.add_argument('--id', help="Id del registro cuyos relacionados se muestran")
+    parser.add_argument('--reconstruir', action='store_true', help="Recalcular desde los archivos publicados")
+    args = parser.parse_args()
+
+    relaciones = RelacionesCorpus(args.directorio)
+    if not args.reconstruir:
+        relaciones.cargar()
+    for corpus, archivo in ARCHIVOS_CORPUS.items():
+        relaciones.completar(corpus, str(Path(args.directorio) / archivo))
+    if relaciones.modificado:
+        relaciones.guardar()
+
+    if args.id:
+        clave = f"id:{args.id}"
+        print(f"📖 {args.corpus} {args.id}: {', '.join(relaciones.pasajes[args.corpus].get(clave, [])) or 'sin pasajes'}")
+        for relacionado in sorted(relaciones.relacionados[args.corpus].get(clave, ())):
+            otro = otro_corpus(args.corpus)
+            print(f"  - {otro} {relacionado[len('id:'):]}: {', '.join(relaciones.pasajes[otro].get(relacionado, []))}")
+        return
+
+    for corpus in ARCHIVOS_CORPUS:
+        con_relacion = len(relaciones.relacionados[corpus])
+        print(f"🔗 {corpus}: {con_relacion} de {len(relaciones.pasajes[corpus])} registros con algún relacionado")
+
+
+if __name__ == "__main__":
+    main()
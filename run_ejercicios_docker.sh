@@ -99,8 +99,8 @@ RUN if [ -f requirements.txt ]; then \
         pip install --no-cache-dir requests beautifulsoup4; \
     fi
 
-# Copiar el script de aplicación
-COPY app_ejercicios.py .
+# Copiar los scripts de la aplicación
+COPY *.py ./
 
 # Crear directorio de salida
 RUN mkdir -p salida
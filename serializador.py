@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serialización de los corpus publicados
+Usa orjson o ujson si están instalados (con json de la biblioteca estándar
+como respaldo) y escribe en tres formatos: JSON legible (indent=2, el de
+siempre), JSON minificado y JSON minificado comprimido con gzip
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+FORMATOS = ('legible', 'min', 'gz')
+NIVEL_GZIP = 6
+
+
+def _codificadores_json():
+    return (
+        lambda registro: json.dumps(registro, ensure_ascii=False, indent=2),
+        lambda registro: json.dumps(registro, ensure_ascii=False, separators=(',', ':')),
+    )
+
+
+def _codificadores_orjson():
+    return (
+        lambda registro: orjson.dumps(registro, option=orjson.OPT_INDENT_2).decode('utf-8'),
+        lambda registro: orjson.dumps(registro).decode('utf-8'),
+    )
+
+
+def _codificadores_ujson():
+    return (
+        lambda registro: ujson.dumps(registro, ensure_ascii=False, indent=2, escape_forward_slashes=False),
+        lambda registro: ujson.dumps(registro, ensure_ascii=False, escape_forward_slashes=False),
+    )
+
+
+def backends_disponibles() -> Dict[str, Callable]:
+    """Backends instalados, en orden de preferencia"""
+    backends = {}
+    if orjson is not None:
+        backends['orjson'] = _codificadores_orjson
+    if ujson is not None:
+        backends['ujson'] = _codificadores_ujson
+    backends['json'] = _codificadores_json
+    return backends
+
+
+BACKEND = next(iter(backends_disponibles()))
+_codificar_legible, _codificar_min = backends_disponibles()[BACKEND]()
+
+
+def codificar_registro(registro: Dict, formato: str = 'legible') -> str:
+    """Codifica un registro; en formato legible con el mismo resultado que json.dumps(indent=2)"""
+    if formato == 'legible':
+        return _codificar_legible(registro)
+    return _codificar_min(registro)
+
+
+def ruta_formato(archivo_json: str, formato: str) -> Path:
+    """Ruta publicada para cada formato: .json, .min.json o .json.gz"""
+    base = Path(archivo_json)
+    if formato == 'min':
+        return base.with_suffix('.min.json')
+    if formato == 'gz':
+        return base.with_name(base.name + '.gz')
+    return base
+
+
+def _escribir_array(f, registros: Iterable[Dict], formato: str, codificadores=None) -> int:
+    """Escribe el array registro por registro en un archivo de texto abierto"""
+    legible, minimo = codificadores or (_codificar_legible, _codificar_min)
+    total = 0
+    if formato == 'legible':
+        for registro in registros:
+            # Cada elemento indentado dos espacios dentro del array, como json.dump(lista, indent=2)
+            f.write(('[\n  ' if total == 0 else ',\n  ') + legible(registro).replace('\n', '\n  '))
+            total += 1
+        f.write('\n]' if total else '[]')
+    else:
+        for registro in registros:
+            f.write(('[' if total == 0 else ',') + minimo(registro))
+            total += 1
+        f.write(']' if total else '[]')
+    return total
+
+
+class _EscritorHash:
+    """Objeto tipo archivo que solo acumula el SHA-256 de lo escrito (en UTF-8)"""
+
+    def __init__(self):
+        self.hash = hashlib.sha256()
+
+    def write(self, texto: str) -> None:
+        self.hash.update(texto.encode('utf-8'))
+
+
+def hash_canonico(registros: Iterable[Dict]) -> str:
+    """SHA-256 de la codificación canónica de un array de registros, calculado en flujo
+
+    La codificación canónica es la del JSON publicado: json.dumps(registros,
+    ensure_ascii=False, indent=2) de la biblioteca estándar, en UTF-8. No
+    depende del backend instalado (orjson o ujson pueden diferir en detalles),
+    así que un cliente la puede reproducir para verificar su copia.
+    """
+    escritor = _EscritorHash()
+    _escribir_array(escritor, registros, 'legible', _codificadores_json())
+    return escritor.hash.hexdigest()
+
+
+def codificar_json(registros: Iterable[Dict], formato: str = 'legible') -> str:
+    """Codifica un array de registros en memoria (legible o minificado)"""
+    salida = io.StringIO()
+    _escribir_array(salida, registros, formato)
+    return salida.getvalue()
+
+
+def escribir_json(ruta: str, registros: Iterable[Dict], formato: str = 'legible', codificadores=None) -> int:
+    """Escribe un array JSON en el formato pedido, en flujo y de forma atómica; devuelve el total"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+
+    destino = Path(ruta)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_name(destino.name + '.tmp')
+
+    try:
+        if formato == 'gz':
+            # mtime=0: el mismo contenido produce siempre el mismo .gz
+            with open(temporal, 'wb') as crudo:
+                with gzip.GzipFile(filename='', mode='wb', fileobj=crudo, compresslevel=NIVEL_GZIP, mtime=0) as comprimido:
+                    with io.TextIOWrapper(comprimido, encoding='utf-8') as f:
+                        total = _escribir_array(f, registros, formato, codificadores)
+        else:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                total = _escribir_array(f, registros, formato, codificadores)
+        os.replace(temporal, destino)
+    except BaseException:
+        # Un fallo a mitad de la serialización no deja el .tmp a medio escribir
+        temporal.unlink(missing_ok=True)
+        raise
+    return total
+
+
+def publicar_formatos(archivo_json: str, formatos: Iterable[str]) -> List[Path]:
+    """Genera las variantes minificada y/o gzip de un JSON publicado leyéndolo en flujo
+
+    Incluyen el log JSONL pendiente (--almacen jsonl), igual que los demás artefactos.
+    """
+    from almacen_jsonl import iterar_corpus_completo
+
+    rutas = []
+    for formato in formatos:
+        if formato == 'legible':
+            continue
+        destino = ruta_formato(archivo_json, formato)
+        escribir_json(str(destino), iterar_corpus_completo(archivo_json), formato)
+        rutas.append(destino)
+    return rutas
+
+
+def comparar_backends(archivo_json: str, repeticiones: int = 3) -> List[Dict]:
+    """Mide tiempo y tamaño de cada backend disponible en cada formato"""
+    with open(archivo_json, 'r', encoding='utf-8') as f:
+        registros = json.load(f)
+
+    resultados = []
+    destino = Path(archivo_json).with_suffix('.benchmark.tmp')
+    for nombre, fabrica in backends_disponibles().items():
+        codificadores = fabrica()
+        for formato in FORMATOS:
+            tiempos = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                escribir_json(str(destino), registros, formato, codificadores)
+                tiempos.append(time.perf_counter() - inicio)
+            resultados.append({
+                'backend': nombre,
+                'formato': formato,
+                'segundos': min(tiempos),
+                'bytes': destino.stat().st_size,
+            })
+    destino.unlink()
+    return resultados
+
+
+def main():
+    """Publica las variantes de un JSON o compara los backends de serialización"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivo', nargs='?', default='salida/contemplaciones.json')
+    parser.add_argument('--formatos', default='min,gz',
+                        help="Variantes a generar, separadas por coma (min, gz)")
+    parser.add_argument('--benchmark', action='store_true', help="Comparar backends y formatos")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        print(f"{'backend':<8} {'formato':<8} {'ms':>8} {'KiB':>8}")
+        for r in comparar_backends(args.archivo):
+            print(f"{r['backend']:<8} {r['formato']:<8} {r['segundos'] * 1000:>8.1f} {r['bytes'] / 1024:>8.1f}")
+        return
+
+    for ruta in publicar_formatos(args.archivo, args.formatos.split(',')):
+        print(f"✓ Generado: {ruta}")
+
+
+if __name__ == "__main__":
+    main()
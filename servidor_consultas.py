@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor de consultas sobre los corpus publicados (solo biblioteca estándar)
+Carga contemplaciones.json y ejercicios_espirituales.json una vez, arma
+índices por id, link, campos categóricos y libro bíblico, y responde JSON
+filtrado y paginado con ETag/304; si un archivo cambia se vuelve a cargar
+
+    GET /                                   corpus disponibles y valores de cada filtro
+    GET /contemplaciones?ciclo=B&libro=Lc   registros filtrados (pagina, por_pagina)
+    GET /contemplaciones/8397               un registro por id
+    GET /ejercicios?link=https://...        un registro por link
+    GET /hoy?fecha=2025-12-07&domingo=1     contemplaciones del día litúrgico (hoy por defecto)
+    GET /pasaje?cita=Lc 10, 5               registros de todos los corpus que citan el pasaje
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from archivos import firma_archivo, hash_archivo
+from calendario_liturgico import ANIO_DESDE, ANIO_HASTA, IndiceLiturgico, calendario, proximo_domingo
+from corpus_compacto import CAMPOS_CATEGORICOS, CorpusCompacto
+from estadisticas import DIMENSIONES, corpus_de
+from lector_json import iterar_registros
+from referencias import IndiceReferencias, extraer_libros, extraer_referencias, normalizar_libro
+from serializador import codificar_registro
+from sincronizacion import normalizar_link
+
+
+POR_PAGINA = 50
+POR_PAGINA_MAXIMO = 500
+# Cada cuánto se mira, como mucho, si los archivos cambiaron
+INTERVALO_RECARGA = 2.0
+
+
+class ErrorConsulta(ValueError):
+    """Parámetros de consulta inválidos (respuesta 400)"""
+
+
+class IndiceCorpus:
+    """Registros de un corpus con índices por id, link y cada campo filtrable"""
+
+    def __init__(self, ruta: str, corpus: str):
+        self.ruta = ruta
+        self.corpus = corpus
+        self.campos = DIMENSIONES[corpus] + ('libro',)
+        self.firma = firma_archivo(ruta)
+        self.version = hash_archivo(ruta)[:16]
+
+        # Por columnas, con ciclo/tiempo litúrgico o categoría/tipo codificados por diccionario
+        self.registros = CorpusCompacto((), CAMPOS_CATEGORICOS[corpus])
+        # Cada registro ya codificado (JSON minificado): las respuestas solo concatenan
+        self.codificados: List[str] = []
+        self.por_id: Dict[str, int] = {}
+        self.por_link: Dict[str, int] = {}
+        self.facetas: Dict[str, Dict[str, List[int]]] = {campo: {} for campo in self.campos}
+        self.valores: Dict[str, Dict[str, str]] = {campo: {} for campo in self.campos}
+        self._liturgico: Optional[IndiceLiturgico] = None
+
+        for posicion, registro in enumerate(iterar_registros(ruta)):
+            self.registros.agregar(registro)
+            self.codificados.append(codificar_registro(registro, 'min'))
+            if registro.get('id') is not None:
+                self.por_id[str(registro['id'])] = posicion
+            link = normalizar_link(registro.get('link', '') or '')
+            if link:
+                self.por_link.setdefault(link, posicion)
+            for campo in DIMENSIONES[corpus]:
+                self._indexar(campo, registro.get(campo, '') or '', posicion)
+            for libro in extraer_libros(registro.get('lecturas', '') or ''):
+                self._indexar('libro', libro, posicion)
+        # Pasajes citados, por libro, como intervalos (capítulo, versículo)
+        self.referencias = IndiceReferencias(
+            (posicion, registro.get('lecturas', '') or '') for posicion, registro in enumerate(self.registros))
+
+    def _indexar(self, campo: str, valor: str, posicion: int) -> None:
+        clave = valor.casefold()
+        self.facetas[campo].setdefault(clave, []).append(posicion)
+        self.valores[campo].setdefault(clave, valor)
+
+    @property
+    def liturgico(self) -> IndiceLiturgico:
+        """Índice por ciclo, tiempo y semana (se arma en la primera consulta por fecha)"""
+        if self._liturgico is None:
+            self._liturgico = IndiceLiturgico(self.registros)
+        return self._liturgico
+
+    def cambio(self) -> bool:
+        """True si el archivo cambió desde que se cargó (tamaño o fecha de modificación)"""
+        try:
+            return firma_archivo(self.ruta) != self.firma
+        except OSError:
+            return False
+
+    def filtrar(self, filtros: Dict[str, List[str]]) -> Sequence[int]:
+        """Posiciones que cumplen todos los filtros (varios valores de un campo se unen)"""
+        seleccion = None
+        for campo, valores in filtros.items():
+            if campo not in self.facetas:
+                raise ErrorConsulta(f"Filtro desconocido para {self.corpus}: {campo}")
+            posiciones = set()
+            for valor in valores:
+                if campo == 'libro':
+                    valor = normalizar_libro(valor) or valor
+                posiciones.update(self.facetas[campo].get(valor.casefold(), ()))
+            seleccion = posiciones if seleccion is None else seleccion & posiciones
+            if not seleccion:
+                return []
+        return range(len(self.registros)) if seleccion is None else sorted(seleccion)
+
+    def resumen(self) -> Dict:
+        """Total y cantidad de registros por valor de cada filtro"""
+        return {
+            'total': len(self.registros),
+            'version': self.version,
+            'filtros': {
+                campo: {self.valores[campo][clave]: len(posiciones) for clave, posiciones in sorted(facetas.items())}
+                for campo, facetas in self.facetas.items()
+            },
+        }
+
+
+class Corpus:
+    """Índices de los corpus servidos, recargados cuando cambian sus archivos"""
+
+    def __init__(self, archivos: Sequence[str], intervalo_recarga: float = INTERVALO_RECARGA):
+        self.archivos = {corpus_de(archivo): archivo for archivo in archivos}
+        self.intervalo_recarga = intervalo_recarga
+        self.indices: Dict[str, IndiceCorpus] = {}
+        self._candado = threading.Lock()
+        self._ultima_revision = 0.0
+        for corpus, archivo in self.archivos.items():
+            self.indices[corpus] = IndiceCorpus(archivo, corpus)
+            print(f"📚 {corpus}: {len(self.indices[corpus].registros)} registros de {archivo}")
+
+    def indice(self, corpus: str) -> Optional[IndiceCorpus]:
+        self.revisar()
+        return self.indices.get(corpus)
+
+    def revisar(self) -> None:
+        """Recarga los corpus cuyo archivo cambió; las consultas en curso siguen con el índice anterior"""
+        ahora = time.monotonic()
+        if ahora - self._ultima_revision < self.intervalo_recarga:
+            return
+        with self._candado:
+            if ahora - self._ultima_revision < self.intervalo_recarga:
+                return
+            self._ultima_revision = ahora
+            for corpus, indice in list(self.indices.items()):
+                if indice.cambio():
+                    try:
+                        self.indices[corpus] = IndiceCorpus(indice.ruta, corpus)
+                        print(f"🔄 {corpus} recargado: {len(self.indices[corpus].registros)} registros")
+                    except (OSError, ValueError) as e:
+                        # Archivo a medio escribir: se reintenta en la próxima revisión
+                        print(f"⚠️  No se pudo recargar {corpus}: {e}")
+
+
+def _parametros(consulta: str, permitidos: Sequence[str] = ()) -> Dict[str, List[str]]:
+    """Parámetros de la consulta; cualquier nombre fuera de los permitidos es un error 400"""
+    parametros = parse_qs(consulta)
+    desconocidos = sorted(set(parametros) - set(permitidos))
+    if desconocidos:
+        raise ErrorConsulta(f"Parámetros desconocidos: {', '.join(desconocidos)}")
+    return parametros
+
+
+def _booleano(parametros: Dict[str, List[str]], nombre: str) -> bool:
+    valor = parametros.get(nombre, ['0'])[-1]
+    if valor not in ('0', '1'):
+        raise ErrorConsulta(f"{nombre} debe ser 0 o 1: {valor}")
+    return valor == '1'
+
+
+def _pagina(parametros: Dict[str, List[str]], nombre: str, defecto: int, maximo: int) -> int:
+    valor = parametros.pop(nombre, [str(defecto)])[-1]
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ErrorConsulta(f"{nombre} debe ser un número: {valor}")
+    if numero < 1:
+        raise ErrorConsulta(f"{nombre} debe ser mayor que 0")
+    return min(numero, maximo)
+
+
+def consultar_dia(corpus: Corpus, consulta: str) -> Tuple[int, str, str]:
+    """Día litúrgico de una fecha y las contemplaciones que le corresponden"""
+    indice = corpus.indice('contemplaciones')
+    if indice is None:
+        return 404, '', json.dumps({'error': "No se sirven contemplaciones"})
+    parametros = _parametros(consulta, ('fecha', 'domingo'))
+    domingo = _booleano(parametros, 'domingo')
+    valor = parametros.get('fecha', [''])[-1]
+    try:
+        fecha = date.fromisoformat(valor) if valor else date.today()
+    except ValueError:
+        raise ErrorConsulta(f"fecha debe tener el formato AAAA-MM-DD: {valor}")
+    # Fuera de la tabla del calendario no se calcula: cerca de los extremos de date
+    # (año 1 o 9999) el cálculo se sale del rango de fechas representables
+    if not ANIO_DESDE <= fecha.year <= ANIO_HASTA:
+        raise ErrorConsulta(f"fecha debe estar entre {ANIO_DESDE} y {ANIO_HASTA}: {valor}")
+    try:
+        if domingo:
+            fecha = proximo_domingo(fecha)
+        dia = calendario().dia(fecha)
+    except (ValueError, OverflowError) as e:
+        raise ErrorConsulta(f"No se puede calcular el día litúrgico de {fecha.isoformat()}: {e}")
+    posiciones = indice.liturgico.para(dia)
+    cuerpo = (json.dumps(dia.to_dict(), ensure_ascii=False)[:-1] + f',"total":{len(posiciones)},"registros":['
+              + ','.join(indice.codificados[posicion] for posicion in posiciones) + ']}')
+    # Sin fecha la respuesta cambia con el día: la fecha entra en la versión del ETag
+    return 200, f"{indice.version}-{fecha.isoformat()}", cuerpo
+
+
+def consultar_pasaje(corpus: Corpus, consulta: str) -> Tuple[int, str, str]:
+    """Registros de cada corpus que citan algún versículo de la cita"""
+    cita = _parametros(consulta, ('cita',)).get('cita', [''])[-1]
+    referencias = extraer_referencias(cita)
+    if not referencias:
+        raise ErrorConsulta(f"No se reconoce ninguna referencia en la cita: {cita}")
+    corpus.revisar()
+    partes = []
+    for nombre, indice in corpus.indices.items():
+        posiciones = indice.referencias.buscar_cita(cita)
+        partes.append(f'"{nombre}":{{"total":{len(posiciones)},"registros":['
+                      + ','.join(indice.codificados[posicion] for posicion in posiciones) + ']}')
+    pasajes = json.dumps([str(referencia) for referencia in referencias], ensure_ascii=False)
+    version = '-'.join(indice.version for indice in corpus.indices.values())
+    return 200, version, f'{{"pasajes":{pasajes},' + ','.join(partes) + '}'
+
+
+def consultar(corpus: Corpus, ruta: str, consulta: str) -> Tuple[int, str, str]:
+    """Resuelve una consulta; devuelve código HTTP, versión del corpus y cuerpo JSON"""
+    partes = [parte for parte in ruta.split('/') if parte]
+    if not partes:
+        _parametros(consulta)
+        corpus.revisar()
+        cuerpo = {nombre: indice.resumen() for nombre, indice in corpus.indices.items()}
+        version = '-'.join(indice.version for indice in corpus.indices.values())
+        return 200, version, json.dumps(cuerpo, ensure_ascii=False)
+    if partes == ['hoy']:
+        return consultar_dia(corpus, consulta)
+    if partes == ['pasaje']:
+        return consultar_pasaje(corpus, consulta)
+
+    indice = corpus.indice(partes[0])
+    if indice is None or len(partes) > 2:
+        return 404, '', json.dumps({'error': f"No existe: {ruta}"}, ensure_ascii=False)
+
+    if len(partes) == 2:
+        _parametros(consulta)
+        posicion = indice.por_id.get(partes[1])
+        if posicion is None:
+            return 404, indice.version, json.dumps({'error': f"No hay registro con id {partes[1]}"})
+        return 200, indice.version, indice.codificados[posicion]
+
+    parametros = parse_qs(consulta)
+    if 'link' in parametros:
+        _parametros(consulta, ('link',))
+        posicion = indice.por_link.get(normalizar_link(parametros['link'][-1]))
+        if posicion is None:
+            return 404, indice.version, json.dumps({'error': "No hay registro con ese link"})
+        return 200, indice.version, indice.codificados[posicion]
+
+    pagina = _pagina(parametros, 'pagina', 1, 10 ** 9)
+    por_pagina = _pagina(parametros, 'por_pagina', POR_PAGINA, POR_PAGINA_MAXIMO)
+    posiciones = indice.filtrar(parametros)
+    inicio = (pagina - 1) * por_pagina
+    seleccion = posiciones[inicio:inicio + por_pagina]
+    cuerpo = (f'{{"total":{len(posiciones)},"pagina":{pagina},"por_pagina":{por_pagina},"registros":['
+              + ','.join(indice.codificados[posicion] for posicion in seleccion) + ']}')
+    return 200, indice.version, cuerpo
+
+
+def dividir_ruta(ruta: str) -> Tuple[str, str]:
+    """(ruta, consulta) de la línea de pedido"""
+    try:
+        partes = urlsplit(ruta)
+    except ValueError:
+        raise ErrorConsulta(f"Ruta inválida: {ruta}")
+    return partes.path, partes.query
+
+
+class ManejadorConsultas(BaseHTTPRequestHandler):
+    """GET sobre los corpus; el ETag depende de la versión del corpus y de la consulta"""
+
+    corpus: Corpus = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        try:
+            codigo, version, cuerpo = consultar(self.corpus, *dividir_ruta(self.path))
+        except ErrorConsulta as e:
+            codigo, version, cuerpo = 400, '', json.dumps({'error': str(e)}, ensure_ascii=False)
+        except Exception as e:
+            # Un error inesperado se responde igual (500) en lugar de cortar la conexión
+            print(f"⚠️  Error al responder {self.path}: {e!r}")
+            codigo, version, cuerpo = 500, '', json.dumps({'error': "Error interno del servidor"})
+
+        etag = None
+        if codigo == 200 and version:
+            huella = hashlib.blake2b(self.path.encode('utf-8'), digest_size=8).hexdigest()
+            etag = f'"{version}-{huella}"'
+            if etag in (self.headers.get('If-None-Match') or ''):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        datos = cuerpo.encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(datos)))
+        self.send_header('Cache-Control', 'no-cache')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def crear_servidor(archivos: Iterable[str], host: str = '127.0.0.1', puerto: int = 8000,
+                   intervalo_recarga: float = INTERVALO_RECARGA) -> ThreadingHTTPServer:
+    """Carga los corpus y crea el servidor (sin arrancarlo)"""
+    # La tabla del calendario se calcula antes de la primera consulta de /hoy
+    calendario()
+    manejador = type('Manejador', (ManejadorConsultas,), {'corpus': Corpus(list(archivos), intervalo_recarga)})
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+def main():
+    """Sirve los corpus publicados"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivos', nargs='*',
+                        default=['salida/contemplaciones.json', 'salida/ejercicios_espirituales.json'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8000)
+    args = parser.parse_args()
+
+    servidor = crear_servidor([a for a in args.archivos if os.path.exists(a)], args.host, args.puerto)
+    print(f"🌐 Sirviendo en http://{args.host}:{args.puerto}/")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor detenido")
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
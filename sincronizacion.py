@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sincronización de registros por hash de contenido
+Cada registro lleva un hash de su HTML de origen y de los campos derivados;
+al sincronizar solo se actualizan los registros cuyo hash cambió
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lector_json import escribir_array_json, iterar_registros
+
+
+# Campos que no forman parte del hash: el id del scraping no es estable entre
+# ejecuciones y el link puede haber sido reemplazado por el de Drive
+CAMPOS_EXCLUIDOS_HASH = ('id', 'link', 'link_origen', 'hash_contenido')
+
+
+def normalizar_link(link: str) -> str:
+    """Normaliza una URL quitando fragmentos, parámetros y la barra final"""
+    return link.split('#')[0].split('?')[0].rstrip('/')
+
+
+def clave_sincronizacion(registro: Dict) -> str:
+    """Link normalizado de la publicación original en WordPress
+
+    Es link_origen, que la reconciliación de links no toca; los registros
+    anteriores a ese campo usan su link.
+    """
+    return normalizar_link(registro.get('link_origen') or registro.get('link', ''))
+
+
+def calcular_hash_contenido(contenido_html: str, campos: Dict) -> str:
+    """Calcula el hash SHA-256 del HTML de origen y de los campos derivados"""
+    derivados = {clave: valor for clave, valor in campos.items() if clave not in CAMPOS_EXCLUIDOS_HASH}
+    h = hashlib.sha256()
+    h.update((contenido_html or '').encode('utf-8'))
+    h.update(b'\0')
+    h.update(json.dumps(derivados, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+@dataclass
+class ResultadoSincronizacion:
+    """Conteo de registros insertados, actualizados y sin cambios"""
+    insertados: int = 0
+    actualizados: int = 0
+    sin_cambios: int = 0
+    # Registros insertados o actualizados tal como quedaron almacenados
+    registros: List[Dict] = field(default_factory=list, repr=False)
+
+    @property
+    def modificados(self) -> int:
+        return self.insertados + self.actualizados
+
+    def mostrar(self, nombre: str = "registros"):
+        """Imprime el resumen de la sincronización"""
+        print(f"Sincronización de {nombre}:")
+        print(f"  ➕ Insertados: {self.insertados}")
+        print(f"  🔄 Actualizados: {self.actualizados}")
+        print(f"  = Sin cambios: {self.sin_cambios}")
+
+
+def fusionar_actualizacion(existente: Dict, nuevo: Dict) -> Dict:
+    """Devuelve el registro nuevo conservando el id y el link del existente"""
+    actualizado = dict(nuevo)
+    actualizado['id'] = existente.get('id', nuevo.get('id'))
+    actualizado['link'] = existente.get('link') or nuevo.get('link', '')
+    if not actualizado.get('link_origen') and existente.get('link_origen'):
+        actualizado['link_origen'] = existente['link_origen']
+    return actualizado
+
+
+def clasificar_registro(existente: Optional[Dict], nuevo: Dict) -> str:
+    """Indica si un registro es 'insertado', 'actualizado' o 'sin_cambios' respecto al existente
+
+    Un registro existente sin link_origen se actualiza una vez para guardarlo.
+    """
+    if existente is None:
+        return 'insertado'
+    if (existente.get('hash_contenido') and existente.get('hash_contenido') == nuevo.get('hash_contenido')
+            and (existente.get('link_origen') or not nuevo.get('link_origen'))):
+        return 'sin_cambios'
+    return 'actualizado'
+
+
+class IndiceSincronizacion:
+    """Registros existentes por link de origen y, los anteriores a link_origen, por título
+
+    Los registros publicados antes de link_origen pueden tener como link el
+    de Drive, que ya no coincide con el de WordPress; para ellos se usa el
+    título, solo si ningún otro registro de ese tipo lo repite. Guarda un
+    valor por registro (el registro o su posición); ante claves repetidas
+    gana el primero.
+    """
+
+    def __init__(self):
+        self.por_clave: Dict[str, object] = {}
+        self.por_titulo: Dict[str, object] = {}
+        self.titulos_repetidos = set()
+
+    def agregar(self, registro: Dict, valor) -> None:
+        clave = clave_sincronizacion(registro)
+        if clave:
+            self.por_clave.setdefault(clave, valor)
+        titulo = registro.get('titulo', '')
+        if titulo and not registro.get('link_origen'):
+            if titulo in self.por_titulo:
+                self.titulos_repetidos.add(titulo)
+            else:
+                self.por_titulo[titulo] = valor
+
+    def reemplazar(self, registro: Dict, valor) -> None:
+        """Apunta la clave del registro a un valor nuevo (ej: su versión actualizada en este lote)"""
+        clave = clave_sincronizacion(registro)
+        if clave:
+            self.por_clave[clave] = valor
+
+    def buscar(self, registro: Dict):
+        """Valor del registro existente que corresponde a este, o None"""
+        clave = clave_sincronizacion(registro)
+        if clave and clave in self.por_clave:
+            return self.por_clave[clave]
+        titulo = registro.get('titulo', '')
+        if titulo and titulo not in self.titulos_repetidos:
+            return self.por_titulo.get(titulo)
+        return None
+
+
+def cargar_links(ruta: str) -> set:
+    """Devuelve el conjunto de links normalizados de un corpus (link y link_origen)"""
+    links = set()
+    for registro in iterar_registros(ruta, campos=('link', 'link_origen')):
+        for campo in ('link', 'link_origen'):
+            if registro.get(campo):
+                links.add(normalizar_link(registro[campo]))
+    return links
+
+
+def sincronizar_archivo(archivo_json: str, nuevos: Iterable[Dict]) -> Tuple[ResultadoSincronizacion, int]:
+    """Sincroniza un JSON publicado con memoria acotada; devuelve (resultado, total en archivo)
+
+    Una primera pasada lee solo los campos de la clave de sincronización y el
+    hash de los registros existentes para clasificar los nuevos; si hay
+    cambios, una segunda pasada copia el archivo aplicando las
+    actualizaciones (por posición) y añade los insertados al final.
+    """
+    existe = Path(archivo_json).exists()
+    indice = IndiceSincronizacion()
+    existentes = {}
+    total_existentes = 0
+    if existe:
+        campos = ('id', 'titulo', 'link', 'link_origen', 'hash_contenido')
+        for posicion, registro in enumerate(iterar_registros(archivo_json, campos=campos)):
+            indice.agregar(registro, posicion)
+            existentes[posicion] = registro
+            total_existentes += 1
+    # Solo se conservan los existentes que pueden encontrarse (los demás no se actualizan)
+    alcanzables = set(indice.por_clave.values()) | set(indice.por_titulo.values())
+    existentes = {posicion: registro for posicion, registro in existentes.items() if posicion in alcanzables}
+
+    resultado = ResultadoSincronizacion()
+    insertados = []
+    actualizaciones = {}
+    for nuevo in nuevos:
+        destino = indice.buscar(nuevo)
+        if isinstance(destino, int):
+            existente = actualizaciones.get(destino) or existentes[destino]
+        else:
+            # Repetido dentro del mismo lote: se compara con el ya insertado
+            existente = insertados[destino[1]] if destino is not None else None
+
+        estado = clasificar_registro(existente, nuevo)
+        if estado == 'insertado':
+            indice.reemplazar(nuevo, ('insertado', len(insertados)))
+            insertados.append(nuevo)
+            resultado.insertados += 1
+            resultado.registros.append(nuevo)
+        elif estado == 'actualizado':
+            registro = fusionar_actualizacion(existente, nuevo)
+            if isinstance(destino, int):
+                actualizaciones[destino] = registro
+            else:
+                insertados[destino[1]] = registro
+            resultado.actualizados += 1
+            resultado.registros.append(registro)
+        else:
+            resultado.sin_cambios += 1
+
+    if not resultado.modificados:
+        return resultado, total_existentes
+
+    def registros_sincronizados():
+        if existe:
+            for posicion, registro in enumerate(iterar_registros(archivo_json)):
+                if posicion in actualizaciones:
+                    registro = fusionar_actualizacion(registro, actualizaciones[posicion])
+                yield registro
+        yield from insertados
+
+    total = escribir_array_json(archivo_json, registros_sincronizados())
+    return resultado, total
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del almacén JSONL: sincronización en flujo y artefactos que incluyen el log pendiente
+"""
+
+import gzip
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from almacen_jsonl import AlmacenJSONL
+from lector_indexado import LectorIndexado, actualizar_exportacion_indexada
+from lector_json import escribir_array_json
+from serializador import publicar_formatos, ruta_formato
+
+
+def registro(id_registro: int, slug: str, hash_contenido: str, **extra) -> dict:
+    base = {
+        'id': id_registro,
+        'titulo': f'Título {slug}',
+        'link': f'https://drive.google.com/{slug}',
+        'link_origen': f'https://ejemplo.org/{slug}/',
+        'hash_contenido': hash_contenido,
+    }
+    base.update(extra)
+    return base
+
+
+class PruebasAlmacenJSONL(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'corpus.json')
+        escribir_array_json(self.ruta, [registro(1, 'uno', 'h1'), registro(2, 'dos', 'h2')])
+        self.almacen = AlmacenJSONL(self.ruta)
+        self.almacen.agregar([registro(3, 'tres', 'h3')])
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_sincronizar_no_carga_la_instantanea_completa(self):
+        nuevos = [
+            registro(1, 'uno', 'h1'),
+            registro(20, 'dos', 'h2-nuevo', link='https://ejemplo.org/dos/'),
+            registro(30, 'tres', 'h3'),
+            registro(4, 'cuatro', 'h4'),
+        ]
+        with mock.patch.object(AlmacenJSONL, '_leer_instantanea', side_effect=AssertionError('json.load')):
+            resultado = self.almacen.sincronizar(nuevos)
+
+        self.assertEqual((resultado.insertados, resultado.actualizados, resultado.sin_cambios), (1, 1, 2))
+        actualizado = next(r for r in resultado.registros if r['hash_contenido'] == 'h2-nuevo')
+        self.assertEqual(actualizado['id'], 2)
+        self.assertEqual(actualizado['link'], 'https://drive.google.com/dos')
+
+    def test_indice_incluye_el_log_y_se_reconstruye_al_crecer(self):
+        actualizar_exportacion_indexada(self.ruta)
+        with LectorIndexado(self.ruta) as lector:
+            self.assertEqual(lector.por_id(3)['titulo'], 'Título tres')
+            self.assertIsNone(lector.por_id(4))
+
+        self.almacen.agregar([registro(4, 'cuatro', 'h4')])
+        with LectorIndexado(self.ruta) as lector:
+            self.assertEqual(lector.por_id(4)['titulo'], 'Título cuatro')
+
+        self.almacen.compactar()
+        self.assertFalse(actualizar_exportacion_indexada(self.ruta))
+
+    def test_formatos_publicados_incluyen_el_log(self):
+        publicar_formatos(self.ruta, ['min', 'gz'])
+        with open(ruta_formato(self.ruta, 'min'), encoding='utf-8') as f:
+            self.assertEqual([r['id'] for r in json.load(f)], [1, 2, 3])
+        with gzip.open(ruta_formato(self.ruta, 'gz'), 'rt', encoding='utf-8') as f:
+            self.assertEqual([r['id'] for r in json.load(f)], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
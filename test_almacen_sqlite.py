@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del almacén SQLite al alternar modos de almacenamiento y reescribir links
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from actualizar_links import actualizar_links_contemplaciones
+from almacen_sqlite import AlmacenSQLite
+from app import Contemplacion, ProcesadorContemplaciones
+from lector_json import escribir_array_json, iterar_registros
+
+
+def contemplacion(id_registro: int, slug: str, version: str = '') -> Contemplacion:
+    link = f'https://diegojavier.wordpress.com/{slug}/'
+    return Contemplacion(id_registro, 'C', 'Cuaresma', f'Título {slug}', 'Lc 9,28-36', f'Resumen {slug}{version}',
+                         link, hash_contenido=f'hash-{slug}{version}', link_origen=link)
+
+
+class PruebasAlternarAlmacenes(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'contemplaciones.json')
+        # Publicación anterior a link_origen: 'dos' solo tiene su link de WordPress
+        escribir_array_json(self.ruta, [
+            contemplacion(1, 'uno').to_dict(),
+            {'id': 2, 'ciclo': 'C', 'tiempo_liturgico': 'Cuaresma', 'titulo': 'Título dos',
+             'lecturas': 'Lc 15,1-3', 'resumen': 'Resumen dos', 'link': 'https://diegojavier.wordpress.com/dos/'},
+        ])
+        self.procesador = ProcesadorContemplaciones()
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def generar(self, almacen: str, *contemplaciones: Contemplacion):
+        self.procesador.contemplaciones = list(contemplaciones)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.procesador.generar_json(self.ruta, almacen=almacen, deltas=False)
+
+    def reescribir_links(self, links: dict):
+        """Como actualizar_links.py: reescribe el JSON en un temporal y lo reemplaza"""
+        mejores = {titulo: ({'link': link}, 1.0) for titulo, link in links.items()}
+        contador = {'actualizaciones': 0, 'total': 0}
+        temporal = self.ruta + '.actualizado'
+        with contextlib.redirect_stdout(io.StringIO()):
+            escribir_array_json(temporal, actualizar_links_contemplaciones(
+                iterar_registros(self.ruta), mejores, contador
+            ))
+        os.replace(temporal, self.ruta)
+
+    def test_sqlite_conserva_lo_escrito_por_json_y_por_los_scripts_de_links(self):
+        self.generar('sqlite', contemplacion(1, 'uno'))
+        # Con --almacen json se actualiza 'uno' y se agrega 'tres'
+        self.generar('json', contemplacion(1, 'uno', ' (corregido)'), contemplacion(3, 'tres'))
+        self.reescribir_links({
+            'Título uno': 'https://drive.google.com/uno',
+            'Título dos': 'https://drive.google.com/dos',
+        })
+
+        # El scraping solo trae las publicaciones que no están en el JSON
+        self.generar('sqlite', contemplacion(4, 'cuatro'))
+
+        publicados = {r['id']: r['link'] for r in iterar_registros(self.ruta)}
+        self.assertEqual(publicados, {
+            1: 'https://drive.google.com/uno',
+            2: 'https://drive.google.com/dos',
+            3: 'https://diegojavier.wordpress.com/tres/',
+            4: 'https://diegojavier.wordpress.com/cuatro/',
+        })
+        resumenes = {r['id']: r['resumen'] for r in iterar_registros(self.ruta)}
+        self.assertEqual(resumenes[1], 'Resumen uno (corregido)')
+        with AlmacenSQLite(str(Path(self.directorio.name) / 'corpus.sqlite3')) as almacen:
+            self.assertEqual(almacen.contar('contemplaciones'), 4)
+            # Sin cambios externos no se vuelve a importar
+            self.assertIsNone(almacen.importar_si_cambio('contemplaciones', self.ruta))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la conciliación de títulos con fuente_agente
+"""
+
+import contextlib
+import io
+import unittest
+
+from actualizar_links import actualizar_links_contemplaciones
+from conciliacion import CatalogoConciliacion, Conciliador
+
+
+FUENTE_AGENTE = [
+    {'file': 'contemplaciones - 2019.docx', 'title': 'La Anunciación', 'link': 'https://drive.google.com/primero'},
+    {'file': 'contemplaciones - 2021.docx', 'title': 'La Anunciación', 'link': 'https://drive.google.com/segundo'},
+    {'file': 'contemplaciones - 2021.docx', 'title': 'LA ANUNCIACIÓN', 'link': 'https://drive.google.com/tercero'},
+    {'file': 'contemplaciones -2022.docx', 'title': 'Sin espacio', 'link': 'https://drive.google.com/sin-espacio'},
+    {'file': 'ejercicios - 2021.docx', 'title': 'Otro corpus', 'link': 'https://drive.google.com/otro'},
+]
+
+
+class PruebasCatalogoConciliacion(unittest.TestCase):
+
+    def setUp(self):
+        self.catalogo = CatalogoConciliacion(FUENTE_AGENTE)
+
+    def test_titulo_repetido_gana_la_ultima_entrada(self):
+        # Como el índice original de actualizar_links.py (indice[title] = link)
+        self.assertEqual(self.catalogo.indice_exacto['La Anunciación']['link'], 'https://drive.google.com/segundo')
+        normalizados = list(self.catalogo.indice_normalizado.values())
+        self.assertEqual(len(normalizados), 1)
+        self.assertEqual(normalizados[0]['link'], 'https://drive.google.com/tercero')
+
+    def test_indices_exigen_el_prefijo_con_espacio(self):
+        self.assertNotIn('Sin espacio', self.catalogo.indice_exacto)
+        self.assertNotIn('Otro corpus', self.catalogo.indice_exacto)
+        # El nivel difuso sigue viendo la entrada sin espacio
+        self.assertEqual(len(self.catalogo.entradas), 4)
+
+    def test_conciliar_por_niveles(self):
+        conciliador = Conciliador(catalogo=self.catalogo, niveles=('exacto', 'normalizado'))
+        resultados = conciliador.conciliar(['La Anunciación', 'la anunciacion', 'Inexistente'])
+        self.assertEqual(resultados['La Anunciación'][0]['link'], 'https://drive.google.com/segundo')
+        self.assertEqual(resultados['la anunciacion'][0]['link'], 'https://drive.google.com/tercero')
+        self.assertIsNone(resultados['Inexistente'])
+        self.assertEqual(conciliador.nivel_de['la anunciacion'], 'normalizado')
+
+
+    def test_actualizar_links_elige_el_mismo_link_que_el_indice_original(self):
+        # El índice de actualizar_links.py antes de la cascada: {title: link}, sin setdefault
+        original = {}
+        for entrada in FUENTE_AGENTE:
+            if entrada['file'].startswith('contemplaciones - ') and entrada['title'] and entrada['link']:
+                original[entrada['title']] = entrada['link']
+
+        conciliador = Conciliador(catalogo=self.catalogo, niveles=('exacto',))
+        mejores = conciliador.conciliar(['La Anunciación'])
+        contador = {'actualizaciones': 0, 'total': 0}
+        with contextlib.redirect_stdout(io.StringIO()):
+            actualizada, = actualizar_links_contemplaciones(
+                [{'titulo': 'La Anunciación', 'link': 'https://ejemplo.org/anunciacion/'}], mejores, contador)
+
+        self.assertEqual(actualizada['link'], original['La Anunciación'])
+        self.assertEqual(actualizada['link'], 'https://drive.google.com/segundo')
+
+
+if __name__ == '__main__':
+    unittest.main()
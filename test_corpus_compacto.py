@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del corpus compacto en memoria: ida y vuelta al JSON y memoria ocupada
+"""
+
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from corpus_compacto import CAMPOS_CATEGORICOS, CorpusCompacto
+from lector_json import iterar_registros
+from serializador import escribir_json
+
+
+TIEMPOS = ('Adviento', 'Navidad', 'Cuaresma', 'Pascua', 'Tiempo Ordinario')
+
+
+def registros_de_prueba(cantidad: int):
+    for i in range(cantidad):
+        registro = {
+            'id': 1000 + i,
+            'ciclo': 'ABC'[i % 3],
+            'tiempo_liturgico': TIEMPOS[i % len(TIEMPOS)],
+            'titulo': f'Domingo {i % 34 + 1} {"ABC"[i % 3]} {2000 + i % 25}',
+            'lecturas': f'Lc {i % 24 + 1},1-{i % 30 + 5}',
+            'resumen': f'Contemplación número {i}: «el Reino está cerca»',
+            'link': f'https://drive.google.com/file/d/{i:08d}/view',
+        }
+        # Los registros antiguos no tienen hash_contenido ni link_origen
+        if i % 4:
+            registro['link_origen'] = f'https://diegojavier.wordpress.com/{i}/'
+            registro['hash_contenido'] = f'{i:064x}'
+        yield registro
+
+
+class PruebasCorpusCompacto(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'contemplaciones.json')
+        escribir_json(self.ruta, registros_de_prueba(500))
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_ida_y_vuelta_identica_al_serializador(self):
+        corpus = CorpusCompacto.desde_json(self.ruta)
+        self.assertEqual(list(corpus), list(iterar_registros(self.ruta)))
+
+        copia = Path(self.directorio.name) / 'copia.json'
+        self.assertEqual(corpus.escribir_json(str(copia)), 500)
+        self.assertEqual(copia.read_bytes(), Path(self.ruta).read_bytes())
+
+    def test_campos_categoricos_codificados_e_internados(self):
+        corpus = CorpusCompacto.desde_json(self.ruta)
+        self.assertEqual(corpus.campos_categoricos, CAMPOS_CATEGORICOS['contemplaciones'])
+        self.assertEqual(corpus.contar_por('ciclo'), {'A': 167, 'B': 167, 'C': 166})
+        for valor in corpus._columnas['tiempo_liturgico'].vocabulario:
+            self.assertIs(valor, sys.intern(valor))
+
+    def test_ocupa_menos_memoria_que_los_diccionarios(self):
+        tracemalloc.start()
+        try:
+            registros = list(iterar_registros(self.ruta))
+            en_diccionarios = tracemalloc.get_traced_memory()[0]
+            del registros
+            inicio = tracemalloc.get_traced_memory()[0]
+            corpus = CorpusCompacto.desde_json(self.ruta)
+            compacto = tracemalloc.get_traced_memory()[0] - inicio
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(corpus), 500)
+        self.assertLess(compacto, en_diccionarios * 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la publicación por deltas: la cadena aplicada sobre una copia vieja da la nueva
+"""
+
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from almacen_jsonl import AlmacenJSONL, cargar_corpus_completo
+from archivos import hash_archivo
+from deltas import aplicar_cadena, directorio_deltas, publicar_delta
+from lector_json import escribir_array_json, iterar_registros
+
+
+def registro(id_registro: int, resumen: str) -> dict:
+    return {'id': id_registro, 'titulo': f'Título {id_registro}', 'resumen': resumen,
+            'link': f'https://drive.google.com/{id_registro}'}
+
+
+class PruebasCadenaDeltas(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'contemplaciones.json')
+        self.deltas = str(directorio_deltas(self.ruta))
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def publicar(self, registros=None):
+        if registros is not None:
+            escribir_array_json(self.ruta, registros)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return publicar_delta(self.ruta)
+
+    def indice(self) -> dict:
+        with open(Path(self.deltas) / 'indice.json', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_publicar_modificar_publicar_y_aplicar_sobre_la_copia_vieja(self):
+        self.publicar([registro(1, 'uno'), registro(2, 'dos'), registro(3, 'tres «ñ»')])
+        copia_vieja = list(iterar_registros(self.ruta))
+
+        self.publicar([registro(1, 'uno corregido'), registro(3, 'tres «ñ»'), registro(4, 'cuatro')])
+        self.publicar([registro(1, 'uno corregido'), registro(3, 'tres otra vez'), registro(4, 'cuatro'),
+                       registro(5, 'cinco')])
+
+        registros, version = aplicar_cadena(copia_vieja, self.deltas, version_local=0)
+
+        self.assertEqual(version, 2)
+        self.assertEqual(registros, list(iterar_registros(self.ruta)))
+        # El hash publicado es el del archivo publicado
+        self.assertEqual(self.indice()['sha256'], hash_archivo(self.ruta))
+
+    def test_modo_jsonl_publica_la_vista_consolidada(self):
+        self.publicar([registro(1, 'uno'), registro(2, 'dos')])
+        copia_vieja = list(iterar_registros(self.ruta))
+
+        AlmacenJSONL(self.ruta).agregar([registro(2, 'dos corregido'), registro(3, 'tres')])
+        self.assertIsNotNone(self.publicar())
+
+        registros, version = aplicar_cadena(copia_vieja, self.deltas, version_local=0)
+        self.assertEqual(version, 1)
+        self.assertEqual(registros, cargar_corpus_completo(self.ruta))
+
+    def test_copia_alterada_no_pasa_la_verificacion(self):
+        self.publicar([registro(1, 'uno')])
+        self.publicar([registro(1, 'uno'), registro(2, 'dos')])
+
+        with self.assertRaises(ValueError):
+            aplicar_cadena([registro(1, 'uno cambiado en el cliente')], self.deltas, version_local=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de las estadísticas materializadas
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from actualizar_links import actualizar_links_contemplaciones
+from estadisticas import SIN_ANIO, EstadisticasCorpus, actualizar_estadisticas, extraer_anio
+from lector_json import escribir_array_json, iterar_registros
+
+
+class PruebasExtraerAnio(unittest.TestCase):
+
+    def test_link_origen_antes_que_link_y_titulo(self):
+        registro = {
+            'titulo': 'Domingo 3 C 2019',
+            'link': 'https://drive.google.com/file/d/abc/view',
+            'link_origen': 'https://diegojavier.wordpress.com/2016/01/24/domingo-3-c/',
+        }
+        self.assertEqual(extraer_anio(registro), '2016')
+
+    def test_registro_anterior_a_link_origen(self):
+        self.assertEqual(extraer_anio({'link': 'https://diegojavier.wordpress.com/2013/03/10/x/',
+                                       'titulo': 'Domingo 4 C 2016'}), '2013')
+        self.assertEqual(extraer_anio({'link': 'https://drive.google.com/file/d/abc/view',
+                                       'titulo': 'Domingo 4 C 2016'}), '2016')
+        self.assertEqual(extraer_anio({'link': 'https://drive.google.com/file/d/abc/view',
+                                       'titulo': 'La Anunciación'}), SIN_ANIO)
+
+
+class PruebasEstadisticasTrasReescribirLinks(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'contemplaciones.json')
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_reescribir_el_link_de_un_registro_anterior_actualiza_el_anio(self):
+        escribir_array_json(self.ruta, [
+            {'id': 1, 'ciclo': 'C', 'tiempo_liturgico': 'Cuaresma', 'titulo': 'Domingo 4 C 2016',
+             'lecturas': 'Lc 15,1-3', 'link': 'https://diegojavier.wordpress.com/2013/03/10/domingo-4-c/'},
+        ])
+        actualizar_estadisticas(self.ruta, 'contemplaciones', [])
+        self.assertEqual(EstadisticasCorpus(self.ruta).cargar().conteos['anio'], {'2013': 1})
+
+        # Como actualizar_links.py: reescribe el JSON y registra las entradas modificadas
+        mejores = {'Domingo 4 C 2016': ({'link': 'https://drive.google.com/file/d/abc/view'}, 1.0)}
+        contador = {'actualizaciones': 0, 'total': 0}
+        modificadas = []
+        temporal = self.ruta + '.actualizado'
+        with contextlib.redirect_stdout(io.StringIO()):
+            escribir_array_json(temporal, actualizar_links_contemplaciones(
+                iterar_registros(self.ruta), mejores, contador, modificadas
+            ))
+        os.replace(temporal, self.ruta)
+        actualizar_estadisticas(self.ruta, 'contemplaciones', modificadas)
+
+        estadisticas = EstadisticasCorpus(self.ruta).cargar()
+        self.assertEqual(estadisticas.total, 1)
+        self.assertEqual(estadisticas.conteos['anio'], {'2016': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la lectura en flujo y la escritura atómica de arrays JSON
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from lector_json import escribir_array_json, iterar_registros
+
+
+def _registros_que_fallan():
+    yield {'id': 1, 'titulo': 'Primero'}
+    raise RuntimeError('fallo a mitad de la serialización')
+
+
+class PruebasEscrituraAtomica(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = Path(self.directorio.name) / 'corpus.json'
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def test_ida_y_vuelta(self):
+        registros = [{'id': 1, 'titulo': 'Uno'}, {'id': 2, 'titulo': 'Dos'}]
+        self.assertEqual(escribir_array_json(str(self.ruta), registros), 2)
+        self.assertEqual(list(iterar_registros(str(self.ruta))), registros)
+
+    def test_fallo_no_deja_temporal_ni_toca_el_original(self):
+        escribir_array_json(str(self.ruta), [{'id': 7, 'titulo': 'Original'}])
+
+        with self.assertRaises(RuntimeError):
+            escribir_array_json(str(self.ruta), _registros_que_fallan())
+
+        self.assertEqual([p.name for p in Path(self.directorio.name).iterdir()], ['corpus.json'])
+        with open(self.ruta, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), [{'id': 7, 'titulo': 'Original'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la publicación particionada
+"""
+
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from particiones import PARTICIONES, escribir_particiones
+
+
+def registro(id_registro: int, ciclo: str, tiempo) -> dict:
+    return {'id': id_registro, 'ciclo': ciclo, 'tiempo_liturgico': tiempo, 'titulo': f'Registro {id_registro}'}
+
+
+class PruebasParticiones(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'contemplaciones.json')
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def escribir(self, registros):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return escribir_particiones(self.ruta, PARTICIONES['contemplaciones'], registros)
+
+    def test_valores_que_se_normalizan_igual_van_a_archivos_distintos(self):
+        registros = [
+            registro(1, 'A', 'Tiempo Ordinario'),
+            registro(2, 'A', 'Tiempo ordinario'),
+            registro(3, 'A', 'Tiempo-Ordinario'),
+            registro(4, 'A', ''),
+            registro(5, 'A', None),
+            registro(6, 'A', 'Adviento'),
+        ]
+        manifiesto = self.escribir(registros)
+
+        por_valor = {entrada['tiempo_liturgico']: entrada for entrada in manifiesto['particiones']}
+        self.assertEqual(len(por_valor), 6)
+        rutas = [entrada['ruta'] for entrada in manifiesto['particiones']]
+        # Distintas también en un sistema de archivos que no distingue mayúsculas
+        self.assertEqual(len({ruta.casefold() for ruta in rutas}), 6)
+        # Sin colisión, el segmento sigue siendo el valor normalizado
+        self.assertEqual(por_valor['Adviento']['ruta'], 'ciclo=A/tiempo=Adviento.json')
+
+        directorio = Path(self.ruta).with_suffix('')
+        for valor, entrada in por_valor.items():
+            with open(directorio / entrada['ruta'], encoding='utf-8') as f:
+                contenido = json.load(f)
+            self.assertEqual([r['tiempo_liturgico'] for r in contenido], [valor])
+
+    def test_particion_vacia_se_elimina(self):
+        self.escribir([registro(1, 'A', 'Adviento'), registro(2, 'B', 'Pascua')])
+        manifiesto = self.escribir([registro(1, 'A', 'Adviento')])
+
+        directorio = Path(self.ruta).with_suffix('')
+        self.assertEqual([e['ruta'] for e in manifiesto['particiones']], ['ciclo=A/tiempo=Adviento.json'])
+        self.assertFalse((directorio / 'ciclo=B').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas del servidor de consultas: parámetros inválidos responden 400
+"""
+
+import http.client
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from serializador import escribir_json
+from servidor_consultas import crear_servidor
+
+
+CONTEMPLACIONES = [
+    {'id': 1, 'ciclo': 'C', 'tiempo_liturgico': 'Cuaresma', 'titulo': 'Domingo 2 C Cuaresma 2022',
+     'lecturas': 'Lc 9, 28-36', 'resumen': 'La Transfiguración', 'link': 'https://drive.google.com/uno'},
+    {'id': 2, 'ciclo': 'A', 'tiempo_liturgico': 'Tiempo Ordinario', 'titulo': 'Domingo 28 A 2011',
+     'lecturas': 'Mt 22, 1-14', 'resumen': 'El banquete de bodas', 'link': 'https://drive.google.com/dos'},
+]
+
+
+class PruebasServidorConsultas(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.mkdtemp()
+        archivo = str(Path(cls.directorio) / 'contemplaciones.json')
+        escribir_json(archivo, CONTEMPLACIONES)
+        cls.servidor = crear_servidor([archivo], puerto=0)
+        cls.hilo = threading.Thread(target=cls.servidor.serve_forever, daemon=True)
+        cls.hilo.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        shutil.rmtree(cls.directorio)
+
+    def pedir(self, ruta):
+        conexion = http.client.HTTPConnection(*self.servidor.server_address[:2], timeout=10)
+        try:
+            conexion.request('GET', ruta)
+            respuesta = conexion.getresponse()
+            return respuesta.status, json.loads(respuesta.read())
+        finally:
+            conexion.close()
+
+    def test_fecha_fuera_de_rango(self):
+        for ruta in ('/hoy?fecha=9999-12-31&domingo=1', '/hoy?fecha=0001-01-01', '/hoy?fecha=1969-12-31'):
+            codigo, cuerpo = self.pedir(ruta)
+            self.assertEqual(codigo, 400, ruta)
+            self.assertIn('error', cuerpo)
+
+    def test_fecha_valida(self):
+        codigo, cuerpo = self.pedir('/hoy?fecha=2022-03-13')
+        self.assertEqual(codigo, 200)
+        self.assertEqual((cuerpo['tiempo'], cuerpo['semana'], cuerpo['ciclo']), ('Cuaresma', 2, 'C'))
+        self.assertEqual([registro['id'] for registro in cuerpo['registros']], [1])
+
+    def test_parametros_invalidos(self):
+        for ruta in ('/hoy?fecha=13-03-2022', '/hoy?domingo=si', '/hoy?otro=1', '/pasaje?cita=nada',
+                     '/contemplaciones?pagina=0', '/contemplaciones?por_pagina=x', '/contemplaciones?color=azul',
+                     '/contemplaciones/1?x=1', '/contemplaciones?link=x&pagina=2'):
+            codigo, cuerpo = self.pedir(ruta)
+            self.assertEqual(codigo, 400, ruta)
+            self.assertIn('error', cuerpo)
+
+    def test_consultas_validas(self):
+        self.assertEqual(self.pedir('/contemplaciones?ciclo=C')[1]['total'], 1)
+        self.assertEqual(self.pedir('/contemplaciones/2')[1]['titulo'], 'Domingo 28 A 2011')
+        self.assertEqual(self.pedir('/pasaje?cita=Lc%209,30')[1]['contemplaciones']['total'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
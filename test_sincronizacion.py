@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de la sincronización por link de origen y hash de contenido
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from lector_json import escribir_array_json, iterar_registros
+from sincronizacion import IndiceSincronizacion, fusionar_actualizacion, sincronizar_archivo
+
+
+def publicado(id_registro: int, titulo: str, link: str, **extra) -> dict:
+    registro = {'id': id_registro, 'titulo': titulo, 'resumen': f'Resumen {titulo}', 'link': link}
+    registro.update(extra)
+    return registro
+
+
+def scrapeado(id_registro: int, titulo: str, slug: str, hash_contenido: str, **extra) -> dict:
+    link = f'https://diegojavier.wordpress.com/{slug}/'
+    registro = {'id': id_registro, 'titulo': titulo, 'resumen': f'Resumen {titulo}', 'link': link,
+                'link_origen': link, 'hash_contenido': hash_contenido}
+    registro.update(extra)
+    return registro
+
+
+class PruebasIndiceSincronizacion(unittest.TestCase):
+
+    def test_registro_sin_link_origen_se_encuentra_por_titulo(self):
+        indice = IndiceSincronizacion()
+        indice.agregar(publicado(1, 'La Anunciación', 'https://drive.google.com/a'), 0)
+        self.assertEqual(indice.buscar(scrapeado(99, 'La Anunciación', 'anunciacion', 'h')), 0)
+
+    def test_titulo_repetido_sin_link_origen_no_se_adivina(self):
+        indice = IndiceSincronizacion()
+        indice.agregar(publicado(1, 'La Anunciación', 'https://drive.google.com/a'), 0)
+        indice.agregar(publicado(2, 'La Anunciación', 'https://drive.google.com/b'), 1)
+        self.assertIsNone(indice.buscar(scrapeado(99, 'La Anunciación', 'anunciacion', 'h')))
+        # Cada uno sigue encontrándose por su link
+        self.assertEqual(indice.buscar(publicado(2, 'La Anunciación', 'https://drive.google.com/b')), 1)
+
+    def test_fusionar_actualizacion_conserva_id_y_link(self):
+        existente = publicado(7, 'Bautismo', 'https://drive.google.com/bautismo')
+        nuevo = scrapeado(70, 'Bautismo', 'bautismo', 'h2')
+        fusionado = fusionar_actualizacion(existente, nuevo)
+        self.assertEqual(fusionado['id'], 7)
+        self.assertEqual(fusionado['link'], 'https://drive.google.com/bautismo')
+        self.assertEqual(fusionado['link_origen'], 'https://diegojavier.wordpress.com/bautismo/')
+
+
+class PruebasSincronizarArchivo(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = str(Path(self.directorio.name) / 'corpus.json')
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def publicados(self) -> list:
+        return list(iterar_registros(self.ruta))
+
+    def test_registro_anterior_a_link_origen_se_completa_en_su_lugar(self):
+        # El link ya fue reemplazado por el de Drive: solo el título lo identifica
+        escribir_array_json(self.ruta, [publicado(1, 'La Anunciación', 'https://drive.google.com/a')])
+
+        resultado, total = sincronizar_archivo(self.ruta, [scrapeado(99, 'La Anunciación', 'anunciacion', 'h1')])
+
+        self.assertEqual((resultado.insertados, resultado.actualizados, total), (0, 1, 1))
+        registro, = self.publicados()
+        self.assertEqual(registro['id'], 1)
+        self.assertEqual(registro['link'], 'https://drive.google.com/a')
+        self.assertEqual(registro['link_origen'], 'https://diegojavier.wordpress.com/anunciacion/')
+
+        # Con link_origen guardado, la siguiente ejecución no cambia nada
+        resultado, _ = sincronizar_archivo(self.ruta, [scrapeado(99, 'La Anunciación', 'anunciacion', 'h1')])
+        self.assertEqual((resultado.insertados, resultado.actualizados, resultado.sin_cambios), (0, 0, 1))
+
+    def test_dos_registros_anteriores_con_el_mismo_titulo(self):
+        escribir_array_json(self.ruta, [
+            publicado(1, 'La Anunciación', 'https://drive.google.com/a'),
+            publicado(2, 'La Anunciación', 'https://drive.google.com/b'),
+        ])
+
+        resultado, total = sincronizar_archivo(self.ruta, [scrapeado(99, 'La Anunciación', 'anunciacion', 'h1')])
+
+        # No se sabe cuál de los dos es: ninguno se pisa y el scrapeado se agrega
+        self.assertEqual((resultado.insertados, resultado.actualizados, total), (1, 0, 3))
+        self.assertEqual([r['link'] for r in self.publicados()], [
+            'https://drive.google.com/a',
+            'https://drive.google.com/b',
+            'https://diegojavier.wordpress.com/anunciacion/',
+        ])
+
+    def test_resumen_modificado_actualiza_sin_insertar(self):
+        escribir_array_json(self.ruta, [
+            scrapeado(5, 'Bautismo', 'bautismo', 'h1', link='https://drive.google.com/bautismo'),
+            scrapeado(6, 'Epifanía', 'epifania', 'h6'),
+        ])
+        nuevo = scrapeado(50, 'Bautismo', 'bautismo', 'h2', resumen='Resumen corregido')
+
+        resultado, total = sincronizar_archivo(self.ruta, [nuevo])
+
+        self.assertEqual((resultado.insertados, resultado.actualizados, total), (0, 1, 2))
+        registro = self.publicados()[0]
+        self.assertEqual(registro['id'], 5)
+        self.assertEqual(registro['link'], 'https://drive.google.com/bautismo')
+        self.assertEqual(registro['resumen'], 'Resumen corregido')
+        self.assertEqual(registro['hash_contenido'], 'h2')
+
+
+if __name__ == '__main__':
+    unittest.main()
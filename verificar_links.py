@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificación de los links publicados en contemplaciones.json (y otros corpus)
+Los links se consultan en paralelo con un pool de conexiones y un límite de
+consultas simultáneas por host; el resultado se guarda por ID de archivo de
+Drive (o por link) con un tiempo de vigencia, así que cada ejecución solo
+vuelve a consultar los links nuevos o vencidos
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from lector_json import iterar_registros
+from sincronizacion import normalizar_link
+
+
+PATRON_DRIVE = re.compile(r'drive\.google\.com/(?:file/d/|open\?id=|uc\?(?:[^#]*&)?id=)([\w-]+)')
+
+# Para probar contra un servidor local: --plantilla 'http://127.0.0.1:8000/file/d/{id}/view'
+PLANTILLA_DRIVE = 'https://drive.google.com/file/d/{id}/view'
+
+RUTA_CACHE = 'salida/verificacion_links.json'
+TTL_HORAS = 24 * 7
+
+# Servidores que no aceptan HEAD: se repite la consulta con GET
+CODIGOS_SIN_HEAD = {403, 405, 501}
+
+OK = 'ok'
+ROTO = 'roto'
+ERROR = 'error'
+
+
+@dataclass
+class ResultadoLink:
+    """Resultado de verificar un link (o un archivo de Drive)"""
+    clave: str
+    url: str
+    estado: str
+    codigo: Optional[int] = None
+    detalle: str = ''
+    verificado: float = 0.0
+
+
+def clave_link(link: str) -> str:
+    """Clave de cache: "drive:<id>" para archivos de Drive, "url:<link normalizado>" para el resto"""
+    coincidencia = PATRON_DRIVE.search(link)
+    if coincidencia:
+        return f"drive:{coincidencia.group(1)}"
+    return f"url:{normalizar_link(link)}"
+
+
+class CacheLinks:
+    """Resultados de verificaciones anteriores con su fecha"""
+
+    def __init__(self, ruta: str = RUTA_CACHE, ttl_horas: float = TTL_HORAS):
+        self.ruta = Path(ruta)
+        self.ttl = ttl_horas * 3600
+        self.resultados: Dict[str, ResultadoLink] = {}
+
+    def cargar(self) -> 'CacheLinks':
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                self.resultados = {clave: ResultadoLink(**datos) for clave, datos in json.load(f).items()}
+        except (OSError, json.JSONDecodeError, TypeError):
+            self.resultados = {}
+        return self
+
+    def vigente(self, clave: str, ahora: float) -> Optional[ResultadoLink]:
+        """Resultado guardado si no venció; los errores de red nunca se consideran vigentes"""
+        resultado = self.resultados.get(clave)
+        if resultado is None or resultado.estado == ERROR or ahora - resultado.verificado > self.ttl:
+            return None
+        return resultado
+
+    def guardar(self) -> None:
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta.with_name(self.ruta.name + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({clave: asdict(r) for clave, r in sorted(self.resultados.items())},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(temporal, self.ruta)
+
+
+class VerificadorLinks:
+    """Consulta links en paralelo con una sesión compartida y un semáforo por host"""
+
+    def __init__(self, plantilla_drive: str = PLANTILLA_DRIVE, workers: int = 16, por_host: int = 4,
+                 timeout: float = 15, sesion: Optional[requests.Session] = None):
+        self.plantilla_drive = plantilla_drive
+        self.workers = workers
+        self.por_host = por_host
+        self.timeout = timeout
+        if sesion is None:
+            sesion = requests.Session()
+            sesion.headers.update({'User-Agent': 'ContemplacionesLiturgicas/1.0'})
+            # Un pool de conexiones por host del tamaño de los hilos, reutilizadas entre consultas
+            adaptador = HTTPAdapter(pool_connections=max(4, por_host), pool_maxsize=workers)
+            sesion.mount('http://', adaptador)
+            sesion.mount('https://', adaptador)
+        self.sesion = sesion
+        self._semaforos: Dict[str, threading.Semaphore] = {}
+        self._candado = threading.Lock()
+        self.consultados = 0
+
+    def url_de(self, link: str) -> Tuple[str, str]:
+        """Clave y URL a consultar (los archivos de Drive se consultan con la plantilla)"""
+        clave = clave_link(link)
+        if clave.startswith('drive:'):
+            return clave, self.plantilla_drive.format(id=clave[len('drive:'):])
+        return clave, link
+
+    def _semaforo(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc
+        with self._candado:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.Semaphore(self.por_host)
+            return self._semaforos[host]
+
+    def verificar_url(self, clave: str, url: str) -> ResultadoLink:
+        """HEAD (o GET si el servidor no acepta HEAD) siguiendo redirecciones"""
+        try:
+            with self._semaforo(url):
+                respuesta = self.sesion.head(url, allow_redirects=True, timeout=self.timeout)
+                if respuesta.status_code in CODIGOS_SIN_HEAD:
+                    respuesta = self.sesion.get(url, allow_redirects=True, timeout=self.timeout, stream=True)
+                    respuesta.close()
+        except requests.exceptions.RequestException as e:
+            return ResultadoLink(clave, url, ERROR, detalle=type(e).__name__, verificado=time.time())
+
+        estado = OK if respuesta.status_code < 400 else ROTO
+        detalle = ''
+        if estado == OK and 'accounts.google.com' in urlsplit(respuesta.url).netloc:
+            # Drive redirige al login cuando el archivo dejó de ser público
+            estado, detalle = ROTO, 'requiere inicio de sesión'
+        return ResultadoLink(clave, url, estado, respuesta.status_code, detalle, time.time())
+
+    def verificar(self, links: Iterable[str], cache: Optional[CacheLinks] = None) -> Dict[str, ResultadoLink]:
+        """Resultado de cada link distinto; solo se consultan los que no tienen un resultado vigente"""
+        ahora = time.time()
+        resultados: Dict[str, ResultadoLink] = {}
+        pendientes: Dict[str, str] = {}
+        for link in links:
+            if not link:
+                continue
+            clave, url = self.url_de(link)
+            if clave in resultados or clave in pendientes:
+                continue
+            guardado = cache.vigente(clave, ahora) if cache is not None else None
+            if guardado is not None:
+                resultados[clave] = guardado
+            else:
+                pendientes[clave] = url
+
+        if pendientes:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for resultado in executor.map(lambda item: self.verificar_url(*item), pendientes.items()):
+                    resultados[resultado.clave] = resultado
+                    if cache is not None:
+                        cache.resultados[resultado.clave] = resultado
+
+        self.consultados = len(pendientes)
+        return resultados
+
+
+def links_de(archivos: Iterable[str]) -> List[Dict]:
+    """Registros (solo titulo y link) de los archivos a verificar"""
+    registros = []
+    for archivo in archivos:
+        for registro in iterar_registros(archivo, campos=('titulo', 'link')):
+            registro['archivo'] = Path(archivo).name
+            registros.append(registro)
+    return registros
+
+
+def main():
+    """Verifica los links de los corpus publicados"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivos', nargs='*', default=['salida/contemplaciones.json'])
+    parser.add_argument('--workers', type=int, default=16, help="Consultas simultáneas en total")
+    parser.add_argument('--por-host', type=int, default=4, help="Consultas simultáneas por host")
+    parser.add_argument('--timeout', type=float, default=15, help="Segundos por consulta")
+    parser.add_argument('--ttl-horas', type=float, default=TTL_HORAS, help="Vigencia de un resultado guardado")
+    parser.add_argument('--plantilla', default=PLANTILLA_DRIVE,
+                        help="URL para consultar archivos de Drive, con {id} (p. ej. un servidor local de prueba)")
+    parser.add_argument('--cache', default=RUTA_CACHE, help="Archivo con los resultados anteriores")
+    parser.add_argument('--sin-cache', action='store_true', help="Consultar todos los links")
+    args = parser.parse_args()
+
+    registros = links_de(args.archivos)
+    cache = None if args.sin_cache else CacheLinks(args.cache, args.ttl_horas).cargar()
+    verificador = VerificadorLinks(args.plantilla, args.workers, args.por_host, args.timeout)
+
+    inicio = time.perf_counter()
+    resultados = verificador.verificar((r.get('link', '') for r in registros), cache)
+    duracion = time.perf_counter() - inicio
+    if cache is not None:
+        cache.guardar()
+
+    rotos = 0
+    for registro in registros:
+        link = registro.get('link', '')
+        if not link:
+            continue
+        resultado = resultados[verificador.url_de(link)[0]]
+        if resultado.estado != OK:
+            rotos += 1
+            motivo = resultado.detalle or resultado.codigo
+            print(f"✗ [{resultado.estado}: {motivo}] {registro['archivo']}: {registro.get('titulo', '')[:60]}")
+            print(f"      {link}")
+
+    print(f"\n🔗 Links distintos: {len(resultados)} ({verificador.consultados} consultados "
+          f"en {duracion:.1f} s, {len(resultados) - verificador.consultados} vigentes en cache)")
+    print(f"✗ Registros con link roto o sin respuesta: {rotos}")
+    return 1 if rotos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())